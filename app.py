@@ -7,14 +7,40 @@ A Flask-based web interface for analyzing and visualizing transaction data.
 
 import os
 import json
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import time
+from functools import partial
+from urllib.parse import urlencode
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, redirect, g, has_request_context
+from werkzeug.serving import is_running_from_reloader
+from dotenv import load_dotenv
 import pandas as pd
 import datetime
 import numpy as np
-from dateutil.relativedelta import relativedelta
-from data_eda import analyze_transactions
 from trx_consolidation import consolidate_transactions
 from transaction_enrichment import load_transactions as load_raw_transactions, enrich_transactions
+from merchant_resolution import build_merchant_index, load_merchant_index
+from insights_summary import materialize_insights_summary, load_insights_summary
+from pipeline_instrumentation import PipelineProfiler, default_report_folder
+from categorization_rules import get_rules, reload_rules
+from http_caching import ConditionalGetCache
+from app_metrics import AppMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from transaction_store import TransactionStore, SORT_COLUMNS
+from transaction_query import TransactionQuery, query_arguments
+from page_cache import PageModelCache
+from startup import StartupState, PeriodicTask, BackgroundJob
+from shared_snapshot import SharedSnapshots
+from profiles import Profile, ProfileRegistry, DEFAULT_PROFILE
+from page_models import (
+    default_date_range, build_index_model, build_analysis_model, build_categories_model, build_merchants_model,
+    build_category_deep_dive_model, build_merchant_deep_dive_model, build_enriched_insights_model
+)
+from chart_data import (
+    CHART_VALUES, TIMESERIES_RESOLUTIONS, build_summary_data, build_category_data, build_merchant_data, build_timeseries_data, build_weekday_data
+)
+from serializers import (
+    format_dates, serialize_transactions,
+    iter_ndjson, iter_csv, gzip_stream, arrow_table, iter_arrow_stream, parquet_bytes
+)
 
 # Add a helper function to convert NumPy types to Python native types
 def convert_to_serializable(obj):
@@ -33,387 +59,130 @@ def convert_to_serializable(obj):
 
 app = Flask(__name__)
 
+# Request, template and stage timings, exposed at /metrics
+metrics = AppMetrics(app)
+
+# Settings from .env, loaded before the configuration below and the pipelines read them
+load_dotenv()
+
 # Configuration
 DATA_FOLDER = 'data'
 ANALYSIS_FOLDER = 'static/analysis_results'
 TRANSACTION_FILE = 'consolidated_transactions_enriched.csv'
+MERCHANT_INDEX_FILE = 'merchant_index.json'
+INSIGHTS_SUMMARY_FILE = 'insights_summary.json'
+TRANSACTIONS_PAGE_SIZE = 100
+TRANSACTIONS_MAX_PAGE_SIZE = 500
+API_STREAM_BATCH_SIZE = 5000
+# Points per time series chart by default and at most
+TIMESERIES_POINTS = 180
+TIMESERIES_MAX_POINTS = 1000
+HTTP_CACHE_CONTROL = os.getenv('HTTP_CACHE_CONTROL', 'private, no-cache')
+PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Folder for snapshots shared by worker processes, e.g. /dev/shm/finance_snapshots; empty loads per process
+SHARED_SNAPSHOT_FOLDER = os.getenv('SHARED_SNAPSHOT_FOLDER', '')
+# Folder with one data folder per additional profile, e.g. profiles/alice; empty serves only DATA_FOLDER
+PROFILES_FOLDER = os.getenv('PROFILES_FOLDER', '')
+# Memory the loaded snapshots and page models of all profiles may hold together
+PROFILE_MEMORY_BUDGET_BYTES = int(os.getenv('PROFILE_MEMORY_BUDGET_BYTES', 2 * 1024 * 1024 * 1024))
+# Cookie remembering the selected profile; a profile request parameter takes precedence
+PROFILE_COOKIE = 'profile'
+# Seconds clients are asked to wait while the app warms up
+READINESS_RETRY_AFTER = 5
+# Seconds between checks for changed enriched files of the loaded profiles; 0 disables the check
+SNAPSHOT_WATCH_SECONDS = float(os.getenv('SNAPSHOT_WATCH_SECONDS', 5))
+
+# Endpoints served during warm-up and without HTTP validators: probes, metrics and static files
+OPERATIONAL_ENDPOINTS = ('static', 'serve_static', 'page_cache_stats', 'profile_stats', 'prometheus_metrics', 'healthz', 'readyz')
+
+# Streamed /api/data formats: format -> (mimetype, row batch generator)
+API_STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+    'csv': ('text/csv', iter_csv),
+}
+
+# Typed columnar /api/data formats (require pyarrow): format -> mimetype
+API_COLUMNAR_FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
 
 @app.route('/')
 def index():
     """Render the main dashboard page."""
-    # Ensure transaction data exists
-    ensure_transaction_data()
-    
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Get transaction data
-    transactions = load_transactions()
-    
-    # Apply date filters
-    filtered_transactions = transactions.copy()
-    if start_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    # Perform basic analysis for the dashboard
-    analysis = analyze_transactions(filtered_transactions)
-    
-    # Get counts by transaction type
-    txn_counts = {
-        'charges': filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge'].shape[0],
-        'payments': filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'payment'].shape[0],
-        'refunds': filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'refund'].shape[0]
-    }
-    
-    # Get financial summary
-    total_spent = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge']['amount'].sum()
-    total_refunded = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'refund']['amount'].abs().sum()
-    total_paid = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'payment']['amount'].abs().sum()
-    
-    # Get top 5 categories
-    charges = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge']
-    top_categories = charges.groupby('category')['amount'].sum().sort_values(ascending=False).head(5).to_dict()
-    
-    # Create date range string and date filter object
-    date_range = f"{start_date} to {end_date}"
-    date_filter = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'date_range': date_range
-    }
-    
-    return render_template('index.html',
-                          txn_counts=txn_counts,
-                          total_spent=total_spent,
-                          total_refunded=total_refunded,
-                          total_paid=total_paid,
-                          net_spending=total_spent - total_refunded,
-                          top_categories=top_categories,
-                          date_range=date_range,
-                          date_filter=date_filter)
+    return render_page_model()
 
 @app.route('/analyze')
 def analyze():
     """Generate and display detailed spending analysis."""
-    # Ensure transaction data exists
-    ensure_transaction_data()
-    
-    # Load transaction data
-    transactions = load_transactions()
-    
-    # Filter to only include charges for spending analysis
-    charges = transactions[transactions['transaction_type'].str.lower() == 'charge'].copy()
-    
-    # Create various analysis metrics
-    results = {}
-    
-    # 1. Overall spending summary
-    results['total_transactions'] = len(transactions)
-    results['total_charges'] = len(charges)
-    results['total_payments'] = len(transactions[transactions['transaction_type'].str.lower() == 'payment'])
-    results['total_refunds'] = len(transactions[transactions['transaction_type'].str.lower() == 'refund'])
-    
-    results['total_spent'] = charges['amount'].sum()
-    results['total_refunded'] = transactions[transactions['transaction_type'].str.lower() == 'refund']['amount'].abs().sum()
-    results['total_payments_amount'] = transactions[transactions['transaction_type'].str.lower() == 'payment']['amount'].abs().sum()
-    results['net_spending'] = results['total_spent'] - results['total_refunded']
-    
-    results['avg_transaction'] = charges['amount'].mean()
-    results['median_transaction'] = charges['amount'].median()
-    results['max_transaction'] = charges['amount'].max()
-    
-    # 2. Spending by category
-    category_spending = charges.groupby('category')['amount'].agg(['sum', 'count', 'mean']).reset_index()
-    category_spending = category_spending.sort_values('sum', ascending=False)
-    category_spending = category_spending.rename(columns={'sum': 'total_amount', 'count': 'transaction_count', 'mean': 'avg_amount'})
-    results['spending_by_category'] = category_spending.to_dict('records')
-    
-    # 3. Top merchants
-    charges.loc[:, 'merchant'] = charges['description'].apply(lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown')
-    merchant_spending = charges.groupby('merchant')['amount'].agg(['sum', 'count']).reset_index()
-    merchant_spending = merchant_spending.sort_values('sum', ascending=False)
-    results['top_merchants'] = merchant_spending.head(15).to_dict('records')
-    
-    # 3.5 Top 10 Transactions by Amount
-    top_transactions = charges.sort_values('amount', ascending=False).head(10).copy()
-    top_transactions['transaction_date'] = top_transactions['transaction_date'].dt.strftime('%Y-%m-%d')
-    results['top_transactions'] = top_transactions[['transaction_date', 'description', 'amount', 'category', 'source']].to_dict('records')
-    
-    # 4. Spending over time
-    charges.loc[:, 'day_of_week'] = charges['transaction_date'].dt.day_name()
-    charges.loc[:, 'week'] = charges['transaction_date'].dt.isocalendar().week
-    charges.loc[:, 'day_of_month'] = charges['transaction_date'].dt.day
-    
-    # Daily spending totals
-    daily_spending = charges.groupby(charges['transaction_date'].dt.date)['amount'].sum().reset_index()
-    daily_spending['transaction_date'] = daily_spending['transaction_date'].astype(str)
-    results['daily_spending'] = daily_spending.to_dict('records')
-    
-    # Spending by day of week
-    dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_spending = charges.groupby('day_of_week')['amount'].agg(['sum', 'count']).reindex(dow_order).reset_index()
-    results['spending_by_weekday'] = day_spending.to_dict('records')
-    
-    # 5. Spending by account source
-    source_spending = charges.groupby('source')['amount'].agg(['sum', 'count', 'mean']).reset_index()
-    source_spending = source_spending.sort_values('sum', ascending=False)
-    results['spending_by_source'] = source_spending.to_dict('records')
-    
-    # 6. Transaction size distribution
-    bin_edges = np.histogram_bin_edges(charges['amount'], bins=20)
-    hist, _ = np.histogram(charges['amount'], bins=bin_edges)
-    results['transaction_distribution'] = {
-        'counts': hist.tolist(),
-        'bin_labels': [f"${edge:.0f}" for edge in bin_edges[:-1]]
-    }
-    
-    return render_template('analysis.html', analysis=results)
+    return render_page_model()
 
 @app.route('/categories')
 def categories():
     """Display spending breakdown by category."""
-    transactions = load_transactions()
-    
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Filter transactions by date
-    filtered_transactions = transactions.copy()
-    if start_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    # Only include charges, and account for refunds
-    charges = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge'].copy()
-    
-    # Get spending by category (accounting for refunds)
-    category_data = charges.groupby('category').apply(
-        lambda grp: pd.Series({
-            'total': grp['amount'].sum() - grp['refunded_amount'].sum(),
-            'count': len(grp),
-            'refunded_count': (grp['refund_status'] == 'refunded').sum(),
-            'average': (grp['amount'].sum() - grp['refunded_amount'].sum()) / len(grp) if len(grp) > 0 else 0,
-            'first_date': grp['transaction_date'].min(),
-            'last_date': grp['transaction_date'].max()
-        })
-    ).reset_index()
-    
-    # Sort by adjusted total (accounting for refunds)
-    category_data = category_data.sort_values('total', ascending=False)
-    
-    # Convert to dictionary for template
-    categories_list = []
-    for _, row in category_data.iterrows():
-        categories_list.append({
-            'name': row['category'],
-            'total': row['total'],
-            'count': row['count'],
-            'refunded_count': row['refunded_count'],
-            'average': row['average'],
-            'first_date': row['first_date'].strftime('%Y-%m-%d'),
-            'last_date': row['last_date'].strftime('%Y-%m-%d')
-        })
-    
-    # Date range information for template
-    date_filter = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'date_range': f"{start_date} to {end_date}"
-    }
-    
-    return render_template('categories.html', 
-                          categories=categories_list, 
-                          date_filter=date_filter)
+    return render_page_model()
 
 @app.route('/merchants')
 def merchants():
     """Display spending breakdown by merchant."""
-    transactions = load_transactions()
-    
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Filter transactions by date
-    filtered_transactions = transactions.copy()
-    if start_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    charges = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge'].copy()
-    
-    # Extract merchant name (first word of description)
-    charges.loc[:, 'merchant'] = charges['description'].apply(
-        lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown'
-    )
-    
-    # Get spending by merchant
-    merchant_data = charges.groupby('merchant').agg({
-        'amount': ['sum', 'count', 'mean'],
-        'transaction_date': ['min', 'max']
-    })
-    
-    merchant_data.columns = ['total', 'count', 'average', 'first_date', 'last_date']
-    merchant_data = merchant_data.sort_values('total', ascending=False).reset_index()
-    
-    # Convert to dictionary for template
-    merchants_list = []
-    for _, row in merchant_data.iterrows():
-        merchants_list.append({
-            'name': row['merchant'],
-            'total': row['total'],
-            'count': row['count'],
-            'average': row['average'],
-            'first_date': row['first_date'].strftime('%Y-%m-%d'),
-            'last_date': row['last_date'].strftime('%Y-%m-%d')
-        })
-    
-    # Date range information for template
-    date_filter = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'date_range': f"{start_date} to {end_date}"
-    }
-    
-    return render_template('merchants.html', 
-                          merchants=merchants_list,
-                          date_filter=date_filter)
+    return render_page_model()
 
 @app.route('/transactions')
 def transactions():
-    """Display all transactions with filtering capability."""
-    transactions_df = load_transactions()
+    """Display transactions with filtering, sorting and keyset pagination."""
+    snapshot = current_snapshot()
+    start_date, end_date = requested_date_range()
     
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Apply filters if provided
-    txn_type = request.args.get('type')
-    category = request.args.get('category')
-    source = request.args.get('source')
-    min_amount = request.args.get('min_amount')
-    max_amount = request.args.get('max_amount')
+    # Filter values echoed back to the form
     refund_status = request.args.get('refund_status', '')
     description_filter = request.args.get('description', '')
     merchant_filter = request.args.get('merchant', '')
     
-    filtered_df = transactions_df.copy()
-    
-    # Extract merchant name (first word of description) for all transactions
-    filtered_df['merchant'] = filtered_df['description'].apply(
-        lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown'
+    # Sorting and pagination, defaulting to amount descending
+    sort = request.args.get('sort', 'amount')
+    if sort not in SORT_COLUMNS:
+        sort = 'amount'
+    descending = request.args.get('order', 'desc') != 'asc'
+    page_size = request.args.get('page_size', TRANSACTIONS_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, TRANSACTIONS_MAX_PAGE_SIZE))
+    
+    # Combine all filters into one mask over the snapshot
+    query = TransactionQuery.from_args(request.args, start_date=start_date, end_date=end_date)
+    with metrics.stage('filter'):
+        mask = query.mask(snapshot)
+    
+    page = snapshot.page(
+        mask, sort, descending, page_size,
+        after=request.args.get('after'),
+        before=request.args.get('before')
     )
+    metrics.count_rows(len(page['rows']))
     
-    # Apply date filters
-    if start_date:
-        filtered_df = filtered_df[filtered_df['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        filtered_df = filtered_df[filtered_df['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    if txn_type:
-        filtered_df = filtered_df[filtered_df['transaction_type'].str.lower() == txn_type.lower()]
-    
-    if category:
-        filtered_df = filtered_df[filtered_df['category'] == category]
-    
-    if source:
-        filtered_df = filtered_df[filtered_df['source'] == source]
-    
-    if min_amount:
-        filtered_df = filtered_df[filtered_df['amount'] >= float(min_amount)]
+    # Convert the page to a list of dictionaries for template
+    transactions_list = serialize_transactions(page['rows'], [
+        'date', 'description', 'merchant', 'amount', 'net_amount', 'category', 'source', 'type', 'refund_status'
+    ])
     
-    if max_amount:
-        filtered_df = filtered_df[filtered_df['amount'] <= float(max_amount)]
-    
-    if refund_status and refund_status != 'all':
-        filtered_df = filtered_df[filtered_df['refund_status'] == refund_status]
-    
-    # Apply description filter if provided (case-insensitive partial match)
-    if description_filter:
-        filtered_df = filtered_df[filtered_df['description'].str.contains(description_filter, case=False, na=False)]
-    
-    # Apply merchant filter if provided
-    if merchant_filter:
-        filtered_df = filtered_df[filtered_df['merchant'] == merchant_filter]
-    
-    # Sort by amount descending instead of date
-    filtered_df = filtered_df.sort_values('amount', ascending=False)
-    
-    # Convert to list of dictionaries for template
-    transactions_list = []
-    for _, row in filtered_df.iterrows():
-        net_amount = row['amount']
-        if row['transaction_type'].lower() == 'charge' and row['refund_status'] == 'refunded':
-            net_amount = row['amount'] - row['refunded_amount']
-        
-        transactions_list.append({
-            'date': row['transaction_date'].strftime('%Y-%m-%d'),
-            'description': row['description'],
-            'merchant': row['merchant'],
-            'amount': row['amount'],
-            'net_amount': net_amount,
-            'category': row['category'] if pd.notna(row['category']) else '',
-            'source': row['source'],
-            'type': row['transaction_type'],
-            'refund_status': row['refund_status']
-        })
-    
-    # Get unique values for filters
-    filter_options = {
-        'categories': transactions_df['category'].dropna().unique().tolist(),
-        'sources': transactions_df['source'].unique().tolist(),
+    # Filter values are precomputed once per snapshot
+    filter_options = dict(snapshot.filter_options)
+    filter_options.update({
         'types': ['charge', 'payment', 'refund'],
         'refund_statuses': ['all', 'none', 'refunded', 'matched'],
-        'merchants': filtered_df['merchant'].unique().tolist(),
+        'sorts': list(SORT_COLUMNS),
         'start_date': start_date,
         'end_date': end_date
+    })
+    
+    # Links to neighbouring pages keep every other query parameter
+    page_args = request.args.to_dict()
+    page_args.pop('after', None)
+    page_args.pop('before', None)
+    pagination = {
+        'next_url': f"/transactions?{urlencode(dict(page_args, after=page['next_cursor']))}" if page['next_cursor'] else None,
+        'prev_url': f"/transactions?{urlencode(dict(page_args, before=page['prev_cursor']))}" if page['prev_cursor'] else None,
+        'sort': sort,
+        'order': 'desc' if descending else 'asc',
+        'page_size': page_size
     }
     
     # Get date range for display
@@ -422,8 +191,9 @@ def transactions():
     return render_template('transactions.html', 
                           transactions=transactions_list, 
                           filter_options=filter_options,
+                          pagination=pagination,
                           date_range=date_range,
-                          count=len(transactions_list),
+                          count=int(mask.sum()),
                           refund_status=refund_status,
                           description_filter=description_filter,
                           merchant_filter=merchant_filter)
@@ -431,209 +201,12 @@ def transactions():
 @app.route('/deep-dive/<category>')
 def deep_dive_category(category):
     """Perform a deep-dive analysis on a specific category."""
-    transactions = load_transactions()
-    
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Filter transactions by date
-    filtered_transactions = transactions.copy()
-    if start_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        filtered_transactions = filtered_transactions[filtered_transactions['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    # Only include charges
-    charges = filtered_transactions[filtered_transactions['transaction_type'].str.lower() == 'charge'].copy()
-    
-    # Filter to the requested category
-    category_txns = charges[charges['category'] == category].copy()
-    
-    if category_txns.empty:
-        return render_template('error.html', message=f"No transactions found for category: {category}")
-    
-    # Calculate net amounts (amount - refunded_amount)
-    category_txns['net_amount'] = category_txns['amount'] - category_txns['refunded_amount']
-    
-    # Summary statistics (using net amounts)
-    summary = {
-        'total_spent': category_txns['net_amount'].sum(),
-        'transaction_count': len(category_txns),
-        'refunded_count': (category_txns['refund_status'] == 'refunded').sum(),
-        'average_amount': category_txns['net_amount'].mean(),
-        'largest_transaction': category_txns['net_amount'].max(),
-        'first_transaction': category_txns['transaction_date'].min().strftime('%Y-%m-%d'),
-        'last_transaction': category_txns['transaction_date'].max().strftime('%Y-%m-%d')
-    }
-    
-    # Get transactions sorted by amount descending
-    txns = []
-    for _, row in category_txns.sort_values('amount', ascending=False).iterrows():
-        txns.append({
-            'date': row['transaction_date'].strftime('%Y-%m-%d'),
-            'description': row['description'],
-            'amount': row['amount'],
-            'net_amount': row['net_amount'],
-            'source': row['source'],
-            'refund_status': row['refund_status']
-        })
-    
-    # Get spending by source for this category (accounting for refunds)
-    by_source = category_txns.groupby('source')['net_amount'].sum().sort_values(ascending=False).to_dict()
-    
-    # Extract merchant name (first word of description)
-    category_txns.loc[:, 'merchant'] = category_txns['description'].apply(
-        lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown'
-    )
-    
-    # Get spending by merchant for this category (accounting for refunds)
-    merchant_data = category_txns.groupby('merchant').agg({
-        'net_amount': 'sum',
-        'amount': 'count',
-        'transaction_date': ['min', 'max']
-    })
-    
-    merchant_data.columns = ['total', 'count', 'first_date', 'last_date']
-    merchant_data['average'] = merchant_data['total'] / merchant_data['count']
-    
-    # Filter out merchants with zero net amount (fully refunded)
-    merchant_data = merchant_data[merchant_data['total'] > 0]
-    
-    merchant_data = merchant_data.sort_values('total', ascending=False).reset_index()
-    
-    # Convert to list of dictionaries for template
-    merchants = []
-    for _, row in merchant_data.iterrows():
-        merchants.append({
-            'name': row['merchant'],
-            'total': row['total'],
-            'count': row['count'],
-            'average': row['average'],
-            'first_date': row['first_date'].strftime('%Y-%m-%d'),
-            'last_date': row['last_date'].strftime('%Y-%m-%d')
-        })
-    
-    # Get time series data (accounting for refunds)
-    time_data = category_txns.groupby(category_txns['transaction_date'].dt.date)['net_amount'].sum()
-    
-    # Format time series data for chart.js
-    time_series_data = {
-        'labels': [date.strftime('%Y-%m-%d') for date in time_data.index],
-        'values': time_data.values.tolist()
-    }
-    
-    # Date range information for template
-    date_filter = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'date_range': f"{start_date} to {end_date}"
-    }
-    
-    return render_template('deep_dive_category.html', 
-                          category=category,
-                          summary=summary,
-                          transactions=txns,
-                          by_source=by_source,
-                          time_series_data=time_series_data,
-                          merchants=merchants,
-                          date_filter=date_filter)
+    return render_page_model()
 
-@app.route('/deep-dive/merchant/<merchant>')
+@app.route('/deep-dive/merchant/<path:merchant>')
 def deep_dive_merchant(merchant):
     """Perform a deep-dive analysis on a specific merchant."""
-    transactions = load_transactions()
-    charges = transactions[transactions['transaction_type'].str.lower() == 'charge'].copy()
-    
-    # Calculate default date range (previous month)
-    today = datetime.date.today()
-    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
-    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
-    
-    # Format dates as strings for form values
-    default_start_date = first_day_prev_month.strftime('%Y-%m-%d')
-    default_end_date = last_day_prev_month.strftime('%Y-%m-%d')
-    
-    # Get date filters from request, defaulting to previous month
-    start_date = request.args.get('start_date', default_start_date)
-    end_date = request.args.get('end_date', default_end_date)
-    
-    # Apply date filters
-    if start_date:
-        charges = charges[charges['transaction_date'] >= pd.to_datetime(start_date)]
-    
-    if end_date:
-        charges = charges[charges['transaction_date'] <= pd.to_datetime(end_date)]
-    
-    # Extract merchant name (first word of description)
-    charges.loc[:, 'merchant'] = charges['description'].apply(
-        lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown'
-    )
-    
-    # Filter by merchant
-    merchant_txns = charges[charges['merchant'] == merchant].copy()
-    
-    if merchant_txns.empty:
-        return render_template('error.html', message=f"No transactions found for merchant: {merchant}")
-    
-    # Summary statistics
-    summary = {
-        'total_spent': merchant_txns['amount'].sum(),
-        'transaction_count': len(merchant_txns),
-        'average_amount': merchant_txns['amount'].mean(),
-        'largest_transaction': merchant_txns['amount'].max(),
-        'smallest_transaction': merchant_txns['amount'].min(),
-        'first_transaction': merchant_txns['transaction_date'].min().strftime('%Y-%m-%d'),
-        'last_transaction': merchant_txns['transaction_date'].max().strftime('%Y-%m-%d')
-    }
-    
-    # Get transactions sorted by amount descending
-    txns = []
-    for _, row in merchant_txns.sort_values('amount', ascending=False).iterrows():
-        txns.append({
-            'date': row['transaction_date'].strftime('%Y-%m-%d'),
-            'description': row['description'],
-            'amount': row['amount'],
-            'category': row['category'] if pd.notna(row['category']) else '',
-            'source': row['source']
-        })
-    
-    # Get spending by category for this merchant
-    by_category = merchant_txns.groupby('category')['amount'].sum().sort_values(ascending=False).to_dict()
-    
-    # Get time series data
-    time_data = merchant_txns.groupby(merchant_txns['transaction_date'].dt.date)['amount'].sum()
-    
-    # Format time series data for chart.js
-    time_series_data = {
-        'labels': [date.strftime('%Y-%m-%d') for date in time_data.index],
-        'values': time_data.values.tolist()
-    }
-    
-    # Date range information for template
-    date_filter = {
-        'start_date': start_date,
-        'end_date': end_date,
-        'date_range': f"{start_date} to {end_date}"
-    }
-    
-    return render_template('deep_dive_merchant.html', 
-                          merchant=merchant,
-                          summary=summary,
-                          transactions=txns,
-                          by_category=by_category,
-                          time_series_data=time_series_data,
-                          date_filter=date_filter)
+    return render_page_model()
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
@@ -642,185 +215,236 @@ def serve_static(filename):
 
 @app.route('/api/data')
 def api_data():
-    """API endpoint for getting transaction data in JSON format."""
-    transactions = load_transactions()
-    
-    # Apply filters
-    txn_type = request.args.get('type')
-    category = request.args.get('category')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    if txn_type:
-        transactions = transactions[transactions['transaction_type'].str.lower() == txn_type.lower()]
-    
-    if category:
-        transactions = transactions[transactions['category'] == category]
+    """
+    API endpoint for getting transaction data.
+    
+    The format parameter selects a JSON array (default), newline-delimited JSON
+    (ndjson) or CSV (csv), which are streamed in row batches and gzip-compressed
+    when the client accepts it (disable with gzip=0), or the typed columnar
+    formats Arrow IPC stream (arrow) and Parquet (parquet). The columns parameter
+    takes a comma-separated list of columns to return. Rows are filtered with the
+    same parameters as /transactions.
+    """
+    snapshot = current_snapshot()
+    transactions = snapshot.df
     
-    # Apply date filters
-    if start_date:
-        transactions = transactions[transactions['transaction_date'] >= pd.to_datetime(start_date)]
+    output_format = request.args.get('format', 'json').lower()
+    if output_format not in API_STREAM_FORMATS and output_format not in API_COLUMNAR_FORMATS and output_format != 'json':
+        return jsonify({'error': f"Unsupported format: {output_format}"}), 400
     
-    if end_date:
-        transactions = transactions[transactions['transaction_date'] <= pd.to_datetime(end_date)]
+    columns = None
+    if request.args.get('columns'):
+        columns = [column.strip() for column in request.args['columns'].split(',') if column.strip()]
+        unknown_columns = [column for column in columns if column not in transactions.columns]
+        if unknown_columns:
+            return jsonify({'error': f"Unknown columns: {', '.join(unknown_columns)}"}), 400
     
-    # Convert dates to strings for JSON serialization
-    transactions['transaction_date'] = transactions['transaction_date'].dt.strftime('%Y-%m-%d')
+    # Apply filters
+    with metrics.stage('filter'):
+        rows = TransactionQuery.from_args(request.args).rows(snapshot)
+    metrics.count_rows(len(rows))
+    
+    if output_format in API_COLUMNAR_FORMATS:
+        mimetype = API_COLUMNAR_FORMATS[output_format]
+        headers = {'Content-Disposition': f'attachment; filename="transactions.{output_format}"'}
+        try:
+            table = arrow_table(snapshot.columnar_df(), rows, columns)
+        except ImportError as e:
+            return jsonify({'error': str(e)}), 501
+        if output_format == 'arrow':
+            return Response(iter_arrow_stream(table, batch_size=API_STREAM_BATCH_SIZE), mimetype=mimetype, headers=headers)
+        return Response(parquet_bytes(table), mimetype=mimetype, headers=headers)
+    
+    if columns is not None:
+        transactions = transactions[columns]
+    
+    if output_format in API_STREAM_FORMATS:
+        mimetype, row_stream = API_STREAM_FORMATS[output_format]
+        chunks = row_stream(transactions, rows, batch_size=API_STREAM_BATCH_SIZE)
+        headers = {'Content-Disposition': f'inline; filename="transactions.{output_format}"', 'Vary': 'Accept-Encoding'}
+        if request.args.get('gzip') != '0' and 'gzip' in request.accept_encodings:
+            chunks = gzip_stream(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        return Response(chunks, mimetype=mimetype, headers=headers)
+    
+    # Convert dates to strings for JSON serialization on a copy of the shared snapshot
+    transactions = transactions.iloc[rows].copy()
+    if 'transaction_date' in transactions.columns:
+        transactions['transaction_date'] = format_dates(transactions['transaction_date'])
     if 'post_date' in transactions.columns:
-        transactions['post_date'] = transactions['post_date'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else None
+        transactions['post_date'] = format_dates(transactions['post_date']).astype(object).where(
+            transactions['post_date'].notna(), None
         )
     
     return jsonify(transactions.to_dict(orient='records'))
 
+@app.route('/api/summary')
+def api_summary():
+    """Chart data: transaction counts and totals per type."""
+    return chart_data_response()
+
+@app.route('/api/categories')
+def api_categories():
+    """Chart data: spending per category, with value, limit and positive options."""
+    return chart_data_response()
+
+@app.route('/api/merchants')
+def api_merchants():
+    """Chart data: spending per merchant, with value, limit and positive options."""
+    return chart_data_response()
+
+@app.route('/api/timeseries')
+def api_timeseries():
+    """Chart data: spending over time, with value, resolution and points options."""
+    return chart_data_response()
+
+@app.route('/api/weekday')
+def api_weekday():
+    """Chart data: spending per day of the week, with a value option."""
+    return chart_data_response()
+
 @app.route('/enriched-insights')
 def enriched_insights():
     """View enriched transaction insights."""
     try:
-        # Load the enriched transactions
-        if os.path.exists('data/consolidated_transactions_enriched.csv'):
-            enriched_df = pd.read_csv('data/consolidated_transactions_enriched.csv')
-        else:
-            # Fall back to raw transactions and enrich them
-            transactions = load_raw_transactions()
-            enriched_df = enrich_transactions(transactions)
-        
-        # Get some quick stats
-        total_transactions = len(enriched_df)
-        
-        # Get date range
-        date_range = {
-            'min': enriched_df['transaction_date'].min(),
-            'max': enriched_df['transaction_date'].max()
-        }
-        
-        # Calculate spending ratio
-        discretionary = abs(enriched_df[enriched_df['spending_type'] == 'Discretionary']['amount'].sum())
-        non_discretionary = abs(enriched_df[enriched_df['spending_type'] == 'Non-discretionary']['amount'].sum())
-        spending_ratio = discretionary / non_discretionary if non_discretionary > 0 else 0
-        
-        # Recurring transactions
-        recurring_count = enriched_df[enriched_df['is_recurring']].shape[0]
-        recurring_total = abs(enriched_df[enriched_df['is_recurring'] & (enriched_df['amount'] < 0)]['amount'].sum())
-        recurring_percentage = (recurring_count / total_transactions * 100) if total_transactions > 0 else 0
-        
-        # Get subscription data by frequency
-        subscription_data = {}
-        for freq in enriched_df[enriched_df['is_recurring']]['recurring_frequency'].unique():
-            subscription_data[freq] = []
-            # Get merchants for this frequency
-            merchants = enriched_df[(enriched_df['is_recurring']) & 
-                                    (enriched_df['recurring_frequency'] == freq)]['merchant'].unique()
-            
-            for merchant in merchants:
-                # Get most recent transaction for this merchant
-                latest_tx = enriched_df[(enriched_df['merchant'] == merchant) & 
-                                        (enriched_df['is_recurring'])].sort_values('transaction_date', ascending=False).iloc[0]
-                
-                subscription_data[freq].append({
-                    'merchant': merchant,
-                    'amount': abs(latest_tx['amount']),  # Use abs since expenses are now negative
-                    'category': latest_tx['category'],
-                    'subcategory': latest_tx['subcategory'],
-                    'last_date': latest_tx['transaction_date']
-                })
-            
-            # Sort by amount descending
-            subscription_data[freq] = sorted(subscription_data[freq], key=lambda x: x['amount'], reverse=True)
-        
-        # Prepare data for spending type chart
-        spending_type_data = {
-            'labels': [],
-            'values': []
-        }
-        spending_by_type = enriched_df.groupby('spending_type')['amount'].sum()
-        for spending_type, amount in spending_by_type.items():
-            # Skip Credit Payment, Income/Refund, and Transfer
-            if spending_type not in ['Credit Payment', 'Income/Refund', 'Transfer']:
-                spending_type_data['labels'].append(spending_type)
-                spending_type_data['values'].append(abs(amount))  # Use abs since expenses are negative
-        
-        # Prepare data for subcategory chart (top 10)
-        # With our new sign convention, expenses are negative so we filter for negative amounts
-        subcategory_spending = enriched_df[enriched_df['amount'] < 0].groupby('subcategory')['amount'].sum().sort_values().head(10).to_dict()
-        subcategory_data = {
-            'labels': list(subcategory_spending.keys()),
-            'values': [abs(val) for val in subcategory_spending.values()]  # Use abs since expenses are negative
-        }
-        
-        # Calculate spending by day of week
-        day_mapping = {
-            0: 'Monday',
-            1: 'Tuesday',
-            2: 'Wednesday', 
-            3: 'Thursday',
-            4: 'Friday',
-            5: 'Saturday',
-            6: 'Sunday'
-        }
-        
-        # With our new sign convention, expenses are negative so we filter for negative amounts
-        day_of_week_spending = enriched_df[enriched_df['amount'] < 0].groupby('day_of_week')['amount'].sum().to_dict()
-        
-        # Make sure all days are represented even if they have no transactions
-        for i in range(7):
-            if day_mapping[i] not in day_of_week_spending:
-                day_of_week_spending[day_mapping[i]] = 0
-        
-        # Sort by day of week
-        day_of_week_data = {
-            'labels': [day_mapping[i] for i in range(7)],
-            'values': [abs(day_of_week_spending.get(day_mapping[i], 0)) for i in range(7)]  # Use abs since expenses are negative
-        }
-        
-        # Get merchant spending (top 10)
-        # With our new sign convention, expenses are negative so we filter for negative amounts
-        merchant_spending = enriched_df[enriched_df['amount'] < 0].groupby('merchant')['amount'].sum().sort_values().head(10)
-        merchant_spending = {str(k): float(abs(v)) if not callable(v) else 0.0 for k, v in merchant_spending.items()}
-        
-        return render_template('enriched_insights.html',
-                               page_title="Enriched Insights",
-                               total_transactions=total_transactions,
-                               date_range=date_range,
-                               spending_ratio=spending_ratio,
-                               recurring_count=recurring_count,
-                               recurring_total=recurring_total,
-                               recurring_percentage=recurring_percentage,
-                               subscription_data=subscription_data,
-                               spending_type_data=spending_type_data,
-                               subcategory_data=subcategory_data,
-                               day_of_week_data=day_of_week_data,
-                               merchant_spending=merchant_spending)
+        return render_page_model()
     
     except Exception as e:
-        return render_template('error.html', error=f"Error loading enriched insights: {str(e)}")
+        # A 500 carries no validators, so clients do not revalidate the error page as current
+        return render_template('error.html', message=f"Error loading enriched insights: {str(e)}"), 500
 
-def ensure_transaction_data():
-    """Ensure transaction data exists, consolidate and enrich if needed."""
+@app.route('/admin/cache-stats')
+def page_cache_stats():
+    """Report the current profile's page model cache counters."""
+    profile = current_profile()
+    return jsonify(dict(profile.page_cache.stats(), profile=profile.name))
+
+@app.route('/admin/profiles')
+def profile_stats():
+    """Report the available profiles and the memory held by the loaded ones."""
+    return jsonify(dict(profiles.stats(), available=profiles.names()))
+
+@app.route('/profiles/<name>')
+def select_profile(name):
+    """Switch the browser to a profile and show its dashboard."""
+    if name not in profiles.names():
+        return render_template('error.html', message=f"Unknown profile: {name}"), 404
+    response = redirect('/')
+    response.set_cookie(PROFILE_COOKIE, name, samesite='Lax')
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Expose request latencies, stage timings, cache and snapshot metrics in the Prometheus text format."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once the warm-up has built the snapshot and default pages, 503 before."""
+    status = startup.status()
+    return jsonify(status), 200 if startup.is_ready() else 503
+
+@app.route('/admin/reload-rules', methods=['POST'])
+def reload_categorization_rules():
+    """
+    Reload the categorization rules file without a restart.
+    
+    The rules are validated and swapped in here; transactions are re-enriched
+    with them in the background, so the response is 202 Accepted.
+    """
+    try:
+        rules = reload_rules()
+    except (OSError, ValueError, KeyError) as e:
+        return jsonify({'error': f"Could not load categorization rules: {str(e)}"}), 400
+    
+    rules_rebuild.request()
+    return jsonify({'rules_version': rules.version, 'status': 'rebuilding'}), 202
+
+def ensure_transaction_data(profile=None):
+    """Ensure a profile's transaction data exists, consolidate and enrich if needed."""
+    profile = profile or profiles.get(DEFAULT_PROFILE)
+    data_folder = profile.data_folder
+    
     # First check for consolidated file
-    consolidated_file_path = os.path.join(DATA_FOLDER, 'consolidated_transactions.csv')
+    consolidated_file_path = os.path.join(data_folder, 'consolidated_transactions.csv')
     if not os.path.exists(consolidated_file_path):
-        print(f"Consolidated transaction file not found. Creating it...")
-        consolidate_transactions(DATA_FOLDER, 'consolidated_transactions.csv')
+        print(f"Consolidated transaction file not found in {data_folder}. Creating it...")
+        # Memory tracing would slow every allocation in the server while it runs
+        with PipelineProfiler('trx_consolidation', trace_memory=False) as profiler:
+            profiler.metadata['profile'] = profile.name
+            consolidate_transactions(data_folder, 'consolidated_transactions.csv', profiler=profiler)
+        print(f"Saved pipeline report to {profiler.save_report(pipeline_report_folder(profile))}")
     
     # Then check for enriched file
-    enriched_file_path = os.path.join(DATA_FOLDER, TRANSACTION_FILE)
+    enriched_file_path = os.path.join(data_folder, TRANSACTION_FILE)
     if not os.path.exists(enriched_file_path):
-        print(f"Enriched transaction file not found. Creating it...")
-        # Load consolidated transactions and enrich them
-        raw_transactions = load_raw_transactions(consolidated_file_path)
-        enriched_df = enrich_transactions(raw_transactions)
-        enriched_df.to_csv(enriched_file_path, index=False)
-        print(f"Enriched transactions saved to {enriched_file_path}")
-
-def load_transactions():
-    """Load transaction data from the consolidated CSV file."""
-    file_path = os.path.join(DATA_FOLDER, TRANSACTION_FILE)
+        print(f"Enriched transaction file not found in {data_folder}. Creating it...")
+        rebuild_enriched_transactions(profile)
+
+@metrics.timed('rebuild_enriched_transactions')
+def rebuild_enriched_transactions(profile=None):
+    """Enrich a profile's consolidated transactions with the current rules and save its enriched file."""
+    profile = profile or profiles.get(DEFAULT_PROFILE)
+    consolidated_file_path = os.path.join(profile.data_folder, 'consolidated_transactions.csv')
+    enriched_file_path = os.path.join(profile.data_folder, TRANSACTION_FILE)
+    
+    # Memory tracing would slow every allocation in the server while it runs
+    with PipelineProfiler('transaction_enrichment', trace_memory=False) as profiler:
+        profiler.metadata['profile'] = profile.name
+        profiler.metadata['rules_version'] = get_rules().version
+    
+        # Load consolidated transactions, resolve merchants and enrich them
+        with profiler.stage('load_transactions') as stage:
+            raw_transactions = load_raw_transactions(consolidated_file_path)
+            stage.rows_out = len(raw_transactions)
+        with profiler.stage('build_merchant_index', rows_in=len(raw_transactions)) as stage:
+            merchant_index = build_merchant_index(
+                raw_transactions['description'],
+                file_path=os.path.join(profile.data_folder, MERCHANT_INDEX_FILE)
+            )
+            stage.rows_out = len(merchant_index)
+        enriched_df = enrich_transactions(raw_transactions, merchant_index=merchant_index, profiler=profiler)
+        # The summary is written first so it is in place once the new enriched file is picked up
+        with profiler.stage('materialize_insights_summary', rows_in=len(enriched_df)):
+            materialize_insights_summary(enriched_df, os.path.join(profile.data_folder, INSIGHTS_SUMMARY_FILE))
+        with profiler.stage('save_enriched_transactions', rows_in=len(enriched_df)):
+            enriched_df.to_csv(enriched_file_path, index=False)
+    # A loaded snapshot is swapped now, keeping the file check and reload out of requests
+    if profile.store.refresh(force=True):
+        profiles.snapshot(profile)
+    print(f"Enriched transactions saved to {enriched_file_path}")
+    print(f"Saved pipeline report to {profiler.save_report(pipeline_report_folder(profile))}")
+
+def pipeline_report_folder(profile):
+    """Folder of a profile's pipeline reports: the configured one for the default profile, else inside its data folder."""
+    if profile.name == DEFAULT_PROFILE:
+        return default_report_folder()
+    return os.path.join(profile.data_folder, 'pipeline_reports')
+
+@metrics.timed('load_transactions')
+def load_transactions(data_folder=DATA_FOLDER):
+    """Load transaction data from a data folder's enriched CSV file."""
+    file_path = os.path.join(data_folder, TRANSACTION_FILE)
     transactions = pd.read_csv(file_path)
     transactions['transaction_date'] = pd.to_datetime(transactions['transaction_date'])
     if 'post_date' in transactions.columns:
         transactions['post_date'] = pd.to_datetime(transactions['post_date'], errors='coerce')
     
+    # Transaction IDs are row positions in the enriched file, stable until it is rebuilt
+    transactions['transaction_id'] = np.arange(len(transactions))
+    
+    # Enriched files written before merchant resolution lack merchant IDs; resolve them from the saved index
+    if 'merchant_id' not in transactions.columns:
+        merchant_index = load_merchant_index(os.path.join(data_folder, MERCHANT_INDEX_FILE))
+        resolved = merchant_index.resolve(transactions['description'])
+        transactions['merchant_id'] = resolved['merchant_id']
+        transactions['merchant'] = resolved['merchant']
+    
     # Add a refund_status field and refunded_amount field
     transactions['refund_status'] = 'none'
     transactions['refunded_amount'] = 0.0
@@ -830,6 +454,406 @@ def load_transactions():
     
     return transactions
 
+def create_profile(name, data_folder):
+    """
+    Build a profile's transaction store and page model cache.
+    
+    The snapshot watcher reloads the profile's snapshot when its enriched
+    file changes. Shared snapshots are published in a subfolder per profile.
+    """
+    store = TransactionStore(
+        partial(load_transactions, data_folder),
+        os.path.join(data_folder, TRANSACTION_FILE),
+        shared=SharedSnapshots(os.path.join(SHARED_SNAPSHOT_FOLDER, name)) if SHARED_SNAPSHOT_FOLDER else None
+    )
+    return Profile(name, data_folder, store, PageModelCache(max_bytes=PAGE_CACHE_MAX_BYTES))
+
+def prepare_profile(profile):
+    """Create a profile's data files before it is offered."""
+    ensure_transaction_data(profile)
+    ensure_insights_summary(profile)
+
+# Profiles served by the app, each with its own data folder, snapshot and page models
+profiles = ProfileRegistry(
+    DATA_FOLDER,
+    PROFILES_FOLDER,
+    create_profile,
+    prepare=prepare_profile,
+    memory_budget=PROFILE_MEMORY_BUDGET_BYTES
+)
+
+def current_profile():
+    """
+    Profile of the current request.
+    
+    The profile request parameter selects a profile, then the profile cookie
+    set by /profiles/<name>. Unknown, unprepared or missing names select the
+    default profile, as does any use outside a request.
+    
+    Returns:
+        Profile: The selected profile
+    """
+    if not has_request_context():
+        return profiles.get(DEFAULT_PROFILE)
+    if 'profile' not in g:
+        name = request.args.get('profile') or request.cookies.get(PROFILE_COOKIE) or DEFAULT_PROFILE
+        try:
+            g.profile = profiles.get(name)
+        except KeyError:
+            g.profile = profiles.get(DEFAULT_PROFILE)
+    return g.profile
+
+def current_snapshot():
+    """Snapshot of the current request's profile, loaded on demand."""
+    return profiles.snapshot(current_profile())
+
+def current_data_version():
+    """
+    Version of everything rendered pages depend on, used for HTTP validators.
+    
+    Pages default to the previous month, so the current date is part of the
+    version alongside the profile, its loaded enriched file and the
+    categorization rules. Only state recorded when they were loaded is read,
+    never the files themselves.
+    
+    Returns:
+        tuple: (version string, last modified datetime in UTC), or None before the profile's snapshot was first loaded
+    """
+    profile = current_profile()
+    store = profile.store
+    if store.version is None:
+        return None
+    
+    rules = get_rules()
+    today = datetime.date.today()
+    version = f"{profile.name}|{store.version}|{rules.version}|{today.isoformat()}"
+    last_modified = max(
+        store.modified,
+        rules.modified or 0,
+        datetime.datetime.combine(today, datetime.time()).timestamp()
+    )
+    return version, datetime.datetime.fromtimestamp(last_modified, tz=datetime.timezone.utc)
+
+@app.before_request
+def require_ready():
+    """Answer 503 until the warm-up has finished, except for probes, metrics and static files."""
+    if request.endpoint in OPERATIONAL_ENDPOINTS or startup.is_ready():
+        return None
+    # Servers that do not start the warm-up explicitly start it with the first request
+    startup.start()
+    status = startup.status()
+    if status['status'] == 'failed':
+        message = f"The dashboard could not start: {status['error']}. It will retry automatically."
+    else:
+        message = "The dashboard is starting up. Please retry in a few seconds."
+    response = app.make_response((render_template('error.html', message=message), 503))
+    response.headers['Retry-After'] = str(READINESS_RETRY_AFTER)
+    return response
+
+# ETag/Last-Modified validators and 304 responses for all read routes; the profile cookie selects the data
+http_cache = ConditionalGetCache(
+    app,
+    version_source=current_data_version,
+    cache_control=HTTP_CACHE_CONTROL,
+    exempt_endpoints=OPERATIONAL_ENDPOINTS,
+    vary=('Cookie',) if PROFILES_FOLDER else ()
+)
+
+def snapshot_metric(read):
+    """Scrape callback applying read to each profile's loaded snapshot, labelled by profile."""
+    def callback():
+        values = {}
+        for profile in list(profiles.profiles.values()):
+            snapshot = profile.store.current()
+            if snapshot is not None:
+                values[(profile.name,)] = read(snapshot)
+        return values
+    return callback
+
+def page_cache_stats_total():
+    """Page model cache counters summed over the profiles."""
+    totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+    for profile in list(profiles.profiles.values()):
+        stats = profile.page_cache.stats()
+        for key in totals:
+            totals[key] += stats[key]
+    return totals
+
+def page_cache_lookups():
+    """Page model cache hits and misses by result label."""
+    stats = page_cache_stats_total()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+def page_cache_hit_ratio():
+    """Share of page model lookups answered from the cache."""
+    stats = page_cache_stats_total()
+    lookups = stats['hits'] + stats['misses']
+    return stats['hits'] / lookups if lookups else None
+
+metrics.counter('page_cache_lookups_total', 'Page model cache lookups by result.', ('result',), callback=page_cache_lookups)
+metrics.gauge('page_cache_hit_ratio', 'Share of page model lookups answered from the cache.', callback=page_cache_hit_ratio)
+metrics.counter('page_cache_evictions_total', 'Page models evicted to stay within the memory budget.',
+                callback=lambda: page_cache_stats_total()['evictions'])
+metrics.gauge('page_cache_bytes', 'Estimated size of the cached page models.', callback=lambda: page_cache_stats_total()['bytes'])
+metrics.counter('not_modified_responses_total', 'Requests answered with 304 Not Modified.',
+                callback=lambda: http_cache.not_modified_count)
+metrics.gauge('snapshot_info', 'Version of the loaded transaction snapshot.', ('profile', 'version'),
+              callback=lambda: {(name, version): 1 for (name,), version in snapshot_metric(lambda snapshot: snapshot.version)().items()})
+metrics.gauge('snapshot_age_seconds', 'Seconds since the transaction snapshot was loaded.', ('profile',), callback=snapshot_metric(lambda snapshot: time.time() - snapshot.loaded_at))
+metrics.gauge('snapshot_rows', 'Transactions in the loaded snapshot.', ('profile',), callback=snapshot_metric(lambda snapshot: len(snapshot.df)))
+metrics.gauge('profile_memory_bytes', 'Estimated memory held by each loaded profile.', ('profile',),
+              callback=lambda: {(name,): stats['memory_bytes'] for name, stats in profiles.stats()['profiles'].items()})
+metrics.gauge('profile_memory_budget_bytes', 'Memory the loaded profiles may hold together.', callback=lambda: profiles.memory_budget)
+metrics.counter('profile_evictions_total', 'Profiles evicted from memory to stay within the budget.', callback=lambda: profiles.evictions)
+
+@app.context_processor
+def profile_context():
+    """Profiles offered in the navigation bar."""
+    return {'profile_names': profiles.names(), 'current_profile_name': current_profile().name}
+
+def requested_date_range():
+    """Date filters from the request, defaulting to the previous month."""
+    default_start_date, default_end_date = default_date_range(datetime.date.today())
+    return request.args.get('start_date', default_start_date), request.args.get('end_date', default_end_date)
+
+def page_cache_key(name, params):
+    """Cache key of a page model from the page name and its normalized parameters."""
+    return (name,) + tuple(sorted(params.items()))
+
+def cached_page_model(name, builder, load=None, **params):
+    """
+    Return a page model or chart data payload, computing it only once per data version.
+    
+    Args:
+        name (str): Page or chart data endpoint name, part of the cache key
+        builder (callable): Page model builder called with the loaded data and params
+        load (callable): Returns the data passed to the builder from the profile; defaults to its snapshot
+        **params: Normalized request parameters, part of the cache key
+    
+    Returns:
+        The builder's result: (template name, context) for pages, a dict for chart data
+    """
+    profile = current_profile()
+    load = load or profiles.snapshot
+    
+    def compute():
+        data = load(profile)
+        with metrics.stage(f'page_model_{name}'):
+            return builder(data, **params)
+    
+    profiles.touch(profile)
+    current = current_data_version()
+    if current is None:
+        return compute()
+    return profile.page_cache.get_or_compute(current[0], page_cache_key(name, params), compute)
+
+def load_insights_for_page(profile):
+    """Load a profile's materialized insights summary."""
+    return load_insights_summary(os.path.join(profile.data_folder, INSIGHTS_SUMMARY_FILE))
+
+# Pages rendered from cached page models: endpoint -> (builder, whether it takes a date range, data loader)
+PAGE_MODELS = {
+    'index': (build_index_model, True, None),
+    'analyze': (build_analysis_model, False, None),
+    'categories': (build_categories_model, True, None),
+    'merchants': (build_merchants_model, True, None),
+    'deep_dive_category': (build_category_deep_dive_model, True, None),
+    'deep_dive_merchant': (build_merchant_deep_dive_model, True, None),
+    'enriched_insights': (build_enriched_insights_model, False, load_insights_for_page),
+}
+
+def page_model_request():
+    """
+    Resolve the current request to its page model.
+    
+    Returns:
+        tuple: (builder, data loader, normalized parameters) for the request's endpoint
+    """
+    builder, dated, load = PAGE_MODELS[request.endpoint]
+    params = dict(request.view_args or {})
+    if dated:
+        params['start_date'], params['end_date'] = requested_date_range()
+    return builder, load, params
+
+def render_page_model():
+    """Render the current request's page from its cached page model."""
+    builder, load, params = page_model_request()
+    template, context = cached_page_model(request.endpoint, builder, load=load, **params)
+    return render_template(template, **context)
+
+# Chart data endpoints: endpoint -> (builder, options it takes, whether it defaults to charges)
+CHART_DATA = {
+    'api_summary': (build_summary_data, (), False),
+    'api_categories': (build_category_data, ('value', 'limit', 'positive'), True),
+    'api_merchants': (build_merchant_data, ('value', 'limit', 'positive'), True),
+    'api_timeseries': (build_timeseries_data, ('value', 'resolution', 'points'), True),
+    'api_weekday': (build_weekday_data, ('value',), True),
+}
+
+def chart_data_params(endpoint, args):
+    """
+    Normalize a chart data request's parameters.
+    
+    Rows are filtered with the same parameters as /api/data, over charges
+    unless a type is given. Options: value sums amount or net_amount, limit
+    keeps the largest groups and sums the rest as other, and positive=1 leaves
+    out groups whose total is not positive. Time series take a resolution
+    (auto, day, week, month or quarter) and a number of points, at least 3
+    and capped at TIMESERIES_MAX_POINTS.
+    
+    Args:
+        endpoint (str): Chart data endpoint
+        args (dict): Request arguments
+    
+    Returns:
+        tuple: (builder, normalized parameters)
+    
+    Raises:
+        ValueError: If an option has an unsupported value
+    """
+    builder, options, charges = CHART_DATA[endpoint]
+    params = query_arguments(args, transaction_type='charge') if charges else query_arguments(args)
+    if 'value' in options:
+        params['value'] = args.get('value', 'amount')
+        if params['value'] not in CHART_VALUES:
+            raise ValueError(f"Unsupported value: {params['value']}")
+    if 'limit' in options and args.get('limit'):
+        try:
+            params['limit'] = int(args['limit'])
+        except ValueError:
+            raise ValueError(f"Invalid limit: {args['limit']}") from None
+        if params['limit'] < 1:
+            raise ValueError(f"Invalid limit: {args['limit']}")
+    if 'positive' in options:
+        params['positive'] = args.get('positive') == '1'
+    if 'resolution' in options:
+        params['resolution'] = args.get('resolution', 'auto')
+        if params['resolution'] not in TIMESERIES_RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {params['resolution']}")
+    if 'points' in options:
+        try:
+            points = int(args.get('points', TIMESERIES_POINTS))
+        except ValueError:
+            raise ValueError(f"Invalid points: {args['points']}") from None
+        if points < 3:
+            raise ValueError(f"Invalid points: {args['points']}")
+        params['points'] = min(points, TIMESERIES_MAX_POINTS)
+    return builder, params
+
+def chart_data_response():
+    """Answer the current chart data request from its cached payload."""
+    try:
+        builder, params = chart_data_params(request.endpoint, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(cached_page_model(request.endpoint, builder, **params))
+
+# Pages pre-computed for their default parameters, i.e. the previous month where dated
+WARM_PAGES = ('index', 'analyze', 'categories', 'merchants', 'enriched_insights')
+
+# Chart data fetched by the /analyze page, pre-computed with the pages
+WARM_CHARTS = (
+    ('api_summary', {}),
+    ('api_categories', {'limit': '8'}),
+    ('api_merchants', {'limit': '10'}),
+    ('api_timeseries', {}),
+    ('api_weekday', {}),
+)
+
+def ensure_insights_summary(profile=None):
+    """Summarize a profile's enriched file once if it predates materialized summaries."""
+    profile = profile or profiles.get(DEFAULT_PROFILE)
+    summary_path = os.path.join(profile.data_folder, INSIGHTS_SUMMARY_FILE)
+    if not os.path.exists(summary_path):
+        materialize_insights_summary(pd.read_csv(os.path.join(profile.data_folder, TRANSACTION_FILE)), summary_path)
+
+def warm_caches(profile=None):
+    """Load a profile's snapshot, build its indexes and pre-compute its default page models and chart data."""
+    profile = profile or profiles.get(DEFAULT_PROFILE)
+    # Page models are cached for the profile of the current request
+    with app.test_request_context(query_string={'profile': profile.name}):
+        snapshot = current_snapshot()
+        snapshot.build_indexes()
+        default_start_date, default_end_date = default_date_range(datetime.date.today())
+        for name in WARM_PAGES:
+            builder, dated, load = PAGE_MODELS[name]
+            params = {'start_date': default_start_date, 'end_date': default_end_date} if dated else {}
+            cached_page_model(name, builder, load=load, **params)
+        for name, args in WARM_CHARTS:
+            builder, params = chart_data_params(name, args)
+            cached_page_model(name, builder, **params)
+    # The estimate now includes the indexes built above
+    profiles.measure()
+
+def refresh_snapshots():
+    """Swap in the enriched files of loaded profiles that changed on disk and warm their caches, off the request path."""
+    for profile in list(profiles.profiles.values()):
+        if profile.store.refresh():
+            print(f"Reloaded the {profile.name} snapshot after its enriched file changed")
+            profiles.snapshot(profile)
+            warm_caches(profile)
+
+def watch_data_files():
+    """Pick up new profile folders and changed enriched files, and re-estimate the memory of the loaded profiles."""
+    profiles.refresh()
+    refresh_snapshots()
+    profiles.measure()
+
+def rebuild_for_rules():
+    """Re-enrich every profile with enriched data using the current rules and re-warm the loaded ones."""
+    # Profiles prepared later are enriched with the rules current at that time
+    for name in profiles.names():
+        profile = profiles.get(name)
+        if os.path.exists(os.path.join(profile.data_folder, TRANSACTION_FILE)):
+            rebuild_enriched_transactions(profile)
+            if profile.is_loaded():
+                warm_caches(profile)
+
+# Re-enriches transactions after the rules are reloaded, outside the request
+rules_rebuild = BackgroundJob('rules-rebuild', rebuild_for_rules)
+
+# Checks the profiles and their enriched files in the background once the warm-up has finished
+snapshot_watcher = PeriodicTask('snapshot-watcher', SNAPSHOT_WATCH_SECONDS, watch_data_files)
+
+# Endpoints that never run heavy pandas work
+LIGHT_ENDPOINTS = set(OPERATIONAL_ENDPOINTS)
+
+def is_light_request(environ):
+    """
+    Whether a request can be answered without heavy pandas work.
+    
+    Light requests are static files, status endpoints, conditional requests
+    that will be answered with 304, and pages and chart data already cached.
+    Used by the ASGI server to keep them from queueing behind heavy requests.
+    
+    Args:
+        environ (dict): WSGI environment of the request
+    
+    Returns:
+        bool: True for light requests
+    """
+    with app.request_context(environ):
+        endpoint = request.endpoint
+        if endpoint in LIGHT_ENDPOINTS:
+            return True
+        current = current_data_version()
+        if endpoint is None or current is None:
+            return False
+        if http_cache.is_not_modified(*current):
+            return True
+        if endpoint in PAGE_MODELS:
+            _, _, params = page_model_request()
+            return current_profile().page_cache.contains(current[0], page_cache_key(endpoint, params))
+        if endpoint in CHART_DATA:
+            try:
+                _, params = chart_data_params(endpoint, request.args)
+            except ValueError:
+                # Answered with a 400 straight away
+                return True
+            return current_profile().page_cache.contains(current[0], page_cache_key(endpoint, params))
+    return False
+
+@metrics.timed('match_refunds_to_charges')
 def match_refunds_to_charges(transactions):
     """
     Match refund transactions to their original charges based on description, amount and date proximity.
@@ -867,16 +891,13 @@ def match_refunds_to_charges(transactions):
             (charges['refund_status'] == 'none')
         ]
         
-        # If no exact match, try to find a match with similar description
-        if matches.empty:
-            # Try to extract merchant name from first word
-            if pd.notna(refund['description']) and len(refund['description'].split()) > 0:
-                merchant = refund['description'].split()[0]
-                matches = charges[
-                    (charges['description'].str.startswith(merchant, na=False)) & 
-                    (charges['amount'] == refund_amount) &
-                    (charges['refund_status'] == 'none')
-                ]
+        # If no exact match, try to find a match from the same resolved merchant
+        if matches.empty and pd.notna(refund['description']):
+            matches = charges[
+                (charges['merchant_id'] == refund['merchant_id']) & 
+                (charges['amount'] == refund_amount) &
+                (charges['refund_status'] == 'none')
+            ]
         
         # Find the closest match by date if multiple matches
         if not matches.empty:
@@ -903,6 +924,20 @@ def create_necessary_folders():
     os.makedirs(DATA_FOLDER, exist_ok=True)
     os.makedirs(ANALYSIS_FOLDER, exist_ok=True)
 
+# Warm-up run before the app is ready: the default profile's data files first, then its in-memory caches,
+# then the watcher picking up changed files. Other profiles are prepared and loaded on first use.
+startup = StartupState([
+    ('create_folders', create_necessary_folders),
+    ('ensure_transaction_data', ensure_transaction_data),
+    ('ensure_insights_summary', ensure_insights_summary),
+    ('warm_caches', warm_caches),
+    ('prepare_profiles', profiles.refresh),
+    ('watch_snapshots', snapshot_watcher.start),
+])
+metrics.gauge('ready', 'Whether the warm-up has finished.', callback=lambda: int(startup.is_ready()))
+
 if __name__ == '__main__':
-    create_necessary_folders()
+    # The debug reloader serves from a child process, which is the one to warm up
+    if is_running_from_reloader():
+        startup.start()
     app.run(debug=True, port=5001) 
\ No newline at end of file
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+App Metrics
+
+This module instruments the Flask app and exposes the measurements in the
+Prometheus text exposition format. Request hooks record latency and response
+size histograms per route. Template rendering is timed through Flask's
+signals. Code paths of interest, such as data loading, refund matching,
+filtering and rebuilds, are timed with stage() or timed(). Values that already live
+elsewhere, such as cache statistics or the snapshot version, are read from
+callbacks when the metrics are scraped.
+"""
+
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from flask import g, request, before_render_template, template_rendered
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Response size buckets in bytes, from 256 B to 64 MB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_value(value):
+    """Format a sample value as Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _format_labels(names, values):
+    """Format label pairs, escaping backslashes, quotes and newlines."""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class Metric:
+    """
+    Base class for a named metric family with fixed label names.
+
+    Values are either recorded directly or read from a callback at scrape
+    time. The callback returns a dict mapping label value tuples to values,
+    a single number for a metric without labels, or None for no samples.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, label_names=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Label values in label name order."""
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def samples(self):
+        """Yield (suffix, label names, label values, value) for every sample."""
+        if self.callback is not None:
+            values = self.callback()
+            if values is None:
+                return
+            if not isinstance(values, dict):
+                values = {(): values}
+            items = [(tuple(str(part) for part in key), value) for key, value in values.items()]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in sorted(items):
+            yield '', self.label_names, key, value
+
+    def render(self):
+        """Return the metric family in the text exposition format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets, with their count and sum."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, dict(state, counts=list(state['counts']))) for key, state in self._values.items()]
+        names = self.label_names + ('le',)
+        for key, state in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                yield '_bucket', names, key + (_format_value(bound),), cumulative
+            yield '_sum', self.label_names, key, state['sum']
+            yield '_count', self.label_names, key, state['count']
+
+class MetricsRegistry:
+    """
+    Collection of metric families rendered together.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        """Add a metric family, returning it."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, label_names=(), callback=None):
+        return self.register(Counter(name, documentation, label_names, callback))
+
+    def gauge(self, name, documentation, label_names=(), callback=None):
+        return self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        """
+        Render all metric families.
+
+        Returns:
+            str: Metrics in the Prometheus text exposition format
+        """
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+class AppMetrics:
+    """
+    Request, template and stage instrumentation for a Flask app.
+
+    Metrics are prefixed with the given namespace. Routes are labelled by
+    their URL rule, so all deep dives share one series. Unmatched paths are
+    grouped together.
+    """
+
+    def __init__(self, app=None, namespace='dashboard', registry=None):
+        self.namespace = namespace
+        self.registry = registry or MetricsRegistry()
+        self.request_seconds = self.registry.histogram(
+            f'{namespace}_request_duration_seconds', 'Request latency by route.', ('method', 'route', 'status'))
+        self.response_bytes = self.registry.histogram(
+            f'{namespace}_response_size_bytes', 'Response body size by route, for responses with a known length.',
+            ('route',), buckets=SIZE_BUCKETS)
+        self.template_seconds = self.registry.histogram(
+            f'{namespace}_template_render_seconds', 'Template rendering time.', ('template',))
+        self.stage_seconds = self.registry.histogram(
+            f'{namespace}_stage_duration_seconds', 'Time spent in instrumented code paths.', ('stage',))
+        self.rows_served = self.registry.counter(
+            f'{namespace}_rows_served_total', 'Transaction rows returned to clients.', ('route',))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the request hooks and template signals on a Flask app."""
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+
+    def gauge(self, name, documentation, label_names=(), callback=None):
+        """Register a gauge under the namespace, optionally read from a callback."""
+        return self.registry.gauge(f'{self.namespace}_{name}', documentation, label_names, callback)
+
+    def counter(self, name, documentation, label_names=(), callback=None):
+        """Register a counter under the namespace, optionally read from a callback."""
+        return self.registry.counter(f'{self.namespace}_{name}', documentation, label_names, callback)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as a named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, stage=name)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as a named stage."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count_rows(self, count):
+        """Count transaction rows returned by the current request."""
+        self.rows_served.inc(int(count), route=self._route())
+
+    def render(self):
+        """Render all metrics in the text exposition format."""
+        return self.registry.render()
+
+    def _route(self):
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    def _start_request(self):
+        g.metrics_request_start = time.perf_counter()
+
+    def _finish_request(self, response):
+        start = g.pop('metrics_request_start', None)
+        if start is None:
+            return response
+        route = self._route()
+        self.request_seconds.observe(time.perf_counter() - start, method=request.method, route=route, status=response.status_code)
+        # Streamed responses have no length until they are sent
+        if response.content_length is not None:
+            self.response_bytes.observe(response.content_length, route=route)
+        return response
+
+    def _start_template(self, sender, template, context, **extra):
+        g.setdefault('metrics_template_starts', []).append(time.perf_counter())
+
+    def _finish_template(self, sender, template, context, **extra):
+        starts = g.get('metrics_template_starts')
+        if starts:
+            self.template_seconds.observe(time.perf_counter() - starts.pop(), template=template.name)
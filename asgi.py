@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+ASGI Serving
+
+This module serves the Flask dashboard through ASGI. The event loop only moves
+bytes. Each request runs in one of two bounded thread pools:
+- Light requests run in the light pool: static files, status endpoints,
+  304 revalidations and pages whose model is already cached.
+- Everything else runs in the heavy pool, which bounds how much pandas work
+  runs at once.
+Cheap requests therefore never queue behind slow rebuilds or uncached
+analysis pages. Streamed responses are pulled chunk by chunk in the pool that
+produced them.
+
+Scope: requests are dispatched whole. The route handlers are unchanged
+synchronous Flask views, and their data access is not awaited: each one
+blocks its pool thread until it returns. Only request and response I/O and
+the choice of pool are asynchronous. Heavy work still holds the GIL while it
+runs, so the split bounds how many pandas builds run at once and keeps them
+from queueing ahead of light requests. It does not make those builds faster.
+
+Importing this module has no side effects. create_application imports the
+dashboard and starts its warm-up, and servers call it as a factory.
+
+Configuration (environment variables or .env):
+    ASGI_HOST: Interface to bind (default 127.0.0.1)
+    ASGI_PORT: Port to listen on (default 5001)
+    ASGI_LIGHT_WORKERS: Threads for light requests (default 16)
+    ASGI_HEAVY_WORKERS: Threads for heavy requests (default 2)
+
+Usage:
+    python asgi.py
+    uvicorn --factory asgi:create_application
+"""
+
+import os
+import io
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ASGI_HOST = os.getenv('ASGI_HOST', '127.0.0.1')
+ASGI_PORT = int(os.getenv('ASGI_PORT', 5001))
+ASGI_LIGHT_WORKERS = int(os.getenv('ASGI_LIGHT_WORKERS', 16))
+ASGI_HEAVY_WORKERS = int(os.getenv('ASGI_HEAVY_WORKERS', 2))
+
+def build_environ(scope, body):
+    """
+    Build a WSGI environment from an ASGI HTTP scope.
+
+    Args:
+        scope (dict): ASGI connection scope
+        body (bytes): Complete request body
+
+    Returns:
+        dict: WSGI environment
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        # WSGI carries the raw path bytes as a latin-1 string
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+class AsyncWSGIAdapter:
+    """
+    ASGI application running a WSGI app in separate light and heavy thread pools.
+
+    The classifier is called with a copy of the WSGI environment and returns
+    True for requests that are cheap to answer. Without a classifier every
+    request is heavy, which behaves like a fixed pool of synchronous workers.
+    """
+
+    def __init__(self, wsgi_app, is_light_request=None, light_workers=ASGI_LIGHT_WORKERS, heavy_workers=ASGI_HEAVY_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.is_light_request = is_light_request
+        self.light_executor = ThreadPoolExecutor(light_workers, thread_name_prefix='asgi-light')
+        self.heavy_executor = ThreadPoolExecutor(heavy_workers, thread_name_prefix='asgi-heavy')
+        self.light_requests = 0
+        self.heavy_requests = 0
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self._read_body(receive)
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+
+        light = False
+        if self.is_light_request is not None:
+            light = await loop.run_in_executor(self.light_executor, self.is_light_request, dict(environ))
+        executor = self.light_executor if light else self.heavy_executor
+        with self._lock:
+            if light:
+                self.light_requests += 1
+            else:
+                self.heavy_requests += 1
+
+        status, headers, chunks = await loop.run_in_executor(executor, self._start_response, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        try:
+            while True:
+                chunk = await loop.run_in_executor(executor, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(chunks, 'close'):
+                await loop.run_in_executor(executor, chunks.close)
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    def _start_response(self, environ):
+        """Run the WSGI app up to its first body chunk and return (status, headers, chunk iterator)."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return lambda data: None
+
+        result = self.wsgi_app(environ, start_response)
+        iterator = iter(result)
+        # Apps may call start_response lazily, so pull the first chunk before reading the status
+        first = next(iterator, None)
+        chunks = _ChunkIterator(first, iterator, result)
+        return response['status'], response['headers'], chunks
+
+    async def _read_body(self, receive):
+        """Read the complete request body."""
+        parts = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            parts.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        return b''.join(parts)
+
+    async def _lifespan(self, receive, send):
+        """Shut the thread pools down when the server stops."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.light_executor.shutdown(wait=False)
+                self.heavy_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def stats(self):
+        """
+        Return request counters per pool.
+
+        Returns:
+            dict: light_requests and heavy_requests
+        """
+        with self._lock:
+            return {'light_requests': self.light_requests, 'heavy_requests': self.heavy_requests}
+
+class _ChunkIterator:
+    """WSGI body iterator with its first chunk already pulled."""
+
+    def __init__(self, first, iterator, result):
+        self.first = first
+        self.iterator = iterator
+        self.result = result
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.first is not None:
+            chunk, self.first = self.first, None
+            return chunk
+        return next(self.iterator)
+
+    def close(self):
+        if hasattr(self.result, 'close'):
+            self.result.close()
+
+def create_application():
+    """Create the ASGI application for the dashboard, starting its warm-up."""
+    import app as dashboard
+    # Probes answer while the data and caches warm up in the background
+    dashboard.startup.start()
+    return AsyncWSGIAdapter(dashboard.app, is_light_request=dashboard.is_light_request)
+
+def _require_uvicorn():
+    """Import uvicorn on first use so the adapter can be imported without it."""
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise ImportError("The ASGI server requires uvicorn (pip install uvicorn)") from e
+    return uvicorn
+
+def main():
+    """Serve the dashboard with uvicorn."""
+    uvicorn = _require_uvicorn()
+    uvicorn.run(create_application, host=ASGI_HOST, port=ASGI_PORT, factory=True)
+
+if __name__ == '__main__':
+    main()
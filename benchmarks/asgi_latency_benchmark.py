@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+ASGI Latency Benchmark
+
+Drives the dashboard through asgi.AsyncWSGIAdapter with a mixed load of heavy
+requests (uncached pages over random date ranges) and light requests (static
+files, cache stats, cached pages and 304 revalidations). Compares one shared
+thread pool, which behaves like a fixed set of synchronous workers, against
+separate light and heavy pools, and reports latency percentiles per request
+class. Both modes must return the same responses.
+
+Usage:
+    python benchmarks/asgi_latency_benchmark.py [row_count] [request_count]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+CONCURRENCY = 16
+HEAVY_SHARE = 0.2
+HEAVY_WORKERS = 2
+LIGHT_WORKERS = 16
+
+MERCHANTS = ['Safeway', 'Costco', 'Amazon', 'Uber', 'Netflix', 'Spotify', 'PG&E', 'Target', 'Lyft', 'Trader Joes']
+CATEGORIES = ['Groceries', 'Groceries', 'Shopping', 'Travel', 'Entertainment', 'Entertainment', 'Bills & Utilities', 'Shopping', 'Travel', 'Groceries']
+
+def generate_enriched_transactions(row_count, seed=42):
+    """
+    Generate an enriched transactions file without refunds.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic enriched transactions
+    """
+    rng = np.random.default_rng(seed)
+    merchant_ids = rng.integers(0, len(MERCHANTS), row_count)
+    dates = pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 1000, row_count), unit='D')
+    amounts = -np.round(rng.uniform(3, 300, row_count), 2)
+    merchants = np.array(MERCHANTS, dtype=object)[merchant_ids]
+    categories = np.array(CATEGORIES, dtype=object)[merchant_ids]
+    return pd.DataFrame({
+        'transaction_date': dates.strftime('%Y-%m-%d'),
+        'post_date': '',
+        'description': merchants + ' #' + rng.integers(0, 500, row_count).astype(str),
+        'amount': amounts,
+        'category': categories,
+        'source': np.array(['Chase', 'Amex'], dtype=object)[rng.integers(0, 2, row_count)],
+        'account_id': np.array(['Chase_1234', 'Amex_1005'], dtype=object)[rng.integers(0, 2, row_count)],
+        'additional_details': '',
+        'account_type': 'Credit Card',
+        'transaction_type': 'Charge',
+        'subcategory': categories,
+        'merchant': merchants,
+        'merchant_id': merchant_ids,
+        'is_recurring': False,
+        'recurring_frequency': '',
+        'spending_type': np.array(['Discretionary', 'Non-discretionary'], dtype=object)[rng.integers(0, 2, row_count)],
+        'original_amount': amounts,
+        'absolute_amount': -amounts,
+        'amount_category': '$0-$50',
+        'transaction_month': dates.strftime('%Y-%m'),
+        'day_of_week': dates.day_name(),
+        'is_weekend': dates.dayofweek >= 5,
+    })
+
+async def asgi_request(application, path, headers=()):
+    """
+    Send one GET request to an ASGI application.
+
+    Args:
+        application: ASGI application
+        path (str): Path with optional query string
+        headers (tuple): (name, value) request headers
+
+    Returns:
+        tuple: (status, headers dict, body)
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 5001),
+    }
+    response = {'body': []}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode(): value.decode() for name, value in message['headers']}
+        else:
+            response['body'].append(message.get('body', b''))
+
+    await application(scope, receive, send)
+    return response['status'], response['headers'], b''.join(response['body'])
+
+def random_date_range(rng):
+    """A random date range within the generated data, almost never repeated."""
+    start = pd.Timestamp('2022-01-01') + pd.Timedelta(days=rng.randint(0, 900))
+    end = start + pd.Timedelta(days=rng.randint(7, 90))
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+def build_workload(request_count, etag, seed=7):
+    """
+    Draw the mixed request sequence.
+
+    Returns:
+        list: (request class, path, headers) tuples
+    """
+    rng = random.Random(seed)
+    light = [
+        ('/static/css/style.css', ()),
+        ('/admin/cache-stats', ()),
+        ('/analyze', ()),
+        ('/analyze', (('If-None-Match', etag),)),
+    ]
+    workload = []
+    for _ in range(request_count):
+        if rng.random() < HEAVY_SHARE:
+            start, end = random_date_range(rng)
+            page = rng.choice(['/', '/categories', '/merchants'])
+            workload.append(('heavy', f'{page}?start_date={start}&end_date={end}', ()))
+        else:
+            path, headers = rng.choice(light)
+            workload.append(('light', path, headers))
+    return workload
+
+async def run_load(application, workload):
+    """
+    Replay the workload with CONCURRENCY concurrent clients.
+
+    Returns:
+        tuple: (latencies per request class, responses in workload order)
+    """
+    queue = asyncio.Queue()
+    for position, request in enumerate(workload):
+        queue.put_nowait((position, request))
+    latencies = {'light': [], 'heavy': []}
+    responses = [None] * len(workload)
+
+    async def client():
+        while not queue.empty():
+            position, (kind, path, headers) = queue.get_nowait()
+            start = time.perf_counter()
+            status, _, body = await asgi_request(application, path, headers)
+            latencies[kind].append(time.perf_counter() - start)
+            responses[position] = (status, body if kind == 'heavy' else status)
+
+    await asyncio.gather(*(client() for _ in range(CONCURRENCY)))
+    return latencies, responses
+
+def percentiles(latencies):
+    """p50, p95 and p99 in milliseconds."""
+    return [np.percentile(latencies, q) * 1000 for q in (50, 95, 99)]
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    # The dashboard reads data/ relative to the working directory
+    work_dir = tempfile.mkdtemp(prefix='asgi_benchmark_')
+    os.makedirs(os.path.join(work_dir, 'data'))
+    generate_enriched_transactions(row_count).to_csv(os.path.join(work_dir, 'data', 'consolidated_transactions_enriched.csv'), index=False)
+    open(os.path.join(work_dir, 'data', 'consolidated_transactions.csv'), 'w').close()
+    os.chdir(work_dir)
+
+    import app
+    from asgi import AsyncWSGIAdapter
+    app.startup.run()
+
+    print(f"Benchmarking {request_count} requests ({HEAVY_SHARE:.0%} heavy) with {CONCURRENCY} clients on {row_count} transactions...")
+    modes = {
+        'Single pool': AsyncWSGIAdapter(app.app, is_light_request=None, light_workers=1, heavy_workers=HEAVY_WORKERS),
+        'Split pools': AsyncWSGIAdapter(app.app, is_light_request=app.is_light_request, light_workers=LIGHT_WORKERS, heavy_workers=HEAVY_WORKERS),
+    }
+
+    results = {}
+    for name, application in modes.items():
+        # Each mode starts from the same warm state: data loaded and /analyze cached
+        app.profiles.get().page_cache.clear()
+        status, headers, _ = asyncio.run(asgi_request(application, '/analyze'))
+        workload = build_workload(request_count, headers.get('ETag', ''))
+        start = time.perf_counter()
+        latencies, responses = asyncio.run(run_load(application, workload))
+        results[name] = (time.perf_counter() - start, latencies, responses, application.stats())
+
+    (_, _, single, _), (_, _, split, _) = results.values()
+    if single != split or any(response[0] >= 400 for response in single):
+        print("Parity check FAILED: responses differ between modes or report errors")
+        sys.exit(1)
+    print("Parity check passed: both modes return the same responses")
+
+    for name, (seconds, latencies, _, stats) in results.items():
+        print(f"  {name}: {seconds:.2f}s total, {stats['light_requests']} light / {stats['heavy_requests']} heavy dispatches")
+        for kind in ('light', 'heavy'):
+            p50, p95, p99 = percentiles(latencies[kind])
+            print(f"    {kind:5s} p50 {p50:8.1f}ms  p95 {p95:8.1f}ms  p99 {p99:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Bitmap Index Benchmark
+
+Compares multi-filter queries on categorical transaction columns evaluated
+with pandas string comparisons against bitmap_index.BitmapIndex, checks that
+both select the same rows and reports index build time, memory and per-query
+latency.
+
+Usage:
+    python benchmarks/bitmap_index_benchmark.py [row_count] [query_count]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitmap_index import BitmapIndex
+
+COLUMNS = ['category', 'source', 'account_id', 'transaction_type', 'refund_status', 'merchant']
+
+def generate_transactions(row_count, seed=42):
+    """
+    Generate transactions with skewed categorical columns.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic transactions
+    """
+    rng = np.random.default_rng(seed)
+
+    def skewed(prefix, cardinality):
+        # Zipf-like popularity: a few frequent values and a long tail of rare ones
+        weights = 1.0 / np.arange(1, cardinality + 1)
+        choices = rng.choice(cardinality, row_count, p=weights / weights.sum())
+        return np.array([f'{prefix} {i}' for i in range(cardinality)], dtype=object)[choices]
+
+    return pd.DataFrame({
+        'category': skewed('Category', 30),
+        'source': skewed('Source', 5),
+        'account_id': skewed('Account', 12),
+        'transaction_type': np.array(['charge', 'payment', 'refund'])[rng.choice(3, row_count, p=[0.85, 0.1, 0.05])],
+        'refund_status': np.array(['none', 'refunded', 'matched'])[rng.choice(3, row_count, p=[0.9, 0.05, 0.05])],
+        'merchant': skewed('Merchant', 5000),
+    })
+
+def random_queries(df, query_count, seed=7):
+    """Draw filter combinations of one to four columns, some with several values."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(query_count):
+        columns = rng.choice(COLUMNS, rng.integers(1, 5), replace=False)
+        filters = {}
+        for column in columns:
+            values = df[column].iloc[rng.integers(0, len(df), rng.integers(1, 3))].tolist()
+            filters[column] = tuple(dict.fromkeys(values))
+        queries.append(filters)
+    return queries
+
+def pandas_mask(df, filters):
+    """Reference implementation comparing the string columns."""
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in filters.items():
+        mask &= df[column].isin(values).to_numpy()
+    return mask
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    df = generate_transactions(row_count)
+    queries = random_queries(df, query_count)
+    print(f"Benchmarking {query_count} multi-filter queries on {row_count} transactions...")
+
+    start = time.perf_counter()
+    index = BitmapIndex(df, COLUMNS)
+    for column in COLUMNS:
+        index.column(column)
+    build_seconds = time.perf_counter() - start
+    index_bytes = sum(index.column(column).nbytes() for column in COLUMNS)
+
+    start = time.perf_counter()
+    expected = [pandas_mask(df, filters) for filters in queries]
+    pandas_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [index.mask(filters) for filters in queries]
+    bitmap_seconds = time.perf_counter() - start
+
+    if any(not np.array_equal(e, a) for e, a in zip(expected, actual)):
+        print("Parity check FAILED: selected rows differ")
+        sys.exit(1)
+    print("Parity check passed: pandas and bitmap filters select the same rows")
+
+    print(f"  Index build:  {build_seconds:8.3f}s, {index_bytes / 1e6:.1f} MB for {len(COLUMNS)} columns")
+    print(f"  Pandas:       {pandas_seconds / query_count * 1000:8.3f}ms per query")
+    print(f"  Bitmap index: {bitmap_seconds / query_count * 1000:8.3f}ms per query")
+    print(f"  Speedup:      {pandas_seconds / bitmap_seconds:8.1f}x")
+
+if __name__ == "__main__":
+    main()
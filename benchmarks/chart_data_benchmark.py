@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Chart Data Benchmark
+
+Renders the analysis and deep-dive pages, which now load as a light shell,
+and fetches their chart data from the /api chart endpoints in parallel, the
+way the browser does. Reports the shell's HTML size and render time next to
+the size and latency of each chart payload, cold and cached. Checks that the
+chart payloads agree with each other and with totals computed directly from
+the transactions.
+
+Usage:
+    python benchmarks/chart_data_benchmark.py [row_count]
+"""
+
+import os
+import sys
+import math
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from asgi_latency_benchmark import generate_enriched_transactions
+
+DATE_RANGE = 'start_date=2022-01-01&end_date=2024-12-31'
+
+# Page -> chart data it fetches, as in the templates
+PAGES = {
+    '/analyze': [
+        '/api/summary', '/api/categories?limit=8', '/api/merchants?limit=10', '/api/timeseries', '/api/weekday',
+    ],
+    f'/deep-dive/Groceries?{DATE_RANGE}': [
+        f'/api/timeseries?category=Groceries&{DATE_RANGE}&value=net_amount',
+        f'/api/merchants?category=Groceries&{DATE_RANGE}&value=net_amount&limit=6&positive=1',
+    ],
+    f'/deep-dive/merchant/Safeway?{DATE_RANGE}': [
+        f'/api/timeseries?merchant=Safeway&{DATE_RANGE}',
+        f'/api/categories?merchant=Safeway&{DATE_RANGE}',
+    ],
+}
+
+def timed_get(application, path):
+    """
+    Request a path with a fresh test client.
+
+    Returns:
+        tuple: (response, milliseconds)
+    """
+    start = time.perf_counter()
+    response = application.test_client().get(path)
+    return response, (time.perf_counter() - start) * 1000
+
+def load_page(application, page, chart_paths):
+    """
+    Load a page shell, then its chart data in parallel.
+
+    Returns:
+        tuple: (shell response, shell milliseconds, {path: (response, milliseconds)}, chart milliseconds)
+    """
+    shell, shell_ms = timed_get(application, page)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(chart_paths)) as pool:
+        charts = dict(zip(chart_paths, pool.map(lambda path: timed_get(application, path), chart_paths)))
+    return shell, shell_ms, charts, (time.perf_counter() - start) * 1000
+
+def check_consistency(snapshot, payloads):
+    """
+    Compare the /analyze chart payloads with totals computed from the transactions.
+
+    Returns:
+        list: Descriptions of the mismatches
+    """
+    df = snapshot.df
+    charges = df[df['transaction_type'].str.lower() == 'charge']
+    total_spent = charges['amount'].sum()
+    summary = payloads['/api/summary']
+    categories = payloads['/api/categories?limit=8']
+    weekday = payloads['/api/weekday']
+    daily = payloads['/api/timeseries']
+
+    checks = {
+        'summary total': summary['total_spent'],
+        'category totals': sum(categories['totals']) + categories['other_total'],
+        'weekday totals': sum(weekday['totals']),
+    }
+    # Buckets add up to the total unless the series had to be downsampled
+    if not daily['downsampled']:
+        checks['time series totals'] = sum(daily['values'])
+    failures = [f"{name} {value:.2f} != {total_spent:.2f}" for name, value in checks.items()
+                if not math.isclose(value, total_spent, rel_tol=1e-9, abs_tol=1e-6)]
+    if summary['total_charges'] != len(charges) or sum(weekday['counts']) != len(charges):
+        failures.append("charge counts differ")
+    return failures
+
+def main():
+    """Run the consistency check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    # The dashboard reads data/ relative to the working directory
+    work_dir = tempfile.mkdtemp(prefix='chart_data_benchmark_')
+    os.makedirs(os.path.join(work_dir, 'data'))
+    generate_enriched_transactions(row_count).to_csv(os.path.join(work_dir, 'data', 'consolidated_transactions_enriched.csv'), index=False)
+    open(os.path.join(work_dir, 'data', 'consolidated_transactions.csv'), 'w').close()
+    os.chdir(work_dir)
+
+    import app
+    app.startup.run()
+
+    print(f"Benchmarking page shells and chart data on {row_count} transactions...")
+    for page, chart_paths in PAGES.items():
+        for state in ('cold', 'cached'):
+            if state == 'cold':
+                app.profiles.get().page_cache.clear()
+            shell, shell_ms, charts, charts_ms = load_page(app.app, page, chart_paths)
+            errors = [path for path, (response, _) in charts.items() if response.status_code != 200]
+            if shell.status_code != 200 or errors:
+                print(f"Request FAILED for {page}: {shell.status_code} {', '.join(errors)}")
+                sys.exit(1)
+            chart_bytes = sum(len(response.data) for response, _ in charts.values())
+            print(f"  {page} ({state})")
+            print(f"    shell  {len(shell.data) / 1024:8.1f}KB {shell_ms:8.1f}ms")
+            print(f"    charts {chart_bytes / 1024:8.1f}KB {charts_ms:8.1f}ms in parallel")
+            for path, (response, ms) in charts.items():
+                print(f"      {path.split('?')[0]:16s} {len(response.data) / 1024:8.1f}KB {ms:8.1f}ms")
+
+    payloads = {path: app.app.test_client().get(path).get_json() for path in PAGES['/analyze']}
+    failures = check_consistency(app.profiles.snapshot(app.profiles.get()), payloads)
+    if failures:
+        print(f"Consistency check FAILED: {'; '.join(failures)}")
+        sys.exit(1)
+    print("Consistency check passed: chart payloads match totals computed from the transactions")
+
+if __name__ == "__main__":
+    main()
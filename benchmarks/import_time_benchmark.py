@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+
+Measures the cold import time of the web app and the CLI entry modules, each
+in fresh interpreters with python -X importtime. Reports the median and
+fastest time, and the heaviest imports each module pulls in. Fails when one of
+them imports the plotting libraries, which only chart rendering needs.
+
+Usage:
+    python benchmarks/import_time_benchmark.py [runs]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['app', 'data_eda', 'transaction_enrichment', 'trx_consolidation']
+
+# Must not be imported until a chart is drawn
+PLOTTING_MODULES = ['matplotlib', 'seaborn']
+
+# Direct imports listed per module
+TOP_IMPORTS = 5
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module (str): Module name
+
+    Returns:
+        tuple: (cumulative import microseconds, {top-level import: microseconds}, plotting modules loaded)
+    """
+    code = f"import sys, json, {module}; print(json.dumps([m for m in {PLOTTING_MODULES!r} if m in sys.modules]))"
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    total = None
+    direct = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Names are indented by two spaces per nesting level after one separating space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative)
+        elif depth == 1:
+            direct[name.strip()] = int(cumulative)
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return total, direct, loaded
+
+def main():
+    """Run the plotting check and the benchmark."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Benchmarking cold imports of {', '.join(MODULES)} over {runs} runs each...")
+
+    failures = []
+    for module in MODULES:
+        timings = []
+        for _ in range(runs):
+            total, direct, loaded = measure_import(module)
+            timings.append(total)
+            if loaded:
+                failures.append(f"{module} imports {', '.join(loaded)}")
+        heaviest = sorted(direct.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+        print(f"  {module:24s} median {statistics.median(timings) / 1000:7.1f}ms  fastest {min(timings) / 1000:7.1f}ms")
+        print(f"    heaviest: {', '.join(f'{name} {micros / 1000:.0f}ms' for name, micros in heaviest)}")
+
+    if failures:
+        print(f"Plotting check FAILED: {'; '.join(sorted(set(failures)))}")
+        sys.exit(1)
+    print("Plotting check passed: no module imports matplotlib or seaborn")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Merchant Index Benchmark
+
+Compares selecting one merchant's charges through TransactionQuery, whose
+bitmap and date masks span every transaction, with slicing the merchant's
+rows from merchant_index.MerchantIndex, for merchants from rare to frequent.
+Reports the index build time and the selection and summary time per
+merchant, over all dates and over one quarter. Checks that both select the
+same rows and that the precomputed statistics match the selected rows.
+
+Usage:
+    python benchmarks/merchant_index_benchmark.py [row_count]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from merchant_index import MerchantIndex
+from transaction_query import TransactionQuery
+from transaction_store import TransactionSnapshot
+
+START = pd.Timestamp('2020-01-01')
+HISTORY_DAYS = 4 * 365
+QUARTER = ('2022-01-01', '2022-03-31')
+
+def generate_transactions(row_count, merchant_count=5000, seed=42):
+    """
+    Generate transactions whose merchants follow a Zipf-like popularity.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        merchant_count (int): Number of distinct merchants
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Transactions with the columns the snapshot indexes
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, merchant_count + 1)
+    merchants = np.array([f"Merchant {i}" for i in range(merchant_count)], dtype=object)
+    return pd.DataFrame({
+        'transaction_date': START + pd.to_timedelta(np.sort(rng.integers(0, HISTORY_DAYS, row_count)), unit='D'),
+        'description': merchants[rng.choice(merchant_count, row_count, p=weights / weights.sum())],
+        'amount': np.round(rng.gamma(2.0, 40.0, row_count), 2),
+        'transaction_type': rng.choice(np.array(['Charge', 'Refund', 'Payment'], dtype=object), row_count, p=[0.9, 0.05, 0.05]),
+        'category': 'Shopping',
+        'source': 'card',
+        'account_id': 'ACC001',
+        'refund_status': rng.choice(np.array(['none', 'refunded'], dtype=object), row_count, p=[0.97, 0.03]),
+    }).assign(merchant=lambda df: df['description'])
+
+def query_rows(snapshot, merchant, start_date=None, end_date=None):
+    """Row positions of a merchant's charges through TransactionQuery."""
+    return TransactionQuery(start_date, end_date, transaction_type='charge', merchant=merchant).rows(snapshot)
+
+def summarize(df):
+    """The deep dive's summary computed from selected rows."""
+    return {
+        'total_spent': df['amount'].sum(),
+        'transaction_count': len(df),
+        'refunded_count': int((df['refund_status'] == 'refunded').sum()),
+        'largest_transaction': df['amount'].max(),
+        'first_transaction': df['transaction_date'].min().strftime('%Y-%m-%d'),
+        'last_transaction': df['transaction_date'].max().strftime('%Y-%m-%d'),
+    }
+
+def timed(function, repeat=5):
+    """Run a function several times, returning its result and the fastest milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def check_parity(snapshot, merchants):
+    """
+    Compare the index with TransactionQuery and its statistics with the selected rows.
+
+    Returns:
+        list: Descriptions of the mismatches
+    """
+    failures = []
+    index = snapshot.merchant_index()
+    for merchant in merchants:
+        for date_range in ((), QUARTER):
+            if not np.array_equal(query_rows(snapshot, merchant, *date_range), index.rows(merchant, *date_range)):
+                failures.append(f"{merchant} {date_range or 'all dates'}: rows differ")
+        expected = summarize(snapshot.df.iloc[query_rows(snapshot, merchant)])
+        stats = index.stats(merchant)
+        for key, value in expected.items():
+            if isinstance(value, str) and stats[key] != value or not isinstance(value, str) and not np.isclose(stats[key], value):
+                failures.append(f"{merchant} {key}: {stats[key]} != {value}")
+        if not np.isclose(sum(stats['monthly']['totals']), expected['total_spent']):
+            failures.append(f"{merchant} monthly totals differ")
+    if index.stats('Unknown merchant') is not None or len(index.rows('Unknown merchant')):
+        failures.append("unknown merchant matched rows")
+    return failures
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    snapshot = TransactionSnapshot(generate_transactions(row_count), version=1)
+    _, build_ms = timed(lambda: MerchantIndex(snapshot.df), repeat=1)
+    index = snapshot.merchant_index()
+    print(f"Built the merchant index of {row_count} transactions ({len(index.codes)} merchants) in {build_ms:.0f}ms")
+
+    # Merchants from most to least frequent
+    by_count = sorted(index.codes, key=lambda merchant: -index.counts[index.codes[merchant]])
+    merchants = [by_count[0], by_count[10], by_count[100], by_count[1000], by_count[-1]]
+    failures = check_parity(snapshot, merchants)
+    if failures:
+        print(f"Parity check FAILED: {'; '.join(failures[:5])}")
+        sys.exit(1)
+    print("Parity check passed: the index selects the same rows as TransactionQuery and its statistics match them")
+
+    print("Select one merchant's charges, then summarize them:")
+    for merchant in merchants:
+        count = index.counts[index.codes[merchant]]
+        print(f"  {merchant} ({count} charges)")
+        for label, date_range in (('all dates', ()), ('one quarter', QUARTER)):
+            # Warm the query's cached date masks so only per-request work is timed
+            rows = query_rows(snapshot, merchant, *date_range)
+            _, query_ms = timed(lambda: query_rows(snapshot, merchant, *date_range))
+            _, index_ms = timed(lambda: index.rows(merchant, *date_range))
+            if date_range:
+                _, summary_ms = timed(lambda: summarize(snapshot.df.iloc[rows]) if len(rows) else None)
+                source = 'from rows'
+            else:
+                _, summary_ms = timed(lambda: index.stats(merchant))
+                source = 'precomputed'
+            print(f"    {label:12s} {len(rows):6d} rows  select: query {query_ms:7.2f}ms  index {index_ms:7.2f}ms  "
+                  f"summary ({source}) {summary_ms:7.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Merchant Resolution Benchmark
+
+Builds a merchant index over synthetic descriptions, where each merchant
+appears under many noisy variants (store numbers, processor prefixes, refund
+suffixes, truncation), and reports clustering time and cluster quality. Time
+should grow roughly linearly with the number of distinct descriptions.
+
+Usage:
+    python benchmarks/merchant_resolution_benchmark.py [distinct_descriptions]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from merchant_resolution import MerchantIndex
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tor', 'va', 'zen', 'qu', 'bel', 'dor', 'fin', 'gra', 'hol', 'jax', 'sol', 'wex']
+SUFFIXES = ['MARKET', 'CAFE', 'GRILL', 'STORE', 'PHARMACY', 'FITNESS', 'AUTO', 'BOOKS', 'SUPPLY', 'STUDIO']
+PREFIXES = ['', '', '', 'SQ *', 'TST* ', 'PAYPAL *']
+
+def generate_descriptions(distinct_count, variants_per_merchant=8, seed=7):
+    """
+    Generate noisy description variants for synthetic merchants.
+
+    Args:
+        distinct_count (int): Approximate number of descriptions to generate
+        variants_per_merchant (int): Variants generated per merchant
+        seed (int): Random seed
+
+    Returns:
+        tuple: (descriptions, true merchant number for each description)
+    """
+    rng = np.random.default_rng(seed)
+    merchant_count = max(1, distinct_count // variants_per_merchant)
+    descriptions = []
+    truth = []
+    for merchant in range(merchant_count):
+        name = ''.join(rng.choice(SYLLABLES, 3)).upper() + ' ' + ''.join(rng.choice(SYLLABLES, 2)).upper()
+        name = f"{name} {SUFFIXES[merchant % len(SUFFIXES)]}"
+        for _ in range(variants_per_merchant):
+            variant = f"{rng.choice(PREFIXES)}{name} #{rng.integers(1, 9999)}"
+            if rng.random() < 0.2:
+                variant += ' REFUND'
+            if rng.random() < 0.2:
+                variant = variant[:max(12, len(variant) - 6)]
+            descriptions.append(variant)
+            truth.append(merchant)
+    return descriptions, np.array(truth)
+
+def cluster_quality(index, descriptions, truth):
+    """
+    Measure how well clusters match the true merchants.
+
+    Completeness is the share of descriptions that land in the majority cluster of
+    their true merchant; precision is the share that belong to the majority true
+    merchant of their cluster.
+
+    Args:
+        index (MerchantIndex): Built index
+        descriptions (list): Generated descriptions
+        truth (np.ndarray): True merchant number for each description
+
+    Returns:
+        tuple: (completeness, precision)
+    """
+    resolved = index.resolve(pd.Series(descriptions))
+    frame = pd.DataFrame({'truth': truth, 'merchant_id': resolved['merchant_id'].to_numpy()})
+    majority_cluster = frame.groupby('truth')['merchant_id'].agg(lambda ids: ids.value_counts().index[0])
+    majority_truth = frame.groupby('merchant_id')['truth'].agg(lambda ids: ids.value_counts().index[0])
+    completeness = float((frame['merchant_id'] == frame['truth'].map(majority_cluster)).mean())
+    precision = float((frame['truth'] == frame['merchant_id'].map(majority_truth)).mean())
+    return completeness, precision
+
+def main():
+    """Run the clustering benchmark at increasing sizes."""
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sizes = sorted({max(1000, largest // 8), max(1000, largest // 2), largest})
+
+    for size in sizes:
+        descriptions, truth = generate_descriptions(size)
+        start = time.perf_counter()
+        index = MerchantIndex.build(descriptions)
+        seconds = time.perf_counter() - start
+        completeness, precision = cluster_quality(index, descriptions, truth)
+        print(f"{len(descriptions):>9,} descriptions ({len(set(truth)):,} merchants) -> {len(index):>8,} clusters "
+              f"in {seconds:7.2f}s ({len(descriptions) / seconds:,.0f}/s), "
+              f"completeness {completeness:.3f}, precision {precision:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Offline Enrichment Benchmark
+
+Compares the column-wise offline_transaction_enrichment.enrich_transactions with
+the row-wise reference implementation on a synthetic transaction set, checks
+that both produce the same output and reports the speedup.
+
+Usage:
+    python benchmarks/offline_enrichment_benchmark.py [row_count]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from offline_transaction_enrichment import enrich_transactions, enrich_transactions_rowwise
+
+ENRICHED_COLUMNS = ['amount_enriched', 'transaction_type', 'category_enriched', 'subcategory_enriched', 'merchant']
+
+def generate_transactions(row_count, seed=42):
+    """
+    Generate a synthetic transaction set covering every enrichment branch.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic transactions in the consolidated schema
+    """
+    rng = np.random.default_rng(seed)
+    sources = np.array(['Amex', 'Chase', 'SoFi', 'WellsFargo'])
+    account_types = {'Amex': 'Credit Card', 'Chase': 'Credit Card', 'SoFi': 'Checkings', 'WellsFargo': 'Checkings'}
+    descriptions = np.array([
+        'AMAZON MKTPL*AB12CD34', 'UBER EATS 8005928996', 'UBER *TRIP', 'LYFT *RIDE', 'TARGET 000123',
+        'COSTCO WHSE 0456', 'APPLE.COM/BILL', 'OPENAI *CHATGPT', 'CURSOR AI', 'RENT PMT APT 4',
+        'AUTOPAY PAYMENT - THANK YOU', 'Wells Fargo Bank Transfer', 'To Vault house Vault',
+        'SOFI BANK TRANSFER', 'ONLINE TRANSFER TO SAVINGS', 'XPO CNW PAYROLL', 'BILL PAYMENT PG&E', 'LOCAL CAFE'
+    ])
+    categories = np.array([
+        'Restaurants', 'Groceries', 'Food & Drink', 'Health & Wellness', 'Bills & Utilities', 'Transportation',
+        'Entertainment', 'Shopping', 'Education', 'Communications', 'Travel', 'Payment', 'Direct Deposit', 'Uncategorized'
+    ], dtype=object)
+
+    source = sources[rng.integers(0, len(sources), row_count)]
+    amount = np.round(rng.normal(0, 150, row_count), 2)
+    amount[rng.random(row_count) < 0.01] = 0.0
+
+    return pd.DataFrame({
+        'transaction_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, row_count), unit='D'),
+        'post_date': None,
+        'description': descriptions[rng.integers(0, len(descriptions), row_count)],
+        'amount': amount,
+        'category': categories[rng.integers(0, len(categories), row_count)],
+        'source': source,
+        'account_id': [f'{s}_1234' for s in source],
+        'additional_details': '',
+        'account_type': [account_types[s] for s in source],
+    })
+
+def check_parity(rowwise_df, columnwise_df):
+    """
+    Check that both implementations produced the same enriched columns.
+
+    Args:
+        rowwise_df (pd.DataFrame): Output of the row-wise implementation
+        columnwise_df (pd.DataFrame): Output of the column-wise implementation
+
+    Returns:
+        list: Names of the columns that differ
+    """
+    mismatched = []
+    if list(rowwise_df.columns) != list(columnwise_df.columns):
+        mismatched.append('<column order>')
+
+    for column in ENRICHED_COLUMNS:
+        expected = rowwise_df[column]
+        actual = columnwise_df[column]
+        if column == 'amount_enriched':
+            equal = np.allclose(expected.astype(float), actual.astype(float), equal_nan=True)
+        else:
+            equal = expected.astype(str).equals(actual.astype(str))
+        if not equal:
+            mismatched.append(column)
+    return mismatched
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    transactions = generate_transactions(row_count)
+    print(f"Benchmarking offline enrichment on {row_count} transactions...")
+
+    start = time.perf_counter()
+    rowwise_df = enrich_transactions_rowwise(transactions)
+    rowwise_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnwise_df = enrich_transactions(transactions)
+    columnwise_seconds = time.perf_counter() - start
+
+    mismatched = check_parity(rowwise_df, columnwise_df)
+    if mismatched:
+        print(f"Parity check FAILED for: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("Parity check passed: row-wise and column-wise outputs match")
+
+    print(f"  Row-wise:    {rowwise_seconds:8.3f}s ({row_count / rowwise_seconds:,.0f} rows/s)")
+    print(f"  Column-wise: {columnwise_seconds:8.3f}s ({row_count / columnwise_seconds:,.0f} rows/s)")
+    print(f"  Speedup:     {rowwise_seconds / columnwise_seconds:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Profile Memory Benchmark
+
+Serves several profiles, each with its own generated transactions, from one
+app process under a memory budget that only fits some of them. Requests the
+dashboard and its summary data for the profiles in a skewed round robin, the
+way a household would use it, and reports the memory held against the budget,
+the number of evictions and the latency of requests to a loaded profile and
+to an evicted one that has to be reloaded. Checks that every profile is
+answered from its own transactions only.
+
+Usage:
+    python benchmarks/profile_memory_benchmark.py [profile_count] [rows_per_profile] [budget_profiles]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from asgi_latency_benchmark import generate_enriched_transactions
+
+DATE_RANGE = 'start_date=2022-01-01&end_date=2024-12-31'
+ROUNDS = 60
+
+def write_profile(folder, row_count, seed):
+    """Write a profile's enriched transactions, returning its charge count and total."""
+    os.makedirs(folder)
+    df = generate_enriched_transactions(row_count, seed=seed)
+    df.to_csv(os.path.join(folder, 'consolidated_transactions_enriched.csv'), index=False)
+    open(os.path.join(folder, 'consolidated_transactions.csv'), 'w').close()
+    charges = df[df['transaction_type'].str.lower() == 'charge']
+    return len(charges), charges['amount'].sum()
+
+def main():
+    """Run the isolation check and the benchmark."""
+    profile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    row_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    budget_profiles = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    # The dashboard reads data/ relative to the working directory
+    work_dir = tempfile.mkdtemp(prefix='profile_memory_benchmark_')
+    expected = {'default': write_profile(os.path.join(work_dir, 'data'), row_count, seed=0)}
+    for number in range(1, profile_count):
+        name = f'member{number}'
+        expected[name] = write_profile(os.path.join(work_dir, 'profiles', name), row_count, seed=number)
+    os.chdir(work_dir)
+    os.environ['PROFILES_FOLDER'] = 'profiles'
+
+    import app
+    app.startup.run()
+    # Size the budget from the default profile once it is loaded
+    profile_bytes = app.profiles.get().memory_bytes()
+    app.profiles.memory_budget = profile_bytes * budget_profiles
+    print(f"Serving {profile_count} profiles of {row_count} transactions, about {profile_bytes / 2 ** 20:.0f}MB each, "
+          f"under a {app.profiles.memory_budget / 2 ** 20:.0f}MB budget")
+
+    # Most requests go to a few profiles, the others are visited now and then
+    rng = np.random.default_rng(42)
+    weights = 1 / np.arange(1, profile_count + 1)
+    names = list(expected)
+    client = app.app.test_client()
+    latencies = {'loaded': [], 'reloaded': []}
+    peak_bytes = 0
+    failures = []
+    for name in rng.choice(names, ROUNDS, p=weights / weights.sum()):
+        loaded = app.profiles.get(name).is_loaded()
+        start = time.perf_counter()
+        client.get(f'/?{DATE_RANGE}&profile={name}')
+        summary = client.get(f'/api/summary?{DATE_RANGE}&profile={name}').get_json()
+        latencies['loaded' if loaded else 'reloaded'].append((time.perf_counter() - start) * 1000)
+        peak_bytes = max(peak_bytes, app.profiles.stats()['memory_bytes'])
+
+        charge_count, charge_total = expected[name]
+        if summary['total_charges'] != charge_count or not np.isclose(summary['total_spent'], charge_total):
+            failures.append(f"{name}: {summary['total_charges']} charges, {summary['total_spent']:.2f} spent")
+
+    if failures:
+        print(f"Isolation check FAILED: {'; '.join(failures[:5])}")
+        sys.exit(1)
+    print("Isolation check passed: every profile was answered from its own transactions")
+
+    stats = app.profiles.stats()
+    loaded = [name for name, profile in stats['profiles'].items() if profile['loaded']]
+    print(f"Peak memory {peak_bytes / 2 ** 20:.0f}MB, {len(loaded)} profiles loaded at the end, {stats['evictions']} evictions")
+    for state, values in latencies.items():
+        if values:
+            print(f"  {state:8s} profile: {len(values):3d} requests  median {np.median(values):8.1f}ms  max {max(values):8.1f}ms")
+
+if __name__ == "__main__":
+    main()
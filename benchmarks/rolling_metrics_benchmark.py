@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Rolling Metrics Benchmark
+
+Compares rolling_metrics.RollingMetrics with the per-request pandas filter
+and groupby it replaces, for 7/30/90-day and month-to-date spending per
+category, merchant and account. Reports the build time, the time to answer
+every window for every value, and the time to extend the totals with newly
+appended transactions against rebuilding them. Checks that the summaries
+match the groupby and that extended totals match a rebuild.
+
+Usage:
+    python benchmarks/rolling_metrics_benchmark.py [row_count] [appended_rows]
+"""
+
+import os
+import sys
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rolling_metrics import RollingMetrics, DIMENSIONS, WINDOWS
+
+START = pd.Timestamp('2019-01-01')
+HISTORY_DAYS = 5 * 365
+# Day range wide enough to cover any transaction
+DAYS_ANY = 1 << 20
+
+def generate_transactions(row_count, seed=42, start_day=0):
+    """
+    Generate charges, refunds and payments over several categories, merchants and accounts.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+        start_day (int): First day offset from START
+
+    Returns:
+        pd.DataFrame: Transactions sorted by date
+    """
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(start_day, start_day + HISTORY_DAYS, row_count))
+    categories = np.array([f"Category {i}" for i in range(40)], dtype=object)
+    merchants = np.array([f"Merchant {i}" for i in range(2000)], dtype=object)
+    accounts = np.array([f"ACC{i:03d}" for i in range(8)], dtype=object)
+    return pd.DataFrame({
+        'transaction_date': START + pd.to_timedelta(days, unit='D'),
+        'amount': np.round(rng.gamma(2.0, 40.0, row_count), 2),
+        'transaction_type': rng.choice(np.array(['charge', 'refund', 'payment'], dtype=object), row_count, p=[0.9, 0.05, 0.05]),
+        'category': categories[rng.integers(0, len(categories), row_count)],
+        'merchant': merchants[rng.integers(0, len(merchants), row_count)],
+        'account_id': accounts[rng.integers(0, len(accounts), row_count)],
+    })
+
+def groupby_summary(df, column, as_of):
+    """
+    The per-request equivalent: filter charges to each period and group by the column.
+
+    Returns:
+        dict: Period name -> Series of totals per value
+    """
+    charges = df[df['transaction_type'].str.lower() == 'charge']
+    dates = charges['transaction_date'].dt.normalize()
+    as_of = pd.Timestamp(as_of)
+    periods = {window: (as_of - pd.Timedelta(days=window - 1), as_of) for window in WINDOWS}
+    month_start = as_of.replace(day=1)
+    prior_start = month_start - pd.DateOffset(months=1)
+    prior_end = month_start - pd.Timedelta(days=1)
+    periods['month_to_date'] = (month_start, as_of)
+    periods['prior_month_to_date'] = (prior_start, prior_start.replace(day=min(as_of.day, prior_end.day)))
+    return {
+        name: charges[(dates >= first) & (dates <= last)].groupby(column)['amount'].agg(['sum', 'count'])
+        for name, (first, last) in periods.items()
+    }
+
+def check_summary(metrics, df, dimension, as_of):
+    """
+    Compare one dimension's summary with the groupby.
+
+    Returns:
+        list: Descriptions of the mismatches
+    """
+    expected = groupby_summary(df, DIMENSIONS[dimension], as_of)
+    failures = []
+    for record in metrics.summary(dimension, as_of=as_of):
+        periods = {window['days']: window for window in record['windows']}
+        periods['month_to_date'] = record['month_to_date']
+        periods['prior_month_to_date'] = record['prior_month_to_date']
+        for name, period in periods.items():
+            groups = expected[name]
+            total = groups['sum'].get(record['name'], 0.0)
+            count = groups['count'].get(record['name'], 0)
+            if not np.isclose(period['total'], total) or period['count'] != count:
+                failures.append(f"{dimension} {record['name']} {name}: {period['total']:.2f}/{period['count']} != {total:.2f}/{count}")
+    return failures
+
+def same_metrics(left, right):
+    """Whether two RollingMetrics hold the same totals."""
+    for name in left.totals:
+        a, b = left.totals[name], right.totals[name]
+        if set(a.values) != set(b.values):
+            return False
+        _, a_totals, a_counts = a.range_totals(-DAYS_ANY, DAYS_ANY, b.values)
+        _, b_totals, b_counts = b.range_totals(-DAYS_ANY, DAYS_ANY, b.values)
+        if not np.allclose(a_totals, b_totals) or not np.array_equal(a_counts, b_counts):
+            return False
+    return left.last_day == right.last_day
+
+def timed(function, repeat=3):
+    """Run a function several times, returning its result and the fastest milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def main():
+    """Run the parity checks and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    appended_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    df = generate_transactions(row_count)
+    metrics, build_ms = timed(lambda: RollingMetrics.build(df), repeat=1)
+    as_of = metrics.as_of_date()
+    print(f"Built rolling totals of {row_count} transactions in {build_ms:.0f}ms, as of {as_of}")
+
+    # A later batch with a new merchant and dates past the current last day
+    new_rows = generate_transactions(appended_rows, seed=7, start_day=HISTORY_DAYS - 30)
+    new_rows.loc[new_rows.index[:10], 'merchant'] = 'Merchant New'
+    appended = pd.concat([df, new_rows], ignore_index=True)
+
+    failures = []
+    for dimension in DIMENSIONS:
+        failures += check_summary(metrics, df, dimension, as_of)
+        failures += check_summary(metrics, df, dimension, as_of - datetime.timedelta(days=400))
+    if not metrics.can_extend_to(appended, df):
+        failures.append("appended frame not recognized as an extension")
+    if metrics.can_extend_to(appended.iloc[::-1].reset_index(drop=True), df):
+        failures.append("reordered frame recognized as an extension")
+    extended = metrics.extended(new_rows)
+    if not same_metrics(extended, RollingMetrics.build(appended)):
+        failures.append("extended totals differ from a rebuild")
+    failures += check_summary(extended, appended, 'merchant', extended.as_of_date())
+    if failures:
+        print(f"Parity check FAILED: {'; '.join(failures[:5])}")
+        sys.exit(1)
+    print("Parity check passed: every window matches the groupby and extended totals match a rebuild")
+
+    print("Every window and month to date for every value:")
+    for dimension, column in DIMENSIONS.items():
+        values = df[column].nunique()
+        _, groupby_ms = timed(lambda: groupby_summary(df, column, as_of))
+        _, summary_ms = timed(lambda: metrics.summary(dimension))
+        print(f"  {dimension:8s} ({values:5d} values) groupby {groupby_ms:8.1f}ms  cumulative {summary_ms:8.1f}ms  {groupby_ms / summary_ms:6.1f}x")
+
+    print("Single value lookup (deep dive):")
+    _, groupby_ms = timed(lambda: groupby_summary(df[df['merchant'] == 'Merchant 1'], 'merchant', as_of))
+    _, summary_ms = timed(lambda: metrics.summary('merchant', values=['Merchant 1']))
+    print(f"  merchant groupby {groupby_ms:8.1f}ms  cumulative {summary_ms:8.2f}ms")
+
+    print(f"After appending {appended_rows} transactions:")
+    _, check_ms = timed(lambda: metrics.can_extend_to(appended, df))
+    _, extend_ms = timed(lambda: metrics.extended(new_rows))
+    _, rebuild_ms = timed(lambda: RollingMetrics.build(appended), repeat=1)
+    print(f"  prefix check {check_ms:8.1f}ms  extend {extend_ms:8.1f}ms  rebuild {rebuild_ms:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
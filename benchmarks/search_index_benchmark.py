@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+
+Compares case-insensitive substring search over transaction descriptions with
+pandas str.contains against search_index.TextIndex, checks that both select
+the same rows and reports index build time and per-query latency.
+
+Usage:
+    python benchmarks/search_index_benchmark.py [row_count]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import TextIndex
+
+MERCHANTS = [
+    'SQ *BLUE BOTTLE COFFEE', 'UBER *TRIP', 'UBER *EATS', 'AMAZON MKTPLACE PMTS', 'AMZN Mktp US',
+    'SAFEWAY #', 'TRADER JOE S #', 'COSTCO WHSE #', 'SHELL OIL', 'CHEVRON',
+    'NETFLIX.COM', 'SPOTIFY USA', 'APPLE.COM/BILL', 'TST* THE HALAL GUYS', 'WALGREENS #',
+    'LYFT *RIDE', 'DELTA AIR LINES', 'MARRIOTT HOTELS', 'PG&E WEB ONLINE', 'COMCAST CABLE',
+]
+CITIES = ['SAN FRANCISCO CA', 'OAKLAND CA', 'SEATTLE WA', 'NEW YORK NY', 'AUSTIN TX', '']
+
+QUERIES = [
+    'uber', 'coffee', 'bottle coffee', 'amzn', 'mktp', 'joe s', '#12', 'oakland', 'whse #4',
+    'netflix.com', 'ub', 'x', 'nonexistent merchant', 'oil seattle', 'apple.com/bill',
+]
+
+def generate_descriptions(row_count, seed=42):
+    """
+    Generate descriptions with store numbers and cities, as found on card statements.
+
+    Args:
+        row_count (int): Number of descriptions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.Series: Synthetic descriptions
+    """
+    rng = np.random.default_rng(seed)
+    merchants = np.array(MERCHANTS, dtype=object)[rng.integers(0, len(MERCHANTS), row_count)]
+    stores = rng.integers(0, 3000, row_count).astype(str)
+    cities = np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), row_count)]
+    return pd.Series(merchants + stores + ' ' + cities)
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    descriptions = generate_descriptions(row_count)
+    print(f"Benchmarking {len(QUERIES)} description searches on {row_count} transactions...")
+
+    start = time.perf_counter()
+    index = TextIndex(descriptions)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [descriptions.str.contains(query, case=False, regex=False).to_numpy() for query in QUERIES]
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [index.mask(query) for query in QUERIES]
+    index_seconds = time.perf_counter() - start
+
+    mismatches = [query for query, e, a in zip(QUERIES, expected, actual) if not np.array_equal(e, a)]
+    if mismatches:
+        print(f"Parity check FAILED for: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("Parity check passed: str.contains and the search index select the same rows")
+
+    print(f"  Index build:  {build_seconds:8.3f}s over {len(index.texts):,} distinct descriptions")
+    print(f"  str.contains: {scan_seconds / len(QUERIES) * 1000:8.2f}ms per query")
+    print(f"  Search index: {index_seconds / len(QUERIES) * 1000:8.2f}ms per query")
+    print(f"  Speedup:      {scan_seconds / index_seconds:8.1f}x")
+
+if __name__ == "__main__":
+    main()
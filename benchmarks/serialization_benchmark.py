@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+
+Compares building the /transactions template payload row by row with
+iterrows against serializers.serialize_transactions, checks that both produce
+the same records and reports the speedup.
+
+Usage:
+    python benchmarks/serialization_benchmark.py [row_count]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serializers import serialize_transactions
+
+FIELDS = ['date', 'description', 'merchant', 'amount', 'net_amount', 'category', 'source', 'type', 'refund_status']
+
+def generate_transactions(row_count, seed=42):
+    """
+    Generate enriched transactions with refund fields as loaded by the app.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic transactions
+    """
+    rng = np.random.default_rng(seed)
+    refund_status = np.array(['none', 'refunded', 'matched'])[rng.choice(3, row_count, p=[0.9, 0.05, 0.05])]
+    amount = np.round(rng.gamma(2.0, 40.0, row_count), 2)
+    categories = np.array(['Groceries', 'Restaurants', 'Shopping', 'Travel', None], dtype=object)
+    return pd.DataFrame({
+        'transaction_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, row_count), unit='D'),
+        'description': [f'MERCHANT {i % 500}' for i in range(row_count)],
+        'merchant': [f'Merchant {i % 500}' for i in range(row_count)],
+        'amount': amount,
+        'refunded_amount': np.where(refund_status == 'refunded', np.round(amount * 0.5, 2), 0.0),
+        'category': categories[rng.integers(0, len(categories), row_count)],
+        'source': np.array(['Amex', 'Chase', 'SoFi'])[rng.integers(0, 3, row_count)],
+        'transaction_type': np.array(['charge', 'payment', 'refund'])[rng.choice(3, row_count, p=[0.8, 0.1, 0.1])],
+        'refund_status': refund_status,
+    })
+
+def serialize_transactions_rowwise(df):
+    """Reference implementation matching the previous /transactions loop."""
+    transactions_list = []
+    for _, row in df.iterrows():
+        net_amount = row['amount']
+        if row['transaction_type'].lower() == 'charge' and row['refund_status'] == 'refunded':
+            net_amount = row['amount'] - row['refunded_amount']
+
+        transactions_list.append({
+            'date': row['transaction_date'].strftime('%Y-%m-%d'),
+            'description': row['description'],
+            'merchant': row['merchant'],
+            'amount': row['amount'],
+            'net_amount': net_amount,
+            'category': row['category'] if pd.notna(row['category']) else '',
+            'source': row['source'],
+            'type': row['transaction_type'],
+            'refund_status': row['refund_status']
+        })
+    return transactions_list
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    transactions = generate_transactions(row_count).sort_values('amount', ascending=False)
+    print(f"Benchmarking payload serialization on {row_count} transactions...")
+
+    start = time.perf_counter()
+    rowwise = serialize_transactions_rowwise(transactions)
+    rowwise_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnwise = serialize_transactions(transactions, FIELDS)
+    columnwise_seconds = time.perf_counter() - start
+
+    if rowwise != columnwise:
+        print("Parity check FAILED: records differ")
+        sys.exit(1)
+    print("Parity check passed: row-wise and column-wise records match")
+
+    print(f"  Row-wise:    {rowwise_seconds:8.3f}s ({row_count / rowwise_seconds:,.0f} rows/s)")
+    print(f"  Column-wise: {columnwise_seconds:8.3f}s ({row_count / columnwise_seconds:,.0f} rows/s)")
+    print(f"  Speedup:     {rowwise_seconds / columnwise_seconds:8.1f}x")
+
+if __name__ == "__main__":
+    main()
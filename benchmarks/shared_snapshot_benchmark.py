@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Shared Snapshot Benchmark
+
+Starts several worker processes that either parse the transactions CSV each
+(the per-process default) or attach to one snapshot published by
+shared_snapshot.SharedSnapshots. Checks that the attached DataFrame holds the
+same values as the parsed one, its text columns as categoricals, and reports
+per-worker private and proportional (PSS) memory at two history sizes. Linux
+only, since memory is read from /proc.
+
+Usage:
+    python benchmarks/shared_snapshot_benchmark.py [row_count] [worker_count]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_snapshot import SharedSnapshots
+
+MERCHANTS = ['Safeway', 'Costco', 'Amazon', 'Uber', 'Netflix', 'Spotify', 'PG&E', 'Target', 'Lyft', 'Trader Joes']
+CATEGORIES = ['Groceries', 'Shopping', 'Travel', 'Entertainment', 'Bills & Utilities', 'Food & Drink']
+
+def generate_transactions(row_count, seed=42):
+    """
+    Generate enriched-like transactions with text, numeric, boolean and date columns.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic transactions
+    """
+    rng = np.random.default_rng(seed)
+    merchants = np.array(MERCHANTS, dtype=object)[rng.integers(0, len(MERCHANTS), row_count)]
+    amounts = -np.round(rng.uniform(3, 300, row_count), 2)
+    return pd.DataFrame({
+        'transaction_date': pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, row_count), unit='D'),
+        'description': merchants + ' #' + rng.integers(0, 5000, row_count).astype(str),
+        'amount': amounts,
+        'category': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), row_count)],
+        'merchant': merchants,
+        'additional_details': np.where(rng.random(row_count) < 0.5, None, 'Posted'),
+        'is_recurring': rng.random(row_count) < 0.1,
+        'absolute_amount': -amounts,
+        'transaction_id': np.arange(row_count),
+    })
+
+def as_values(df):
+    """Turn categorical columns back into their values for comparison with a parsed frame."""
+    return df.astype({column: object for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+
+def memory_usage():
+    """Private and proportional resident memory of this process in bytes."""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return values.get('Private_Clean', 0) + values.get('Private_Dirty', 0), values.get('Pss', 0)
+
+def worker(mode, csv_path, folder, version, ready, results):
+    """Load the transactions, touch every column and report memory once all workers are loaded."""
+    baseline = memory_usage()
+    if mode == 'csv':
+        df = pd.read_csv(csv_path, parse_dates=['transaction_date'])
+    else:
+        df = SharedSnapshots(folder).load(version, lambda: pd.read_csv(csv_path, parse_dates=['transaction_date']))
+    # Touch every column, as serving pages would
+    checksum = float(df['amount'].sum()) + sum(df[column].nunique() for column in df.columns)
+    ready.wait()
+    private, pss = memory_usage()
+    results.put((private - baseline[0], pss - baseline[1], checksum))
+    ready.wait()
+
+def run_workers(mode, csv_path, folder, version, worker_count):
+    """Run the workers concurrently and return their memory reports."""
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(worker_count)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, csv_path, folder, version, ready, results)) for _ in range(worker_count)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return reports
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    work_dir = tempfile.mkdtemp(prefix='shared_snapshot_benchmark_')
+    print(f"Benchmarking {worker_count} workers on {row_count // 4} and {row_count} transactions...")
+
+    try:
+        for size in (row_count // 4, row_count):
+            csv_path = os.path.join(work_dir, f'transactions_{size}.csv')
+            folder = os.path.join(work_dir, f'snapshots_{size}')
+            version = f'v{size}'
+            generate_transactions(size).to_csv(csv_path, index=False)
+            loaded = pd.read_csv(csv_path, parse_dates=['transaction_date'])
+
+            shared = SharedSnapshots(folder)
+            start = time.perf_counter()
+            shared.publish(loaded, version)
+            publish_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            attached = shared.attach(version)
+            attach_seconds = time.perf_counter() - start
+            pd.testing.assert_frame_equal(loaded, as_values(attached))
+            print(f"Parity check passed at {size} rows: the attached snapshot equals the parsed CSV")
+            print(f"  Publish: {publish_seconds:.2f}s, attach: {attach_seconds * 1000:.1f}ms")
+
+            for mode, label in (('csv', 'Parse CSV per worker'), ('shared', 'Attach shared snapshot')):
+                reports = run_workers(mode, csv_path, folder, version, worker_count)
+                private = np.mean([report[0] for report in reports]) / 1e6
+                pss = np.mean([report[1] for report in reports]) / 1e6
+                print(f"  {label:24s} private {private:8.1f} MB  PSS {pss:8.1f} MB per worker")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
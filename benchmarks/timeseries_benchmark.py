@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Time Series Benchmark
+
+Compares the per-request daily groupby the spending chart used to send, one
+point per day with spending, with timeseries.TimeSeriesIndex at an automatic
+resolution and with LTTB-downsampled days, over windows from one month to
+ten years. Reports points, JSON payload size and build time for each. Checks
+that every resolution adds up to the daily groupby, and that downsampling
+keeps the first and last days and only selects actual days.
+
+Usage:
+    python benchmarks/timeseries_benchmark.py [row_count] [points]
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries import TimeSeriesIndex, RESOLUTIONS
+
+START = pd.Timestamp('2015-01-01')
+HISTORY_DAYS = 3650
+WINDOWS = {'1 month': 30, '1 year': 365, '3 years': 3 * 365, '10 years': HISTORY_DAYS}
+
+def generate_transactions(row_count, seed=42):
+    """
+    Generate dated charges with a weekly and a yearly pattern.
+
+    Args:
+        row_count (int): Number of transactions to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: transaction_date and amount columns
+    """
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, HISTORY_DAYS, row_count))
+    seasonal = 1 + 0.3 * np.sin(days * 2 * np.pi / 365) + 0.2 * (days % 7 >= 5)
+    return pd.DataFrame({
+        'transaction_date': START + pd.to_timedelta(days, unit='D'),
+        'amount': np.round(rng.gamma(2.0, 40.0, row_count) * seasonal, 2),
+    })
+
+def groupby_series(df, rows):
+    """The former per-request daily series: one point per day with spending."""
+    selected = df.iloc[rows]
+    daily = selected.groupby(selected['transaction_date'].dt.normalize())['amount'].sum()
+    return {'labels': daily.index.strftime('%Y-%m-%d').tolist(), 'values': daily.values.tolist()}
+
+def timed(function, repeat=3):
+    """Run a function several times, returning its result and the fastest milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def check_parity(index, df, rows, points):
+    """
+    Compare the index with the daily groupby over some rows.
+
+    Returns:
+        list: Descriptions of the mismatches
+    """
+    failures = []
+    values = df['amount'].to_numpy()[rows]
+    reference = groupby_series(df, rows)
+    expected = pd.Series(reference['values'], index=pd.to_datetime(reference['labels']))
+
+    days = index.series(rows, values, 'day', points=index.day_count)
+    dense = pd.Series(days['values'], index=pd.to_datetime(days['labels']))
+    if not np.allclose(dense.reindex(expected.index), expected) or not np.isclose(dense.sum(), expected.sum()):
+        failures.append("day totals differ")
+    for resolution in RESOLUTIONS[1:]:
+        series = index.series(rows, values, resolution, points=index.day_count)
+        if not np.isclose(sum(series['values']), expected.sum()):
+            failures.append(f"{resolution} totals differ")
+
+    downsampled = index.series(rows, values, 'day', points=points)
+    if len(downsampled['labels']) != points or downsampled['labels'][0] != days['labels'][0] or downsampled['labels'][-1] != days['labels'][-1]:
+        failures.append("downsampling lost the endpoints")
+    kept = dict(zip(days['labels'], days['values']))
+    if any(kept.get(label) != value for label, value in zip(downsampled['labels'], downsampled['values'])):
+        failures.append("downsampling invented points")
+    return failures
+
+def main():
+    """Run the parity check and the benchmark."""
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 180
+
+    df = generate_transactions(row_count)
+    index, build_ms = timed(lambda: TimeSeriesIndex(df['transaction_date']), repeat=1)
+    print(f"Built the calendar index of {row_count} transactions over {index.day_count} days in {build_ms:.0f}ms")
+
+    failures = check_parity(index, df, np.arange(len(df)), points)
+    if failures:
+        print(f"Parity check FAILED: {'; '.join(failures)}")
+        sys.exit(1)
+    print("Parity check passed: every resolution adds up to the daily groupby and LTTB keeps actual days, endpoints included")
+
+    dates = df['transaction_date']
+    values = df['amount'].to_numpy()
+    print(f"Series over the most recent window, at most {points} points:")
+    for name, window_days in WINDOWS.items():
+        rows = np.flatnonzero(dates >= START + pd.Timedelta(days=HISTORY_DAYS - window_days))
+        methods = {
+            'Daily groupby': lambda: groupby_series(df, rows),
+            'Auto resolution': lambda: index.series(rows, values[rows], 'auto', points),
+            'LTTB days': lambda: index.series(rows, values[rows], 'day', points),
+        }
+        print(f"  {name} ({len(rows)} transactions)")
+        for method, build in methods.items():
+            series, ms = timed(build)
+            size = len(json.dumps(series))
+            resolution = series.get('resolution', 'day')
+            print(f"    {method:16s} {len(series['labels']):6d} points ({resolution:7s}) {size / 1024:8.1f}KB {ms:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
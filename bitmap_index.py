@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Bitmap Index
+
+This module provides per-value bitmap indexes over low-cardinality transaction
+columns. Each value is stored in the smaller of two containers: a packed NumPy
+bit array (one bit per row) for frequent values, or a sorted array of row
+positions for rare ones. Filters resolve by OR-ing the bitmaps of the requested
+values within a column and AND-ing across columns, without reading the
+original string columns after the index is built.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bit of each row within its byte, matching np.packbits' big-endian bit order
+_BIT_VALUES = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+def rows_to_bits(rows, row_count):
+    """
+    Pack row positions into a bitmap.
+
+    Args:
+        rows (np.ndarray): Row positions
+        row_count (int): Number of rows the bitmap covers
+
+    Returns:
+        np.ndarray: Packed uint8 bitmap
+    """
+    bits = np.zeros((row_count + 7) // 8, dtype=np.uint8)
+    np.bitwise_or.at(bits, rows >> 3, _BIT_VALUES[rows & 7])
+    return bits
+
+def bits_to_mask(bits, row_count):
+    """
+    Unpack a bitmap into a boolean row mask.
+
+    Args:
+        bits (np.ndarray): Packed uint8 bitmap
+        row_count (int): Number of rows the bitmap covers
+
+    Returns:
+        np.ndarray: Boolean mask of length row_count
+    """
+    return np.unpackbits(bits, count=row_count).view(bool)
+
+class BitmapColumn:
+    """
+    Bitmaps of every distinct value of one column. Missing values are not indexed.
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(values)
+        self.row_count = len(codes)
+        self.positions = {value: code for code, value in enumerate(uniques.tolist())}
+
+        # Stable sort groups row positions by value, each group in ascending row order
+        order = np.argsort(codes, kind='stable').astype(np.uint32 if self.row_count < 2 ** 32 else np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        boundaries = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(codes < 0)
+
+        # A row list costs 32 bits per match and a bitmap one bit per row, so keep whichever is smaller
+        self.containers = []
+        for code, count in enumerate(counts):
+            if count * 32 > self.row_count:
+                self.containers.append(np.packbits(codes == code))
+            else:
+                self.containers.append(order[boundaries[code]:boundaries[code + 1]])
+
+    def nbytes(self):
+        """Memory held by the containers in bytes."""
+        return sum(container.nbytes for container in self.containers)
+
+    def bits(self, values):
+        """
+        Bitmap of rows holding any of the given values.
+
+        Args:
+            values (iterable): Values to match; unknown values match nothing
+
+        Returns:
+            np.ndarray: Packed uint8 bitmap
+        """
+        dense = []
+        sparse = []
+        for value in values:
+            code = self.positions.get(value)
+            if code is None:
+                continue
+            container = self.containers[code]
+            (dense if container.dtype == np.uint8 else sparse).append(container)
+
+        if dense:
+            bits = np.bitwise_or.reduce(dense) if len(dense) > 1 else dense[0].copy()
+        else:
+            bits = np.zeros((self.row_count + 7) // 8, dtype=np.uint8)
+        for rows in sparse:
+            np.bitwise_or.at(bits, rows >> 3, _BIT_VALUES[rows & 7])
+        return bits
+
+class BitmapIndex:
+    """
+    Bitmap indexes over several columns of a DataFrame, each built on first use.
+    """
+
+    def __init__(self, df, columns, normalizers=None):
+        """
+        Args:
+            df (pd.DataFrame): Rows to index
+            columns (list): Columns that may be indexed
+            normalizers (dict): Column -> function applied to the column before
+                indexing, e.g. lower-casing; query values must be normalized the same way
+        """
+        self.df = df
+        self.row_count = len(df)
+        self.indexed_columns = [column for column in columns if column in df.columns]
+        self.normalizers = normalizers or {}
+        self._columns = {}
+
+    def column(self, name):
+        """Return the bitmap column for a column name, building it on first use."""
+        column = self._columns.get(name)
+        if column is None:
+            values = self.df[name]
+            if name in self.normalizers:
+                values = self.normalizers[name](values)
+            column = BitmapColumn(values)
+            self._columns[name] = column
+        return column
+
+    def select(self, filters):
+        """
+        Bitmap of rows matching every filter.
+
+        Args:
+            filters (dict): Column -> values; a row matches a column when it holds any of the values
+
+        Returns:
+            np.ndarray: Packed uint8 bitmap
+        """
+        result = None
+        for name, values in filters.items():
+            bits = self.column(name).bits(values)
+            if result is None:
+                result = bits
+            else:
+                np.bitwise_and(result, bits, out=result)
+        if result is None:
+            result = np.full((self.row_count + 7) // 8, 255, dtype=np.uint8)
+        return result
+
+    def mask(self, filters):
+        """Boolean row mask of rows matching every filter."""
+        return bits_to_mask(self.select(filters), self.row_count)
+
+    def rows(self, filters):
+        """Row positions of rows matching every filter, in ascending order."""
+        return np.flatnonzero(self.mask(filters))
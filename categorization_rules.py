@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Categorization Rules
+
+This module loads the declarative categorization rules from
+rules/categorization_rules.json and compiles them into an indexed decision
+structure used by the enrichment pipeline. The compiled rules can be reloaded
+at runtime so rule changes do not require a code edit or an app restart.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', 'categorization_rules.json')
+
+class KeywordRuleSet:
+    """
+    Ordered keyword rules for one category or transaction type.
+
+    Each rule is flattened into (keyword, excludes, result) entries kept in rule
+    order, so the first keyword found in a description decides the result
+    exactly like the original if/elif chains did.
+    """
+
+    def __init__(self, rules, default=None):
+        entries = []
+        for rule in rules:
+            excludes = tuple(keyword.lower() for keyword in rule.get('exclude', []))
+            for keyword in rule['keywords']:
+                entries.append((keyword.lower(), excludes, rule['subcategory']))
+        self.entries = tuple(entries)
+        self.default = default
+
+    def match(self, description):
+        """
+        Return the result of the first rule whose keyword appears in the description.
+
+        Args:
+            description (str): Lower-cased transaction description
+
+        Returns:
+            str: Matched result, or the rule set default (may be None)
+        """
+        for keyword, excludes, result in self.entries:
+            if keyword in description and not any(exclude in description for exclude in excludes):
+                return result
+        return self.default
+
+class CompiledRules:
+    """
+    Categorization rules compiled from the rules file.
+
+    Subcategory rules are indexed by lower-cased source category and by
+    transaction type; keyword lists used by the vectorized transaction type
+    and recurring detection are exposed as regex alternations.
+    """
+
+    def __init__(self, config, version, modified=None):
+        self.version = version
+        # Modification time of the compiled file, for HTTP validators
+        self.modified = modified
+
+        subcategory = config['subcategory']
+        self.subcategory_by_category = {
+            category.lower(): KeywordRuleSet(spec.get('rules', []), spec.get('default'))
+            for category, spec in subcategory.get('by_category', {}).items()
+        }
+        self.subcategory_by_transaction_type = {
+            transaction_type: KeywordRuleSet(spec.get('rules', []), spec.get('default'))
+            for transaction_type, spec in subcategory.get('by_transaction_type', {}).items()
+        }
+        self.default_subcategory = subcategory.get('default', 'General')
+
+        spending_type = config['spending_type']
+        self.spending_type_by_transaction_type = dict(spending_type.get('by_transaction_type', {}))
+        self.transfer_subcategory_keywords = tuple(spending_type.get('transfer_subcategory_keywords', []))
+        self.non_discretionary_subcategory_keywords = tuple(spending_type.get('non_discretionary_subcategory_keywords', []))
+        self.non_discretionary_category_keywords = tuple(spending_type.get('non_discretionary_category_keywords', []))
+        self.default_spending_type = spending_type.get('default', 'Discretionary')
+
+        # Keyword lists are joined as-is, matching how the hard-coded patterns were built
+        self.patterns = {
+            name: '|'.join(keywords)
+            for section in ('transaction_type', 'recurring')
+            for name, keywords in config.get(section, {}).items()
+        }
+
+    def subcategory(self, description, category, transaction_type):
+        """
+        Determine a subcategory from a description, source category and transaction type.
+
+        Args:
+            description (str): Lower-cased transaction description
+            category (str): Lower-cased source category
+            transaction_type (str): Transaction type
+
+        Returns:
+            str: Sub-category for the transaction
+        """
+        rule_set = self.subcategory_by_category.get(category)
+        if rule_set is not None:
+            return rule_set.match(description)
+
+        rule_set = self.subcategory_by_transaction_type.get(transaction_type)
+        if rule_set is not None:
+            result = rule_set.match(description)
+            if result is not None:
+                return result
+
+        return self.default_subcategory
+
+    def spending_type(self, transaction_type, subcategory, category):
+        """
+        Categorize spending as discretionary or non-discretionary.
+
+        Args:
+            transaction_type (str): Transaction type
+            subcategory (str): Lower-cased sub-category
+            category (str): Lower-cased source category
+
+        Returns:
+            str: Spending type (Discretionary, Non-discretionary, Income/Refund, Credit Payment, Transfer)
+        """
+        spending_type = self.spending_type_by_transaction_type.get(transaction_type)
+        if spending_type is not None:
+            return spending_type
+
+        if any(keyword in subcategory for keyword in self.transfer_subcategory_keywords):
+            return 'Transfer'
+
+        if any(keyword in subcategory for keyword in self.non_discretionary_subcategory_keywords):
+            return 'Non-discretionary'
+
+        if any(keyword in category for keyword in self.non_discretionary_category_keywords):
+            return 'Non-discretionary'
+
+        return self.default_spending_type
+
+def compile_rules(file_path=RULES_FILE):
+    """
+    Load and compile the categorization rules file.
+
+    Args:
+        file_path (str): Path to the rules JSON file
+
+    Returns:
+        CompiledRules: Compiled decision structure
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Categorization rules file not found: {file_path}")
+
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+        modified = os.fstat(f.fileno()).st_mtime
+
+    config = json.loads(raw.decode('utf-8'))
+    version = f"{config.get('version', '0')}-{hashlib.sha1(raw).hexdigest()[:8]}"
+    return CompiledRules(config, version, modified)
+
+_rules = None
+_rules_lock = threading.Lock()
+
+def get_rules():
+    """Return the currently loaded rules, compiling them on first use."""
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                _rules = compile_rules()
+    return _rules
+
+def reload_rules(file_path=RULES_FILE):
+    """
+    Recompile the rules file and swap it in for subsequent enrichment runs.
+
+    Args:
+        file_path (str): Path to the rules JSON file
+
+    Returns:
+        CompiledRules: Newly compiled rules
+    """
+    global _rules
+    rules = compile_rules(file_path)
+    with _rules_lock:
+        _rules = rules
+    print(f"Loaded categorization rules version {rules.version}")
+    return rules
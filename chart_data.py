@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Chart Data
+
+This module computes the payloads of the web app's chart data endpoints
+(/api/summary, /api/categories, /api/merchants, /api/timeseries and
+/api/weekday). Pages render as a light shell and fetch these in parallel once
+loaded, instead of inlining record lists into the HTML.
+
+Payloads are pre-shaped for Chart.js: one array per series, aligned with a
+labels array, so the browser draws them without reshaping. Like the page
+model builders, each builder is a pure function of the snapshot and the
+normalized request parameters, which lets the app cache the result per data
+version. Filters are TransactionQuery attributes.
+"""
+
+import numpy as np
+from serializers import summarize_groups
+from transaction_query import TransactionQuery
+from timeseries import RESOLUTIONS
+
+# Columns a chart can sum: the charged amount, or the amount net of refunds
+CHART_VALUES = ('amount', 'net_amount')
+
+# Time series resolutions; auto picks one from the span
+TIMESERIES_RESOLUTIONS = ('auto',) + tuple(RESOLUTIONS)
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def _with_value(rows, value):
+    """Add the net_amount column to a copy of the rows when it is the charted value."""
+    if value == 'net_amount':
+        return rows.assign(net_amount=rows['amount'] - rows['refunded_amount'])
+    return rows
+
+def _group_data(snapshot, key, value, limit, positive, filters):
+    """
+    Totals per group, largest first.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        key (str): Column to group by
+        value (str): Column to sum, one of CHART_VALUES
+        limit (int): Number of groups to return, the rest summed as other; None for all
+        positive (bool): Whether to leave out groups whose total is not positive,
+            e.g. fully refunded merchants
+        filters (dict): TransactionQuery attributes
+
+    Returns:
+        dict: labels, totals, counts and averages arrays, plus other_total and other_count
+    """
+    rows = _with_value(TransactionQuery(**filters).apply(snapshot), value)
+    summary = summarize_groups(rows, key, value_column=value)
+    if positive:
+        summary = summary[summary['total'] > 0]
+    shown = summary.head(limit) if limit else summary
+    rest = summary.iloc[len(shown):]
+    return {
+        'labels': shown['name'].tolist(),
+        'totals': np.asarray(shown['total'], dtype=float).tolist(),
+        'counts': shown['count'].tolist(),
+        'averages': np.asarray(shown['average'], dtype=float).tolist(),
+        'other_total': float(rest['total'].sum()),
+        'other_count': int(rest['count'].sum()),
+    }
+
+def build_summary_data(snapshot, **filters):
+    """
+    Build the spending summary: counts and totals per transaction type.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        **filters: TransactionQuery attributes; the transaction type is
+            ignored since the summary covers every type
+
+    Returns:
+        dict: Transaction counts, totals and charge statistics
+    """
+    filters.pop('transaction_type', None)
+    charges = TransactionQuery(transaction_type='charge', **filters).apply(snapshot)['amount']
+    refunds = TransactionQuery(transaction_type='refund', **filters).apply(snapshot)['amount']
+    payments = TransactionQuery(transaction_type='payment', **filters).apply(snapshot)['amount']
+
+    total_spent = float(charges.sum())
+    total_refunded = float(refunds.abs().sum())
+    # Statistics of an empty selection are null rather than NaN, which JSON cannot carry
+    no_charges = charges.empty
+    return {
+        'total_transactions': int(TransactionQuery(**filters).mask(snapshot).sum()),
+        'total_charges': len(charges),
+        'total_payments': len(payments),
+        'total_refunds': len(refunds),
+        'total_spent': total_spent,
+        'total_refunded': total_refunded,
+        'total_payments_amount': float(payments.abs().sum()),
+        'net_spending': total_spent - total_refunded,
+        'avg_transaction': None if no_charges else float(charges.mean()),
+        'median_transaction': None if no_charges else float(charges.median()),
+        'max_transaction': None if no_charges else float(charges.max()),
+    }
+
+def build_category_data(snapshot, value='amount', limit=None, positive=False, **filters):
+    """
+    Build spending per category, largest first.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        value (str): Column to sum, one of CHART_VALUES
+        limit (int): Number of categories to return, the rest summed as other
+        positive (bool): Whether to leave out categories with a non-positive total
+        **filters: TransactionQuery attributes
+
+    Returns:
+        dict: labels, totals, counts and averages arrays, plus other_total and other_count
+    """
+    return _group_data(snapshot, 'category', value, limit, positive, filters)
+
+def build_merchant_data(snapshot, value='amount', limit=None, positive=False, **filters):
+    """
+    Build spending per merchant, largest first.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        value (str): Column to sum, one of CHART_VALUES
+        limit (int): Number of merchants to return, the rest summed as other
+        positive (bool): Whether to leave out merchants with a non-positive total
+        **filters: TransactionQuery attributes
+
+    Returns:
+        dict: labels, totals, counts and averages arrays, plus other_total and other_count
+    """
+    return _group_data(snapshot, 'merchant', value, limit, positive, filters)
+
+def build_timeseries_data(snapshot, value='amount', resolution='auto', points=180, **filters):
+    """
+    Build spending over time at a bounded number of points, see timeseries.py.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        value (str): Column to sum, one of CHART_VALUES
+        resolution (str): day, week, month or quarter, or auto to pick the
+            finest that fits in points over the span of the matching rows
+        points (int): Maximum number of points, beyond which the series is downsampled
+        **filters: TransactionQuery attributes
+
+    Returns:
+        dict: labels and values arrays over every bucket of the span, the
+            resolution used and whether the series was downsampled
+    """
+    rows = TransactionQuery(**filters).rows(snapshot)
+    values = _with_value(snapshot.df.iloc[rows], value)[value].to_numpy(dtype=float)
+    return snapshot.timeseries_index().series(rows, values, resolution, points)
+
+def build_weekday_data(snapshot, value='amount', **filters):
+    """
+    Build spending per day of the week, Monday first.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        value (str): Column to sum, one of CHART_VALUES
+        **filters: TransactionQuery attributes
+
+    Returns:
+        dict: labels, totals and counts arrays with all seven days
+    """
+    rows = _with_value(TransactionQuery(**filters).apply(snapshot), value)
+    by_day = rows[value].groupby(rows['transaction_date'].dt.dayofweek).agg(['sum', 'size'])
+    by_day = by_day.reindex(range(len(WEEKDAYS)), fill_value=0)
+    return {
+        'labels': WEEKDAYS,
+        'totals': np.asarray(by_day['sum'], dtype=float).tolist(),
+        'counts': by_day['size'].astype(int).tolist(),
+    }
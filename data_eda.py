@@ -1,44 +1,34 @@
 import os
 import pandas as pd
-import glob
-import re
-from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
-import seaborn as sns
-from collections import Counter
-from trx_consolidation import consolidate_transactions, analyze_transactions
 
-def analyze_spending_habits(transactions_file='consolidated_transactions.csv', data_folder='data', output_folder='analysis_results'):
+# Plotting libraries are imported on first use, so importing this module for its numbers stays fast
+_plotting = None
+
+def _require_plotting():
+    """Import matplotlib and seaborn the first time a chart is drawn."""
+    global _plotting
+    if _plotting is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        _plotting = (plt, sns)
+    return _plotting
+
+def compute_spending_analysis(transactions):
     """
-    Perform detailed analysis of spending habits from consolidated transaction data.
+    Compute spending analysis metrics without drawing any charts.
     
     Args:
-        transactions_file (str): Name of the consolidated transactions CSV file
-        data_folder (str): Path to the folder containing the transactions file
-        output_folder (str): Path to save analysis results and charts
+        transactions (pd.DataFrame): Transactions with parsed transaction dates
         
     Returns:
-        dict: Dictionary containing various spending analysis metrics
+        tuple: (results dict of analysis metrics, dict of DataFrames the charts are drawn from)
     """
-    # Create output folder if it doesn't exist
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # Load transactions
-    file_path = os.path.join(data_folder, transactions_file)
-    if not os.path.exists(file_path):
-        print(f"Error: Transaction file {file_path} not found!")
-        return None
-    
-    transactions = pd.read_csv(file_path)
-    transactions['transaction_date'] = pd.to_datetime(transactions['transaction_date'])
-    
     # Filter to only include charges (exclude payments and refunds for spending analysis)
     charges = transactions[transactions['transaction_type'].str.lower() == 'charge'].copy()
     
     # Create various analysis metrics
     results = {}
+    chart_data = {}
     
     # 1. Overall spending summary
     results['total_transactions'] = len(transactions)
@@ -60,6 +50,65 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     category_spending = category_spending.sort_values('sum', ascending=False)
     category_spending = category_spending.rename(columns={'sum': 'total_amount', 'count': 'transaction_count', 'mean': 'avg_amount'})
     results['spending_by_category'] = category_spending.to_dict('records')
+    chart_data['category_spending'] = category_spending
+    
+    # 3. Top merchants
+    charges.loc[:, 'merchant'] = charges['description'].apply(lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown')
+    merchant_spending = charges.groupby('merchant')['amount'].agg(['sum', 'count']).reset_index()
+    merchant_spending = merchant_spending.sort_values('sum', ascending=False)
+    results['top_merchants'] = merchant_spending.head(10).to_dict('records')
+    chart_data['merchant_spending'] = merchant_spending
+    
+    # 3.5 Top 10 Transactions by Amount
+    top_transactions = charges.sort_values('amount', ascending=False).head(10).copy()
+    top_transactions['transaction_date'] = top_transactions['transaction_date'].dt.strftime('%Y-%m-%d')
+    results['top_transactions'] = top_transactions[['transaction_date', 'description', 'amount', 'category', 'source']].to_dict('records')
+    chart_data['top_transactions'] = top_transactions
+    
+    # 4. Spending over time
+    charges.loc[:, 'day_of_week'] = charges['transaction_date'].dt.day_name()
+    charges.loc[:, 'week'] = charges['transaction_date'].dt.isocalendar().week
+    charges.loc[:, 'day_of_month'] = charges['transaction_date'].dt.day
+    
+    # Daily spending totals
+    daily_spending = charges.groupby('transaction_date')['amount'].sum().reset_index()
+    results['spending_by_day'] = daily_spending.to_dict('records')
+    chart_data['daily_spending'] = daily_spending
+    
+    # Spending by day of week
+    dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    day_spending = charges.groupby('day_of_week')['amount'].agg(['sum', 'count']).reindex(dow_order).reset_index()
+    results['spending_by_weekday'] = day_spending.to_dict('records')
+    chart_data['day_spending'] = day_spending
+    
+    # 5. Spending by account source
+    source_spending = charges.groupby('source')['amount'].agg(['sum', 'count', 'mean']).reset_index()
+    source_spending = source_spending.sort_values('sum', ascending=False)
+    results['spending_by_source'] = source_spending.to_dict('records')
+    chart_data['source_spending'] = source_spending
+    
+    # 6. Transaction size distribution
+    chart_data['charge_amounts'] = charges['amount']
+    
+    # 7. Day of month spending pattern
+    chart_data['day_of_month_spending'] = charges.groupby('day_of_month')['amount'].sum().reset_index()
+    
+    # 8. Payment patterns analysis
+    payments = transactions[transactions['transaction_type'].str.lower() == 'payment']
+    chart_data['payment_amounts'] = payments.groupby('transaction_date')['amount'].sum().abs().reset_index()
+    
+    return results, chart_data
+
+def plot_spending_charts(chart_data, output_folder='analysis_results'):
+    """
+    Draw the spending analysis charts as PNG files.
+    
+    Args:
+        chart_data (dict): DataFrames returned by compute_spending_analysis
+        output_folder (str): Path to save the charts
+    """
+    plt, sns = _require_plotting()
+    category_spending = chart_data['category_spending']
     
     # Create pie chart of category spending
     plt.figure(figsize=(12, 8))
@@ -90,15 +139,9 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'top_categories_bar.png'))
     plt.close()
     
-    # 3. Top merchants
-    charges.loc[:, 'merchant'] = charges['description'].apply(lambda x: x.split()[0] if pd.notna(x) and len(x.split()) > 0 else 'Unknown')
-    merchant_spending = charges.groupby('merchant')['amount'].agg(['sum', 'count']).reset_index()
-    merchant_spending = merchant_spending.sort_values('sum', ascending=False)
-    results['top_merchants'] = merchant_spending.head(10).to_dict('records')
-    
     # Bar chart of top merchants
     plt.figure(figsize=(14, 8))
-    top_merchants = merchant_spending.head(15)
+    top_merchants = chart_data['merchant_spending'].head(15)
     sns.barplot(x='sum', y='merchant', data=top_merchants)
     plt.title('Top 15 Merchants by Spending')
     plt.xlabel('Total Amount ($)')
@@ -107,14 +150,9 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'top_merchants_bar.png'))
     plt.close()
     
-    # 3.5 Top 10 Transactions by Amount
-    top_transactions = charges.sort_values('amount', ascending=False).head(10).copy()
-    top_transactions['transaction_date'] = top_transactions['transaction_date'].dt.strftime('%Y-%m-%d')
-    results['top_transactions'] = top_transactions[['transaction_date', 'description', 'amount', 'category', 'source']].to_dict('records')
-    
     # Create bar chart of top transactions
     plt.figure(figsize=(14, 8))
-    top_txn_plot = top_transactions.copy()
+    top_txn_plot = chart_data['top_transactions'].copy()
     # Truncate long descriptions for better display
     top_txn_plot['short_desc'] = top_txn_plot['description'].apply(lambda x: (x[:25] + '...') if len(x) > 25 else x)
     sns.barplot(x='amount', y='short_desc', data=top_txn_plot)
@@ -127,16 +165,8 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'top_transactions.png'))
     plt.close()
     
-    # 4. Spending over time
-    charges.loc[:, 'day_of_week'] = charges['transaction_date'].dt.day_name()
-    charges.loc[:, 'week'] = charges['transaction_date'].dt.isocalendar().week
-    charges.loc[:, 'day_of_month'] = charges['transaction_date'].dt.day
-    
-    # Daily spending totals
-    daily_spending = charges.groupby('transaction_date')['amount'].sum().reset_index()
-    results['spending_by_day'] = daily_spending.to_dict('records')
-    
     # Daily spending line chart
+    daily_spending = chart_data['daily_spending']
     plt.figure(figsize=(14, 6))
     plt.plot(daily_spending['transaction_date'], daily_spending['amount'], marker='o')
     plt.title('Daily Spending')
@@ -147,14 +177,9 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'daily_spending.png'))
     plt.close()
     
-    # Spending by day of week
-    dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_spending = charges.groupby('day_of_week')['amount'].agg(['sum', 'count']).reindex(dow_order).reset_index()
-    results['spending_by_weekday'] = day_spending.to_dict('records')
-    
     # Weekday spending bar chart
     plt.figure(figsize=(10, 6))
-    sns.barplot(x='day_of_week', y='sum', data=day_spending)
+    sns.barplot(x='day_of_week', y='sum', data=chart_data['day_spending'])
     plt.title('Spending by Day of Week')
     plt.xlabel('Day of Week')
     plt.ylabel('Total Amount ($)')
@@ -162,12 +187,8 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'weekday_spending.png'))
     plt.close()
     
-    # 5. Spending by account source
-    source_spending = charges.groupby('source')['amount'].agg(['sum', 'count', 'mean']).reset_index()
-    source_spending = source_spending.sort_values('sum', ascending=False)
-    results['spending_by_source'] = source_spending.to_dict('records')
-    
     # Source spending pie chart
+    source_spending = chart_data['source_spending']
     plt.figure(figsize=(10, 6))
     plt.pie(source_spending['sum'], labels=source_spending['source'], autopct='%1.1f%%', 
             startangle=90, shadow=False, wedgeprops={'edgecolor': 'white'})
@@ -177,9 +198,9 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'source_spending_pie.png'))
     plt.close()
     
-    # 6. Transaction size distribution
+    # Transaction size distribution
     plt.figure(figsize=(12, 6))
-    sns.histplot(charges['amount'], bins=30, kde=True)
+    sns.histplot(chart_data['charge_amounts'], bins=30, kde=True)
     plt.title('Distribution of Transaction Amounts')
     plt.xlabel('Transaction Amount ($)')
     plt.ylabel('Frequency')
@@ -187,11 +208,9 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'transaction_distribution.png'))
     plt.close()
     
-    # 7. Day of month spending pattern
-    day_of_month_spending = charges.groupby('day_of_month')['amount'].sum().reset_index()
-    
+    # Day of month spending pattern
     plt.figure(figsize=(14, 6))
-    sns.barplot(x='day_of_month', y='amount', data=day_of_month_spending)
+    sns.barplot(x='day_of_month', y='amount', data=chart_data['day_of_month_spending'])
     plt.title('Spending by Day of Month')
     plt.xlabel('Day of Month')
     plt.ylabel('Total Amount ($)')
@@ -199,10 +218,8 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
     plt.savefig(os.path.join(output_folder, 'day_of_month_spending.png'))
     plt.close()
     
-    # 8. Payment patterns analysis
-    payments = transactions[transactions['transaction_type'].str.lower() == 'payment']
-    payment_amounts = payments.groupby('transaction_date')['amount'].sum().abs().reset_index()
-    
+    # Payment amounts over time
+    payment_amounts = chart_data['payment_amounts']
     if not payment_amounts.empty:
         plt.figure(figsize=(14, 6))
         plt.plot(payment_amounts['transaction_date'], payment_amounts['amount'], marker='o', color='green')
@@ -213,6 +230,36 @@ def analyze_spending_habits(transactions_file='consolidated_transactions.csv', d
         plt.tight_layout()
         plt.savefig(os.path.join(output_folder, 'payment_patterns.png'))
         plt.close()
+
+def analyze_spending_habits(transactions_file='consolidated_transactions.csv', data_folder='data', output_folder='analysis_results', charts=True):
+    """
+    Perform detailed analysis of spending habits from consolidated transaction data.
+    
+    Args:
+        transactions_file (str): Name of the consolidated transactions CSV file
+        data_folder (str): Path to the folder containing the transactions file
+        output_folder (str): Path to save analysis results and charts
+        charts (bool): Whether to draw the charts; without them matplotlib is never imported
+        
+    Returns:
+        dict: Dictionary containing various spending analysis metrics
+    """
+    # Create output folder if it doesn't exist
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    
+    # Load transactions
+    file_path = os.path.join(data_folder, transactions_file)
+    if not os.path.exists(file_path):
+        print(f"Error: Transaction file {file_path} not found!")
+        return None
+    
+    transactions = pd.read_csv(file_path)
+    transactions['transaction_date'] = pd.to_datetime(transactions['transaction_date'])
+    
+    results, chart_data = compute_spending_analysis(transactions)
+    if charts:
+        plot_spending_charts(chart_data, output_folder)
     
     return results
 
@@ -300,6 +347,8 @@ def load_and_analyze_transactions(data_folder='data', csv_file='consolidated_tra
 
 def main():
     """Main function to run the transaction consolidation and analysis process."""
+    from trx_consolidation import consolidate_transactions, analyze_transactions
+    
     # Set data folder path
     data_folder = 'data'
     
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Online Transaction Enrichment Client
+
+This script runs the online enrichment stage that follows
+offline_transaction_enrichment. Rows are deduplicated by normalized description,
+unknown descriptions are sent to the enrichment service in batches issued
+concurrently under a rate limit, and every result is cached persistently by
+description hash so each merchant string is classified only once.
+
+Configuration (environment variables or .env):
+    ENRICHMENT_SERVICE_URL: Base URL of the enrichment service
+    ENRICHMENT_BATCH_SIZE: Descriptions per request (default 50)
+    ENRICHMENT_MAX_CONCURRENCY: Maximum requests in flight (default 4)
+    ENRICHMENT_RATE_LIMIT: Maximum requests per second (default 10)
+    ENRICHMENT_CACHE_FILE: SQLite cache path (default data/enrichment_cache.sqlite)
+
+Service protocol:
+    POST {ENRICHMENT_SERVICE_URL}/classify
+        {"transactions": [{"id": "<description hash>", "description": "<normalized description>"}]}
+    returns
+        {"results": [{"id": "...", "category": "...", "subcategory": "...", "merchant": "..."}]}
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import urllib.request
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from offline_transaction_enrichment import (
+    EnrichedCategory, normalize_description, load_transactions, enrich_transactions
+)
+
+DEFAULT_CACHE_FILE = 'data/enrichment_cache.sqlite'
+
+def description_hash(normalized_description):
+    """
+    Hash a normalized description into the cache key.
+
+    Args:
+        normalized_description (str): Output of normalize_description
+
+    Returns:
+        str: Hex digest identifying the description
+    """
+    return hashlib.sha256(normalized_description.encode('utf-8')).hexdigest()
+
+class EnrichmentCache:
+    """
+    Persistent cache of enrichment results keyed by description hash.
+    """
+
+    def __init__(self, file_path=DEFAULT_CACHE_FILE):
+        self.file_path = file_path
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS enrichment_results (
+                description_hash TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                category TEXT,
+                subcategory TEXT,
+                merchant TEXT,
+                enriched_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def get_many(self, hashes):
+        """
+        Look up cached results.
+
+        Args:
+            hashes (list): Description hashes
+
+        Returns:
+            dict: Description hash -> result dict for the hashes that are cached
+        """
+        results = {}
+        hashes = list(hashes)
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT description_hash, category, subcategory, merchant FROM enrichment_results "
+                    f"WHERE description_hash IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, category, subcategory, merchant in rows:
+                    results[key] = {'category': category, 'subcategory': subcategory, 'merchant': merchant}
+        return results
+
+    def put_many(self, entries):
+        """
+        Store results.
+
+        Args:
+            entries (list): (description hash, normalized description, result dict) tuples
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO enrichment_results VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, description, result.get('category'), result.get('subcategory'), result.get('merchant'), now)
+                 for key, description, result in entries]
+            )
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM enrichment_results").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._connection.close()
+
+class RateLimiter:
+    """
+    Token bucket limiting how many requests start per second.
+    """
+
+    def __init__(self, requests_per_second, burst=1):
+        self.rate = float(requests_per_second)
+        self.capacity = float(max(burst, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be issued."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class EnrichmentMetrics:
+    """
+    Throughput and cache statistics for one enrichment run.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.unique_descriptions = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.classified = 0
+        self.elapsed_seconds = 0.0
+
+    def as_dict(self):
+        """Return the metrics, including derived rates, as a plain dict."""
+        elapsed = self.elapsed_seconds or float('nan')
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'rows': self.rows,
+            'unique_descriptions': self.unique_descriptions,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_ratio': self.cache_hits / lookups if lookups else 0.0,
+            'requests': self.requests,
+            'failed_requests': self.failed_requests,
+            'classified': self.classified,
+            'elapsed_seconds': self.elapsed_seconds,
+            'rows_per_second': self.rows / elapsed,
+            'classified_per_second': self.classified / elapsed,
+        }
+
+class EnrichmentClient:
+    """
+    Client for the downstream enrichment service.
+    """
+
+    def __init__(self, base_url, cache=None, batch_size=50, max_concurrency=4,
+                 requests_per_second=10, timeout=30, max_retries=2):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else EnrichmentCache()
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.metrics = EnrichmentMetrics()
+
+    def _post_batch(self, batch):
+        """Send one batch to the service (blocking)."""
+        payload = json.dumps({
+            'transactions': [{'id': key, 'description': description} for key, description in batch]
+        }).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.base_url}/classify", data=payload, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+        return {result['id']: result for result in body.get('results', [])}
+
+    async def _classify_batch(self, batch, semaphore, rate_limiter):
+        """Classify one batch with retries, respecting the concurrency and rate limits."""
+        results = None
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                await rate_limiter.acquire()
+                self.metrics.requests += 1
+                try:
+                    results = await asyncio.to_thread(self._post_batch, batch)
+                    break
+                except (urllib.error.URLError, OSError, ValueError) as e:
+                    self.metrics.failed_requests += 1
+                    if attempt == self.max_retries:
+                        print(f"Warning: enrichment batch of {len(batch)} descriptions failed: {e}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.5 * (2 ** attempt))
+
+        if results is None:
+            return []
+
+        descriptions = dict(batch)
+        entries = [(key, descriptions[key], result) for key, result in results.items() if key in descriptions]
+        self.cache.put_many(entries)
+        self.metrics.classified += len(entries)
+        return entries
+
+    async def classify_descriptions(self, normalized_descriptions):
+        """
+        Classify unique normalized descriptions, serving cached results first.
+
+        Args:
+            normalized_descriptions (iterable): Normalized descriptions
+
+        Returns:
+            dict: Normalized description -> result dict
+        """
+        keys = {description: description_hash(description) for description in set(normalized_descriptions)}
+        self.metrics.unique_descriptions += len(keys)
+
+        cached = self.cache.get_many(keys.values())
+        results = {description: cached[key] for description, key in keys.items() if key in cached}
+        missing = [(key, description) for description, key in keys.items() if key not in cached]
+        self.metrics.cache_hits += len(results)
+        self.metrics.cache_misses += len(missing)
+
+        if missing:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            rate_limiter = RateLimiter(self.requests_per_second, burst=self.max_concurrency)
+            batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+            for entries in await asyncio.gather(*(self._classify_batch(batch, semaphore, rate_limiter) for batch in batches)):
+                for _, description, result in entries:
+                    results[description] = result
+
+        return results
+
+    def enrich(self, df):
+        """
+        Apply online enrichment to offline-enriched transactions.
+        Fills subcategory_enriched and merchant, and replaces category_enriched
+        where the service returned a category. Rows the service could not
+        classify keep their offline values.
+
+        Args:
+            df (pd.DataFrame): Output of offline_transaction_enrichment.enrich_transactions
+
+        Returns:
+            pd.DataFrame: DataFrame with online enrichment applied
+        """
+        start = time.perf_counter()
+        enriched_df = df.copy()
+
+        # Normalize each distinct raw description once
+        codes, uniques = pd.factorize(enriched_df['description'])
+        normalized = pd.Index([normalize_description(description) for description in uniques])
+        results = asyncio.run(self.classify_descriptions(normalized[normalized != '']))
+
+        for column, field in [('category_enriched', 'category'), ('subcategory_enriched', 'subcategory'), ('merchant', 'merchant')]:
+            values = pd.Series([(results.get(description) or {}).get(field) for description in normalized], dtype=object)
+            row_values = pd.Series(values.to_numpy()[codes], index=enriched_df.index)
+            row_values[codes < 0] = None
+            enriched_df[column] = row_values.where(row_values.notna(), enriched_df[column])
+
+        self.metrics.rows += len(enriched_df)
+        self.metrics.elapsed_seconds += time.perf_counter() - start
+        return enriched_df
+
+class StubEnrichmentHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the enrichment service, for development and testing.
+    Derives the merchant from the first words of the description and keeps the
+    offline category undefined.
+    """
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/classify':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length).decode('utf-8'))
+        self.server.request_count += 1
+        self.server.batch_sizes.append(len(request.get('transactions', [])))
+
+        results = []
+        for transaction in request.get('transactions', []):
+            words = transaction['description'].split()
+            results.append({
+                'id': transaction['id'],
+                'category': None,
+                'subcategory': EnrichedCategory.UNDEFINED.value,
+                'merchant': ' '.join(words[:2]).title() if words else EnrichedCategory.UNDEFINED.value,
+            })
+
+        body = json.dumps({'results': results}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(host='127.0.0.1', port=0):
+    """
+    Start the stand-in enrichment service on a background thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free port
+
+    Returns:
+        tuple: (server, base_url); call server.shutdown() to stop it. The
+            server counts requests in request_count and records the
+            descriptions per request in batch_sizes
+    """
+    server = ThreadingHTTPServer((host, port), StubEnrichmentHandler)
+    server.request_count = 0
+    server.batch_sizes = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    """
+    Main function to run the online enrichment process.
+    Pass --stub to run against the local stand-in service.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    stub_server = None
+    if '--stub' in sys.argv:
+        stub_server, base_url = start_stub_server()
+        print(f"Started stand-in enrichment service at {base_url}")
+    else:
+        base_url = os.getenv('ENRICHMENT_SERVICE_URL')
+        if not base_url:
+            raise ValueError("ENRICHMENT_SERVICE_URL is not set. Check your .env file or pass --stub.")
+
+    client = EnrichmentClient(
+        base_url,
+        cache=EnrichmentCache(os.getenv('ENRICHMENT_CACHE_FILE', DEFAULT_CACHE_FILE)),
+        batch_size=int(os.getenv('ENRICHMENT_BATCH_SIZE', 50)),
+        max_concurrency=int(os.getenv('ENRICHMENT_MAX_CONCURRENCY', 4)),
+        requests_per_second=float(os.getenv('ENRICHMENT_RATE_LIMIT', 10)),
+    )
+
+    print("Loading transactions...")
+    transactions_df = load_transactions(file_path='data/consolidated_transactions.csv')
+
+    print(f"Enriching {len(transactions_df)} transactions...")
+    enriched_df = client.enrich(enrich_transactions(transactions_df))
+
+    enriched_df.to_csv('data/my_consolidated_transactions_enriched.csv', index=False)
+    print("Saved enriched transactions to data/my_consolidated_transactions_enriched.csv")
+
+    print("\n--- Online Enrichment Metrics ---")
+    for name, value in client.metrics.as_dict().items():
+        print(f"  {name}: {value:.3f}" if isinstance(value, float) else f"  {name}: {value}")
+
+    if stub_server is not None:
+        stub_server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+HTTP Caching
+
+This module adds conditional GET support to the Flask app. Every cacheable
+response carries an ETag derived from the data version and the request, plus
+a Last-Modified date and a configurable Cache-Control header. Requests whose
+If-None-Match or If-Modified-Since validators still match are answered with
+304 Not Modified before the route runs.
+
+Only 200 responses carry validators, so routes must answer failures with an
+error status; an error page served as 200 would be revalidated as current
+until the data changed.
+"""
+
+import hashlib
+from flask import current_app, g, request
+
+class ConditionalGetCache:
+    """
+    Validator-based HTTP caching for read routes.
+
+    The version source is a callable returning (version, last_modified), where
+    version is a string that changes whenever any data a response depends on
+    changes, and last_modified is a timezone-aware datetime. It may return None
+    when no data is available yet, in which case responses are left uncached.
+    """
+
+    def __init__(self, app=None, version_source=None, cache_control='private, no-cache', exempt_endpoints=(), vary=()):
+        self.version_source = version_source
+        self.cache_control = cache_control
+        self.exempt_endpoints = set(exempt_endpoints)
+        # Request headers the version depends on, added to Vary
+        self.vary = tuple(vary)
+        self.not_modified_count = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the request hooks on a Flask app."""
+        app.before_request(self._check_validators)
+        app.after_request(self._add_validators)
+
+    def etag_for_request(self, version):
+        """
+        Derive the ETag of the current request's response.
+
+        Args:
+            version (str): Current data version
+
+        Returns:
+            str: Opaque entity tag
+        """
+        # Encoding is part of the representation for streamed responses that may be gzip-compressed
+        encoding = 'gzip' if 'gzip' in request.accept_encodings else 'identity'
+        key = '\n'.join([version, request.path, request.query_string.decode('utf-8', 'replace'), encoding])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+    def _is_cacheable(self):
+        """Only read requests to non-exempt endpoints are cached."""
+        return request.method in ('GET', 'HEAD') and request.endpoint is not None and request.endpoint not in self.exempt_endpoints
+
+    def _check_validators(self):
+        """Answer with 304 when the client's validators match the current data version."""
+        if not self._is_cacheable():
+            return None
+        current = self.version_source()
+        if current is None:
+            return None
+        version, last_modified = current
+        g.http_cache_validators = (self.etag_for_request(version), last_modified)
+
+        if self.is_not_modified(version, last_modified):
+            self.not_modified_count += 1
+            return current_app.response_class(status=304)
+        return None
+
+    def is_not_modified(self, version, last_modified):
+        """
+        Check the current request's validators against a data version.
+
+        Args:
+            version (str): Current data version
+            last_modified (datetime): Current last modified date
+
+        Returns:
+            bool: Whether the client's copy is still current
+        """
+        if not self._is_cacheable():
+            return False
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag_for_request(version))
+        if request.if_modified_since is not None:
+            return last_modified.replace(microsecond=0) <= request.if_modified_since
+        return False
+
+    def _add_validators(self, response):
+        """Attach ETag, Last-Modified and Cache-Control to cacheable responses."""
+        validators = g.pop('http_cache_validators', None)
+        if validators is None or response.status_code not in (200, 304):
+            return response
+        etag, last_modified = validators
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = self.cache_control
+        vary = {value.strip() for value in response.headers.get('Vary', '').split(',') if value.strip()}
+        vary.add('Accept-Encoding')
+        vary.update(self.vary)
+        response.headers['Vary'] = ', '.join(sorted(vary))
+        return response
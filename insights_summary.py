@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Insights Summary
+
+This module materializes the aggregates shown on the enriched insights page
+whenever enrichment runs: a subscription summary with one row per recurring
+merchant and frequency, plus spending breakdowns by type, subcategory,
+weekday, merchant and month. The summary is saved as JSON next to the enriched
+transactions, so the page reads a file whose size does not grow with the
+transaction history.
+
+Amounts follow the enriched sign convention: expenses are negative.
+"""
+
+import os
+import json
+import pandas as pd
+
+INSIGHTS_SUMMARY_FILE = 'data/insights_summary.json'
+
+# Payments per year for each recurring frequency assigned by identify_recurring_transactions
+FREQUENCY_PERIODS_PER_YEAR = {
+    'Weekly': 52,
+    'Bi-weekly': 26,
+    'Monthly': 12,
+    'Monthly (Probable)': 12,
+}
+
+# Spending types left out of the spending type chart
+EXCLUDED_SPENDING_TYPES = ['Credit Payment', 'Income/Refund', 'Transfer']
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def _native(value):
+    """Convert a pandas/NumPy scalar to a JSON-friendly Python value, mapping missing values to None."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def build_subscription_summary(enriched_df):
+    """
+    Summarize recurring transactions per merchant and frequency.
+
+    Args:
+        enriched_df (pd.DataFrame): Enriched transactions
+
+    Returns:
+        pd.DataFrame: merchant, frequency, amount (latest), category,
+            sub_category, last_date, count and annualized_cost, sorted by
+            annualized cost descending
+    """
+    recurring = enriched_df[enriched_df['is_recurring'].fillna(False).astype(bool) & enriched_df['recurring_frequency'].notna()]
+    recurring = recurring.assign(_date=pd.to_datetime(recurring['transaction_date']))
+    recurring = recurring.sort_values('_date', kind='stable')
+
+    groups = recurring.groupby(['merchant', 'recurring_frequency'], sort=False)
+    latest = groups.tail(1).set_index(['merchant', 'recurring_frequency'])
+    counts = groups.size()
+
+    summary = pd.DataFrame({
+        'amount': latest['amount'].abs(),
+        'category': latest['category'],
+        'sub_category': latest['subcategory'],
+        'last_date': latest['_date'].dt.strftime('%Y-%m-%d'),
+        'count': counts.reindex(latest.index),
+    }).reset_index().rename(columns={'recurring_frequency': 'frequency'})
+    summary['annualized_cost'] = summary['amount'] * summary['frequency'].map(FREQUENCY_PERIODS_PER_YEAR).fillna(0)
+    summary = summary.sort_values(['annualized_cost', 'amount'], ascending=False, kind='stable')
+    return summary[['merchant', 'frequency', 'amount', 'category', 'sub_category', 'last_date', 'count', 'annualized_cost']]
+
+def build_insights_summary(enriched_df):
+    """
+    Compute every aggregate of the enriched insights page.
+
+    Args:
+        enriched_df (pd.DataFrame): Enriched transactions
+
+    Returns:
+        dict: JSON-serializable page data
+    """
+    total_transactions = len(enriched_df)
+    dates = pd.to_datetime(enriched_df['transaction_date'])
+    expenses = enriched_df[enriched_df['amount'] < 0]
+    is_recurring = enriched_df['is_recurring'].fillna(False).astype(bool)
+
+    # Spending by type, as absolute amounts and transaction counts
+    spending_by_type = enriched_df.groupby('spending_type')['amount'].sum().abs()
+    spending_amounts = {str(k): float(v) for k, v in spending_by_type.items()}
+    spending_type_counts = {str(k): int(v) for k, v in enriched_df['spending_type'].value_counts().items()}
+    discretionary = spending_amounts.get('Discretionary', 0.0)
+    non_discretionary = spending_amounts.get('Non-discretionary', 0.0)
+    charted_types = spending_by_type[~spending_by_type.index.isin(EXCLUDED_SPENDING_TYPES)]
+
+    # Recurring transactions
+    recurring_count = int(is_recurring.sum())
+    recurring_total = abs(float(enriched_df.loc[is_recurring & (enriched_df['amount'] < 0), 'amount'].sum()))
+
+    # Top 10 subcategories and merchants by expenses
+    subcategory_spending = expenses.groupby('subcategory')['amount'].sum().sort_values().head(10)
+    merchant_spending = expenses.groupby('merchant')['amount'].sum().sort_values().head(10)
+
+    # Expenses by day of week and weekday vs weekend
+    expense_days = pd.to_datetime(expenses['transaction_date']).dt.day_name()
+    day_of_week_spending = expenses.groupby(expense_days)['amount'].sum().abs()
+    weekend = expense_days.isin(['Saturday', 'Sunday'])
+
+    # Monthly discretionary and non-discretionary expenses
+    months = pd.to_datetime(expenses['transaction_date']).dt.strftime('%Y-%m')
+    monthly = expenses.groupby([months, expenses['spending_type']])['amount'].sum().abs().unstack(fill_value=0.0)
+    monthly = monthly.reindex(columns=['Discretionary', 'Non-discretionary'], fill_value=0.0).sort_index()
+
+    subscriptions = build_subscription_summary(enriched_df)
+
+    return {
+        'total_transactions': total_transactions,
+        'date_range': {
+            'start': dates.min().strftime('%Y-%m-%d') if total_transactions else None,
+            'end': dates.max().strftime('%Y-%m-%d') if total_transactions else None,
+        },
+        'spending_ratio': round(discretionary / non_discretionary, 2) if non_discretionary > 0 else 0,
+        'recurring_count': recurring_count,
+        'recurring_total': recurring_total,
+        'recurring_percentage': round(recurring_count / total_transactions * 100, 1) if total_transactions else 0,
+        'subscription_data': [
+            {key: _native(value) for key, value in record.items()}
+            for record in subscriptions.to_dict(orient='records')
+        ],
+        'spending_amounts': spending_amounts,
+        'spending_type_counts': spending_type_counts,
+        'spending_type_data': {
+            'labels': [str(label) for label in charted_types.index],
+            'values': charted_types.astype(float).tolist(),
+        },
+        'subcategory_data': {
+            'labels': [str(label) for label in subcategory_spending.index],
+            'values': subcategory_spending.abs().astype(float).tolist(),
+        },
+        'day_of_week_data': {
+            'labels': DAYS_OF_WEEK,
+            'values': [float(day_of_week_spending.get(day, 0.0)) for day in DAYS_OF_WEEK],
+        },
+        'weekday_spending': abs(float(expenses.loc[~weekend.to_numpy(), 'amount'].sum())),
+        'weekend_spending': abs(float(expenses.loc[weekend.to_numpy(), 'amount'].sum())),
+        'merchant_spending': {str(k): abs(float(v)) for k, v in merchant_spending.items()},
+        'monthly_data': {
+            'labels': monthly.index.tolist(),
+            'discretionary': monthly['Discretionary'].astype(float).tolist(),
+            'non_discretionary': monthly['Non-discretionary'].astype(float).tolist(),
+        },
+    }
+
+def save_insights_summary(summary, file_path=INSIGHTS_SUMMARY_FILE):
+    """Persist an insights summary as JSON, replacing any previous file atomically."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(summary, f)
+    os.replace(temp_path, file_path)
+
+def load_insights_summary(file_path=INSIGHTS_SUMMARY_FILE):
+    """Load a persisted insights summary."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Insights summary not found: {file_path}")
+    with open(file_path) as f:
+        return json.load(f)
+
+def materialize_insights_summary(enriched_df, file_path=INSIGHTS_SUMMARY_FILE):
+    """
+    Build the insights summary from enriched transactions and persist it.
+
+    Args:
+        enriched_df (pd.DataFrame): Enriched transactions
+        file_path (str): Where to save the summary
+
+    Returns:
+        dict: The summary
+    """
+    summary = build_insights_summary(enriched_df)
+    save_insights_summary(summary, file_path)
+    print(f"Summarized {len(summary['subscription_data'])} subscriptions from {summary['total_transactions']} transactions")
+    return summary
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Merchant Index
+
+This module groups a snapshot's charges by merchant once, so a merchant's
+deep dive reads only that merchant's rows. Row positions and dates of the
+charges are stored ordered by merchant, each merchant's being one contiguous
+slice in snapshot order, next to statistics computed for every merchant in
+the same pass: totals, counts, refunded counts, largest and smallest
+charges, first and last dates, and spending per month.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Integer value of NaT in datetime64 arrays
+NAT = np.iinfo(np.int64).min
+
+def _day_label(value):
+    """YYYY-MM-DD of a datetime64[ns] integer; None for NaT."""
+    return None if value == NAT else str(np.datetime64(int(value), 'ns').astype('datetime64[D]'))
+
+class MerchantIndex:
+    """
+    Charge row positions and all-time statistics per merchant.
+    """
+
+    def __init__(self, df):
+        is_charge = df['transaction_type'].str.lower().eq('charge').to_numpy() & df['merchant'].notna().to_numpy()
+        positions = np.flatnonzero(is_charge)
+        codes, names = pd.factorize(df['merchant'].to_numpy()[positions])
+        self.codes = {name: code for code, name in enumerate(names.tolist())}
+
+        # Stable sort keeps each merchant's rows in snapshot order
+        order = np.argsort(codes, kind='stable')
+        self.positions = positions[order]
+        counts = np.bincount(codes, minlength=len(names))
+        self.bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        amounts = df['amount'].to_numpy(dtype=float)[self.positions]
+        dates = pd.to_datetime(df['transaction_date'].iloc[self.positions]).to_numpy(dtype='datetime64[ns]')
+        self.dates = dates
+        if 'refund_status' in df.columns:
+            refunded = (df['refund_status'].to_numpy()[self.positions] == 'refunded').astype(np.int64)
+        else:
+            refunded = np.zeros(len(self.positions), dtype=np.int64)
+
+        present = counts > 0
+        starts = self.bounds[:-1][present]
+        self.counts = counts
+        self.totals = np.zeros(len(names))
+        self.refunded_counts = np.zeros(len(names), dtype=np.int64)
+        self.largest = np.full(len(names), np.nan)
+        self.smallest = np.full(len(names), np.nan)
+        # First and last dates as datetime64[ns] integers, where the smallest integer is NaT
+        self.first_dates = np.full(len(names), NAT, dtype=np.int64)
+        self.last_dates = np.full(len(names), NAT, dtype=np.int64)
+        if len(starts):
+            self.totals[present] = np.add.reduceat(amounts, starts)
+            self.refunded_counts[present] = np.add.reduceat(refunded, starts)
+            self.largest[present] = np.maximum.reduceat(amounts, starts)
+            self.smallest[present] = np.minimum.reduceat(amounts, starts)
+            date_values = dates.view(np.int64)
+            first = np.minimum.reduceat(np.where(date_values == NAT, np.iinfo(np.int64).max, date_values), starts)
+            self.first_dates[present] = np.where(first == np.iinfo(np.int64).max, NAT, first)
+            self.last_dates[present] = np.maximum.reduceat(date_values, starts)
+
+        # Spending per (merchant, month), ordered by merchant then month
+        months = pd.Series(dates).dt.to_period('M')
+        monthly = pd.Series(amounts).groupby([np.repeat(np.arange(len(names)), counts), months]).sum()
+        self.monthly_codes = monthly.index.get_level_values(0).to_numpy()
+        self.monthly_labels = np.asarray(monthly.index.get_level_values(1).strftime('%Y-%m'), dtype=object)
+        self.monthly_totals = monthly.to_numpy()
+
+    def rows(self, merchant, start_date=None, end_date=None):
+        """
+        Row positions of a merchant's charges, reading only that merchant's dates.
+
+        Args:
+            merchant (str): Merchant name
+            start_date (str): Earliest transaction date, inclusive
+            end_date (str): Latest transaction date, inclusive
+
+        Returns:
+            np.ndarray: Positions in snapshot order; empty for unknown merchants
+        """
+        code = self.codes.get(merchant)
+        if code is None:
+            return self.positions[:0]
+        start, end = self.bounds[code], self.bounds[code + 1]
+        rows = self.positions[start:end]
+        if start_date or end_date:
+            dates = self.dates[start:end]
+            in_range = np.ones(len(rows), dtype=bool)
+            if start_date:
+                in_range &= dates >= np.datetime64(pd.Timestamp(start_date))
+            if end_date:
+                in_range &= dates <= np.datetime64(pd.Timestamp(end_date))
+            rows = rows[in_range]
+        return rows
+
+    def stats(self, merchant):
+        """
+        All-time statistics of a merchant's charges.
+
+        Args:
+            merchant (str): Merchant name
+
+        Returns:
+            dict: total_spent, transaction_count, refunded_count, average_amount,
+                largest_transaction, smallest_transaction, first_transaction and
+                last_transaction (YYYY-MM-DD, None when undated) and monthly
+                (labels and totals per month with charges); None for unknown merchants
+        """
+        code = self.codes.get(merchant)
+        if code is None:
+            return None
+        count = int(self.counts[code])
+        start, end = np.searchsorted(self.monthly_codes, [code, code + 1])
+        return {
+            'total_spent': float(self.totals[code]),
+            'transaction_count': count,
+            'refunded_count': int(self.refunded_counts[code]),
+            'average_amount': float(self.totals[code]) / count,
+            'largest_transaction': float(self.largest[code]),
+            'smallest_transaction': float(self.smallest[code]),
+            'first_transaction': _day_label(self.first_dates[code]),
+            'last_transaction': _day_label(self.last_dates[code]),
+            'monthly': {
+                'labels': self.monthly_labels[start:end].tolist(),
+                'totals': self.monthly_totals[start:end].tolist(),
+            },
+        }
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Merchant Resolution
+
+This module clusters near-duplicate transaction descriptions into canonical
+merchants. Normalized descriptions are reduced to merchant keys, without
+store words, domain endings and state suffixes, and a city before a state
+code is resolved to the merchant name it shares with other descriptions.
+Merchant keys are sketched with MinHash signatures over character n-grams
+and grouped with locality-sensitive hashing (LSH), so clustering stays
+sub-quadratic in the number of distinct descriptions. The
+resulting description -> merchant mapping is persisted so later loads resolve
+merchants with dictionary lookups.
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import numpy as np
+import pandas as pd
+from offline_transaction_enrichment import normalize_description
+
+MERCHANT_INDEX_FILE = 'data/merchant_index.json'
+UNKNOWN_MERCHANT_ID = 'm_unknown'
+UNKNOWN_MERCHANT = 'Unknown'
+
+# 64 MinHash permutations split into 32 bands of 2 rows make pairs above ~0.2
+# Jaccard similarity likely to share a bucket; candidate links are then kept
+# only when the full signatures agree on at least SIMILARITY_THRESHOLD
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 32
+NGRAM_SIZE = 3
+SIMILARITY_THRESHOLD = 0.7
+
+# Two-letter state codes that end location suffixes such as "oakland ca"
+US_STATES = frozenset(
+    'al ak az ar ca co ct dc de fl ga hi ia id il in ks ky la ma md me mi mn mo ms mt nc nd ne '
+    'nh nj nm nv ny oh ok or pa pr ri sc sd tn tx ut va vt wa wi wv wy'.split()
+)
+COUNTRY_TOKENS = frozenset(['us', 'usa'])
+# Words naming the channel, store or legal form rather than the merchant
+GENERIC_TOKENS = frozenset([
+    'store', 'stores', 'str', 'whse', 'mktp', 'mktpl', 'mktplace', 'marketplace',
+    'inc', 'llc', 'ltd', 'corp', 'pos', 'purchase', 'debit',
+])
+# Abbreviations card networks print for merchants
+MERCHANT_ALIASES = {'amzn': 'amazon'}
+_MERSENNE_PRIME = (1 << 31) - 1
+
+def _shingle_hashes(text, ngram_size=NGRAM_SIZE):
+    """Return the stable 31-bit hashes of a string's character n-grams."""
+    padded = f" {text} "
+    if len(padded) <= ngram_size:
+        grams = {padded}
+    else:
+        grams = {padded[i:i + ngram_size] for i in range(len(padded) - ngram_size + 1)}
+    return [zlib.crc32(gram.encode('utf-8')) & _MERSENNE_PRIME for gram in grams]
+
+def _merchant_tokens(normalized):
+    """
+    Split a normalized description into the tokens naming its merchant.
+
+    Returns:
+        tuple: (tokens, located) where located means a trailing state code was
+            dropped, so the last tokens are probably a city
+    """
+    text = re.sub(r'\.(com|net|org)\b', ' ', normalized)
+    tokens = [MERCHANT_ALIASES.get(token, token) for token in re.split(r'[\s./]+', text) if token]
+    tokens = [token for token in tokens if token not in GENERIC_TOKENS] or tokens
+    while len(tokens) > 1 and tokens[-1] in COUNTRY_TOKENS:
+        tokens.pop()
+    # Merchant, city and state need at least three tokens
+    located = len(tokens) >= 3 and tokens[-1] in US_STATES
+    if located:
+        tokens.pop()
+    return tokens, located
+
+def merchant_key(normalized):
+    """
+    Reduce a normalized description to the part naming the merchant.
+
+    Drops web domain endings, store and channel words and trailing country and
+    state codes, and expands abbreviations such as amzn, so "amzn mktp us" and
+    "amazon.com" share the key "amazon". A city before a state code is kept;
+    MerchantIndex.build resolves it against the other descriptions.
+
+    Args:
+        normalized (str): Output of normalize_description
+
+    Returns:
+        str: Merchant key
+    """
+    return ' '.join(_merchant_tokens(normalized)[0])
+
+def _location_prefixes(tokens):
+    """Merchant name candidates of a located key, longest first, each leaving at least one city token."""
+    return [' '.join(tokens[:end]) for end in range(len(tokens) - 1, 0, -1)]
+
+def merchant_keys(normalized_descriptions):
+    """
+    Merchant keys of normalized descriptions, with city suffixes resolved.
+
+    A located description such as "safeway san francisco ca" takes the longest
+    prefix of its merchant tokens that is the key of an unlocated description
+    ("safeway", from "safeway store"), or else the longest prefix it shares
+    with another located description ("safeway", from "safeway oakland ca").
+    Located descriptions matching neither keep their city.
+
+    Args:
+        normalized_descriptions (list): Outputs of normalize_description
+
+    Returns:
+        list: Merchant key of each description
+    """
+    split = [_merchant_tokens(normalized) for normalized in normalized_descriptions]
+    plain_keys = {' '.join(tokens) for tokens, located in split if not located}
+    located_keys = {' '.join(tokens): tokens for tokens, located in split if located}
+    prefix_counts = {}
+    for tokens in located_keys.values():
+        for prefix in _location_prefixes(tokens):
+            prefix_counts[prefix] = prefix_counts.get(prefix, 0) + 1
+
+    keys = []
+    for tokens, located in split:
+        key = ' '.join(tokens)
+        if located:
+            prefixes = _location_prefixes(tokens)
+            key = next((prefix for prefix in prefixes if prefix in plain_keys), None) or \
+                next((prefix for prefix in prefixes if prefix_counts[prefix] > 1), key)
+        keys.append(key)
+    return keys
+
+def minhash_signatures(texts, num_permutations=NUM_PERMUTATIONS, seed=1, chunk_size=5000, permutation_block=8):
+    """
+    Compute MinHash signatures over character n-grams.
+
+    Texts are hashed in chunks and permutations in blocks, so the temporary
+    array of permuted hashes holds one chunk's shingles times one block of
+    permutations, a few megabytes with the defaults, rather than every
+    permutation at once.
+
+    Args:
+        texts (list): Normalized descriptions
+        num_permutations (int): Signature length
+        seed (int): Seed for the hash permutations
+        chunk_size (int): Texts processed per vectorized chunk
+        permutation_block (int): Permutations applied per vectorized step
+
+    Returns:
+        np.ndarray: uint64 array of shape (len(texts), num_permutations)
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_permutations), dtype=np.uint64)
+    for start in range(0, len(texts), chunk_size):
+        shingles = [_shingle_hashes(text) for text in texts[start:start + chunk_size]]
+        lengths = np.fromiter((len(s) for s in shingles), dtype=np.int64, count=len(shingles))
+        hashes = np.fromiter((h for s in shingles for h in s), dtype=np.uint64, count=int(lengths.sum()))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        for first in range(0, num_permutations, permutation_block):
+            block = slice(first, first + permutation_block)
+            # Both factors are below 2**31, so the products fit in uint64
+            permuted = (hashes[:, None] * a[None, block] + b[None, block]) % _MERSENNE_PRIME
+            signatures[start:start + len(shingles), block] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+def lsh_clusters(signatures, num_bands=NUM_BANDS, threshold=SIMILARITY_THRESHOLD):
+    """
+    Group signatures into clusters of near-duplicates.
+
+    Each band hashes its slice of every signature into buckets. Within a bucket,
+    each member is linked to the previous one when their estimated Jaccard
+    similarity clears the threshold, so work grows with bucket sizes rather than
+    with the number of pairs, and a dissimilar member does not keep the others
+    apart as a shared hub would. Connected components of those links are the
+    clusters.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures
+        num_bands (int): Number of LSH bands
+        threshold (float): Minimum estimated similarity for a link
+
+    Returns:
+        np.ndarray: Cluster label for each signature
+    """
+    count, num_permutations = signatures.shape
+    rows_per_band = num_permutations // num_bands
+
+    sources, targets = [], []
+    for band in range(num_bands):
+        band_values = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        band_keys = band_values.view(np.dtype((np.void, band_values.dtype.itemsize * rows_per_band))).ravel()
+        _, bucket = np.unique(band_keys, return_inverse=True)
+        bucket = bucket.ravel()
+
+        # Neighbours in bucket order are the candidate pairs
+        order = np.argsort(bucket, kind='stable')
+        same_bucket = np.flatnonzero(bucket[order[1:]] == bucket[order[:-1]])
+        if len(same_bucket) == 0:
+            continue
+        previous, current = order[same_bucket], order[same_bucket + 1]
+        similarity = (signatures[current] == signatures[previous]).mean(axis=1)
+        linked = similarity >= threshold
+        sources.append(current[linked])
+        targets.append(previous[linked])
+
+    labels = np.arange(count)
+    if not sources:
+        return labels
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+
+    # Connected components by min-label propagation with pointer jumping
+    while True:
+        previous = labels.copy()
+        linked_min = np.minimum(labels[sources], labels[targets])
+        np.minimum.at(labels, sources, linked_min)
+        np.minimum.at(labels, targets, linked_min)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+def merchant_id_for(name):
+    """Derive a stable merchant ID from a canonical merchant key."""
+    return 'm_' + hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]
+
+class MerchantIndex:
+    """
+    Persisted mapping from normalized descriptions to canonical merchants.
+    """
+
+    def __init__(self, descriptions, merchants):
+        self.descriptions = descriptions  # normalized description or merchant key -> merchant ID
+        self.merchants = merchants  # merchant ID -> display name
+
+    @classmethod
+    def build(cls, descriptions, name_function=None):
+        """
+        Cluster transaction descriptions into canonical merchants.
+
+        Args:
+            descriptions (iterable): Raw transaction descriptions
+            name_function (callable): Maps the most frequent raw description of a
+                cluster to its display name. Defaults to title-casing the
+                normalized description.
+
+        Returns:
+            MerchantIndex: Index covering every description
+        """
+        raw_counts = pd.Series(descriptions, dtype=object).dropna().value_counts()
+        frame = pd.DataFrame({
+            'raw': raw_counts.index,
+            'count': raw_counts.to_numpy(),
+            'normalized': [normalize_description(raw) for raw in raw_counts.index],
+        })
+        frame = frame[frame['normalized'] != '']
+        if frame.empty:
+            return cls({}, {})
+
+        frame['key'] = merchant_keys(frame['normalized'].tolist())
+        keys = frame.groupby('key', sort=False)['count'].sum()
+        labels = lsh_clusters(minhash_signatures(keys.index.tolist()))
+        cluster_of = pd.Series(labels, index=keys.index)
+        frame['cluster'] = frame['key'].map(cluster_of)
+
+        # The most frequent member names the cluster; value_counts order makes it the first row
+        canonical = frame.drop_duplicates('cluster').set_index('cluster')
+        merchant_ids = {cluster: merchant_id_for(row['key']) for cluster, row in canonical.iterrows()}
+        if name_function is None:
+            merchants = {merchant_ids[cluster]: row['key'].title() for cluster, row in canonical.iterrows()}
+        else:
+            merchants = {merchant_ids[cluster]: name_function(row['raw']) for cluster, row in canonical.iterrows()}
+
+        mapping = dict(zip(frame['normalized'], frame['cluster'].map(merchant_ids)))
+        # Keys let resolve place new descriptions of known merchants
+        for key, cluster in cluster_of.items():
+            mapping.setdefault(key, merchant_ids[cluster])
+        return cls(mapping, merchants)
+
+    def resolve(self, descriptions):
+        """
+        Resolve raw descriptions to merchants with one lookup per distinct description.
+        Descriptions missing from the index join the merchant of their merchant
+        key, or of a known merchant prefix before their city, and otherwise
+        become their own merchant.
+
+        Args:
+            descriptions (pd.Series): Raw transaction descriptions
+
+        Returns:
+            pd.DataFrame: merchant_id and merchant columns aligned with the input
+        """
+        codes, uniques = pd.factorize(descriptions)
+        merchant_ids = []
+        names = []
+        for raw in uniques:
+            normalized = normalize_description(raw)
+            if not normalized:
+                merchant_ids.append(UNKNOWN_MERCHANT_ID)
+                names.append(UNKNOWN_MERCHANT)
+                continue
+            merchant_id = self.descriptions.get(normalized)
+            if merchant_id is None:
+                tokens, located = _merchant_tokens(normalized)
+                key = ' '.join(tokens)
+                candidates = [key] + (_location_prefixes(tokens) if located else [])
+                merchant_id = next((self.descriptions[c] for c in candidates if c in self.descriptions), None)
+                if merchant_id is None:
+                    merchant_id = merchant_id_for(key)
+                    self.descriptions[key] = merchant_id
+                    self.merchants[merchant_id] = key.title()
+                self.descriptions[normalized] = merchant_id
+            merchant_ids.append(merchant_id)
+            names.append(self.merchants[merchant_id])
+
+        # Missing descriptions are factorized to -1, which maps to the trailing Unknown entry
+        merchant_ids = np.array(merchant_ids + [UNKNOWN_MERCHANT_ID], dtype=object)
+        names = np.array(names + [UNKNOWN_MERCHANT], dtype=object)
+        return pd.DataFrame({'merchant_id': merchant_ids[codes], 'merchant': names[codes]}, index=descriptions.index)
+
+    def save(self, file_path=MERCHANT_INDEX_FILE):
+        """Persist the index as JSON, replacing any previous file atomically."""
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'descriptions': self.descriptions, 'merchants': self.merchants}, f)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path=MERCHANT_INDEX_FILE):
+        """Load a persisted index."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Merchant index not found: {file_path}")
+        with open(file_path) as f:
+            data = json.load(f)
+        return cls(data['descriptions'], data['merchants'])
+
+    def __len__(self):
+        return len(self.merchants)
+
+def build_merchant_index(descriptions, name_function=None, file_path=MERCHANT_INDEX_FILE):
+    """
+    Build the merchant index from transaction descriptions and persist it.
+
+    Args:
+        descriptions (iterable): Raw transaction descriptions
+        name_function (callable): Display name function, see MerchantIndex.build
+        file_path (str): Where to save the index, or None to skip saving
+
+    Returns:
+        MerchantIndex: The built index
+    """
+    merchant_index = MerchantIndex.build(descriptions, name_function=name_function)
+    if file_path:
+        merchant_index.save(file_path)
+    print(f"Resolved {len(merchant_index.descriptions)} distinct descriptions into {len(merchant_index)} merchants")
+    return merchant_index
+
+def load_merchant_index(file_path=MERCHANT_INDEX_FILE):
+    """
+    Load the persisted merchant index, or an empty index if none exists yet.
+
+    Args:
+        file_path (str): Path of the saved index
+
+    Returns:
+        MerchantIndex: Loaded index
+    """
+    if not os.path.exists(file_path):
+        return MerchantIndex({}, {})
+    return MerchantIndex.load(file_path)
@@ -12,6 +12,7 @@ import re
 from datetime import datetime
 import enum
 import numpy as np
+from pipeline_instrumentation import PipelineProfiler, disabled_profiler
 
 class EnrichedCategory(enum.Enum):
     ACCOMODATION = 'Accomodation'
@@ -46,6 +47,23 @@ def load_transactions(file_path='data/my_consolidated_transactions.csv'):
     
     return pd.read_csv(file_path, parse_dates=['transaction_date', 'post_date'])
 
+def normalize_description(description):
+    """
+    Normalize a transaction description for deduplication.
+    Lower-cases the text, drops payment processor prefixes, reference numbers and
+    punctuation, and collapses whitespace so variants of the same merchant string
+    share one key.
+    """
+    if description is None or pd.isna(description):
+        return ''
+    normalized = str(description).lower()
+    normalized = re.sub(r'^(sq|tst|dd|pp|paypal|amex)\s*\*\s*', '', normalized)
+    normalized = re.sub(r'[#*]', ' ', normalized)
+    normalized = re.sub(r'\b\d{1,2}[/-]\d{1,2}([/-]\d{2,4})?\b', ' ', normalized)
+    normalized = re.sub(r'\b[a-z]*\d[a-z\d]*\b', ' ', normalized)
+    normalized = re.sub(r'[^a-z0-9&./ ]', ' ', normalized)
+    return re.sub(r'\s+', ' ', normalized).strip()
+
 def enrich_amount(row):
     """
     Enrich the amount of the transaction.
@@ -111,7 +129,6 @@ def enrich_category(row, transaction_type):
     """
     Enrich the category of the transaction.
     """
-    print('--------------------------------')
     category_source = row.get('category', 'undefined')
     # Coalesce the category source with 'Undefined' if it is None
     if category_source is None or pd.isna(category_source):
@@ -123,7 +140,6 @@ def enrich_category(row, transaction_type):
     if description_source is None or pd.isna(description_source):
         description_source = 'undefined'
     description_source = description_source.lower()
-    print(description_source)
     if transaction_type == 'Income':
         return EnrichedCategory.INCOME.value
     elif transaction_type == 'Transfer':
@@ -200,7 +216,117 @@ def process_transaction(row):
     merchant = enrich_merchant(row) # Process with LLM in downstream process
     return pd.Series([amount_enriched, transaction_type, category_enriched, subcategory_enriched, merchant])
 
-def enrich_transactions(df):
+def _lower_text_column(df, column):
+    """
+    Lower-case a text column, coalescing missing values with 'undefined'.
+    """
+    if column not in df.columns:
+        return pd.Series('undefined', index=df.index)
+    return df[column].fillna('undefined').astype(str).str.lower()
+
+def enrich_amount_column(df):
+    """
+    Enrich the amount of all transactions.
+    Column-wise equivalent of enrich_amount.
+    """
+    return df['amount'].where(df['source'] != 'Amex', df['amount'] * -1)
+
+def is_transfer_column(df):
+    """
+    Determine which transactions are transfers.
+    Column-wise equivalent of is_transfer.
+    """
+    description = _lower_text_column(df, 'description')
+
+    sofi_transfer = (df['source'] == 'SoFi') & (
+        description.str.startswith('wells fargo bank') | # Transfers from SoFi to Wells Fargo
+        (description.str.startswith('to') & description.str.endswith('vault')) # Transfers from SoFi to SoFi Vault
+    )
+    wells_fargo_transfer = (df['source'] == 'WellsFargo') & (
+        description.str.startswith('sofi bank transfer') | # Transfers from SoFi to Wells Fargo
+        description.str.startswith('online transfer to') # Internal transfers from Wells Fargo to Wells Fargo
+    )
+    return sofi_transfer | wells_fargo_transfer
+
+def enrich_transaction_type_column(df, amount_enriched):
+    """
+    Enrich all transactions with the transaction type.
+    Column-wise equivalent of enrich_transaction_type.
+    """
+    credit_card = df['account_type'] == 'Credit Card'
+    checkings = df['account_type'] == 'Checkings'
+    charge = amount_enriched < 0
+    credit = amount_enriched > 0
+    description_payment = _lower_text_column(df, 'description').str.contains('payment', regex=False)
+    category_payment = _lower_text_column(df, 'category').str.contains('payment', regex=False)
+
+    conditions = [
+        credit_card & charge,
+        credit_card & credit & description_payment,
+        credit_card & credit,
+        credit_card,
+        checkings & is_transfer_column(df),
+        checkings & charge & (description_payment | category_payment),
+        checkings & charge,
+        checkings & credit,
+    ]
+    choices = ['Charge', 'Payment', 'Refund', 'Undefined', 'Transfer', 'Payment', 'Charge', 'Income']
+    return pd.Series(np.select(conditions, choices, default='Undefined'), index=df.index, dtype=object)
+
+def enrich_category_column(df, transaction_type):
+    """
+    Enrich the category of all transactions.
+    Column-wise equivalent of enrich_category, with conditions in the same priority order.
+    """
+    category_source = _lower_text_column(df, 'category')
+    description_source = _lower_text_column(df, 'description')
+
+    def category_contains(keyword):
+        return category_source.str.contains(keyword, regex=False)
+
+    def description_contains(keyword):
+        return description_source.str.contains(keyword, regex=False)
+
+    rules = [
+        (transaction_type == 'Income', EnrichedCategory.INCOME),
+        (transaction_type == 'Transfer', EnrichedCategory.TRANSFER),
+        (transaction_type == 'Payment', EnrichedCategory.PAYMENT),
+        (category_contains('restaurant'), EnrichedCategory.FOOD),
+        (category_source == 'groceries', EnrichedCategory.FOOD),
+        (category_contains('food'), EnrichedCategory.FOOD),
+        (category_contains('health'), EnrichedCategory.HEALTH),
+        (category_contains('utilities'), EnrichedCategory.UTILITIES),
+        (category_source == 'transportation', EnrichedCategory.TRANSPORTATION),
+        (category_contains('entertainment'), EnrichedCategory.ENTERTAINMENT),
+        (description_contains('rent pmt'), EnrichedCategory.ACCOMODATION),
+        (description_contains('amazon'), EnrichedCategory.SHOPPING),
+        (description_contains('target'), EnrichedCategory.FOOD),
+        (description_contains('costco'), EnrichedCategory.FOOD),
+        (description_contains('apple.com/bill'), EnrichedCategory.UTILITIES),
+        (description_contains('openai'), EnrichedCategory.UTILITIES),
+        (description_contains('cursor'), EnrichedCategory.UTILITIES),
+        (description_contains('uber eats'), EnrichedCategory.FOOD),
+        (description_source.str.startswith('lyft'), EnrichedCategory.TRANSPORTATION),
+        (description_source.str.startswith('uber'), EnrichedCategory.TRANSPORTATION),
+        (category_contains('shopping'), EnrichedCategory.SHOPPING),
+        (category_contains('education'), EnrichedCategory.EDUCATION),
+        (category_contains('communications'), EnrichedCategory.UTILITIES),
+        (category_source == 'travel', EnrichedCategory.TRAVEL),
+    ]
+    conditions = [condition for condition, _ in rules]
+    choices = [category.value for _, category in rules]
+    return pd.Series(np.select(conditions, choices, default=EnrichedCategory.UNDEFINED.value), index=df.index, dtype=object)
+
+def enrich_transactions_rowwise(df):
+    """
+    Row-wise reference implementation of enrich_transactions.
+    Kept to check the column-wise implementation for parity.
+    """
+    enriched_df = df.copy()
+    enriched_df[['amount_enriched', 'transaction_type', 'category_enriched', 'subcategory_enriched', 'merchant']] = enriched_df.apply(process_transaction, axis=1)
+    return enriched_df
+
+def enrich_transactions(df, merchant_index=None, profiler=None):
     """
     Enrich the transaction data with sub-categories and additional analysis fields.
     This function generates offline enrichment of the transaction data.
@@ -209,6 +335,9 @@ def enrich_transactions(df):
 
     Args:
         df (pd.DataFrame): DataFrame containing transaction data
+        merchant_index (MerchantIndex): Optional merchant resolution index. When provided,
+            merchant and merchant_id are resolved from it instead of left undefined.
+        profiler (PipelineProfiler): Optional profiler recording each enrichment stage
 
     Returns:
         pd.DataFrame: DataFrame containing enriched transaction data
@@ -243,13 +372,36 @@ def enrich_transactions(df):
                 The enriched subcategory of the transaction
             - merchant: str
                 The enriched merchant of the transaction
+            - merchant_id: str
+                The resolved merchant ID, only present when a merchant index is provided
     """
     
-    # Extract existing fields
-    enriched_df = df.copy()
-    
-    # Enrich fields
-    enriched_df[['amount_enriched', 'transaction_type', 'category_enriched', 'subcategory_enriched', 'merchant']] = enriched_df.apply(process_transaction, axis=1)
+    if profiler is None:
+        profiler = disabled_profiler()
+
+    with profiler.stage('enrich_transactions', rows_in=len(df)):
+        # Extract existing fields
+        enriched_df = df.copy()
+        
+        # Enrich fields column-wise
+        with profiler.stage('enrich_amount', rows_in=len(enriched_df)):
+            amount_enriched = enrich_amount_column(enriched_df)
+        with profiler.stage('enrich_transaction_type', rows_in=len(enriched_df)):
+            transaction_type = enrich_transaction_type_column(enriched_df, amount_enriched)
+        with profiler.stage('enrich_category', rows_in=len(enriched_df)):
+            category_enriched = enrich_category_column(enriched_df, transaction_type)
+
+        enriched_df['amount_enriched'] = amount_enriched
+        enriched_df['transaction_type'] = transaction_type
+        enriched_df['category_enriched'] = category_enriched
+        enriched_df['subcategory_enriched'] = EnrichedCategory.UNDEFINED.value # Process with LLM in downstream process
+        if merchant_index is None:
+            enriched_df['merchant'] = EnrichedCategory.UNDEFINED.value # Process with LLM in downstream process
+        else:
+            with profiler.stage('resolve_merchants', rows_in=len(enriched_df)):
+                resolved = merchant_index.resolve(enriched_df['description'])
+                enriched_df['merchant'] = resolved['merchant']
+                enriched_df['merchant_id'] = resolved['merchant_id']
 
     return enriched_df
 
@@ -258,15 +410,33 @@ def main():
     """
     Main function to run the transaction enrichment process.
     """
-    print("Loading transactions...")
-    transactions_df = load_transactions(file_path='data/consolidated_transactions.csv')
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    with PipelineProfiler('offline_transaction_enrichment') as profiler:
+        print("Loading transactions...")
+        with profiler.stage('load_transactions') as stage:
+            transactions_df = load_transactions(file_path='data/consolidated_transactions.csv')
+            stage.rows_out = len(transactions_df)
+    
+        # Imported here because merchant_resolution builds on normalize_description from this module
+        from merchant_resolution import load_merchant_index
+        merchant_index = load_merchant_index()
+    
+        print(f"Enriching {len(transactions_df)} transactions...")
+        enriched_df = enrich_transactions(
+            transactions_df,
+            merchant_index=merchant_index if len(merchant_index) else None,
+            profiler=profiler
+        )
     
-    print(f"Enriching {len(transactions_df)} transactions...")
-    enriched_df = enrich_transactions(transactions_df)
+        # Save enriched transactions to a new file
+        with profiler.stage('save_enriched_transactions', rows_in=len(enriched_df)):
+            enriched_df.to_csv('data/my_consolidated_transactions_enriched.csv', index=False)
+        print("Saved enriched transactions to data/my_consolidated_transactions_enriched.csv")
     
-    # Save enriched transactions to a new file
-    enriched_df.to_csv('data/my_consolidated_transactions_enriched.csv', index=False)
-    print("Saved enriched transactions to data/my_consolidated_transactions_enriched.csv")
+        profiler.print_summary()
+        print(f"Saved pipeline report to {profiler.save_report()}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Page Model Cache
+
+This module provides a bounded, memory-budgeted LRU cache for the view models
+the web app computes from a data snapshot and request parameters. Entries are
+keyed by data version, so a data swap invalidates the cache automatically.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+def estimate_size(obj, seen=None):
+    """
+    Estimate the memory held by a view model or index.
+
+    Args:
+        obj: Object to measure; containers and object attributes are walked recursively
+        seen (set): IDs of objects already counted
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(obj, np.ndarray):
+        # Includes the data buffer of arrays that own it, not of views
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    # Copied first since indexes may add entries while they are measured
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, seen) + estimate_size(value, seen) for key, value in list(obj.items()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in list(obj))
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+class PageModelCache:
+    """
+    LRU cache of computed page models with a memory budget.
+
+    All entries belong to one data version. The first request for a newer
+    version drops every older entry.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=512):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()  # key -> (model, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, version, key, compute):
+        """
+        Return the cached model for a key, computing and storing it on a miss.
+
+        Args:
+            version (str): Current data version
+            key (tuple): Hashable page name and normalized parameters
+            compute (callable): Builds the model when it is not cached
+
+        Returns:
+            The page model
+        """
+        with self._lock:
+            if version != self.version:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.total_bytes = 0
+                self.version = version
+
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Build outside the lock so slow pages do not block cache hits
+        model = compute()
+        size = estimate_size(model)
+
+        with self._lock:
+            # Skip storing if the data changed while computing or the model alone exceeds the budget
+            if version != self.version or size > self.max_bytes:
+                return model
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self.entries[key] = (model, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes or len(self.entries) > self.max_entries:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return model
+
+    def contains(self, version, key):
+        """Whether a model for the key is cached for this data version, without touching counters or order."""
+        with self._lock:
+            return version == self.version and key in self.entries
+
+    def clear(self):
+        """Drop every cached model."""
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, invalidations, entries, bytes and max_bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+            }
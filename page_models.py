@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Page Models
+
+This module computes the template context of the web app's analysis pages from
+a transaction snapshot and the page's normalized request parameters. Each
+builder is a pure function of its inputs, which lets the app cache the result
+per data version. Builders return the template to render with its context.
+Filters go through TransactionQuery, so predicate masks are shared across
+pages built from the same snapshot.
+"""
+
+import datetime
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from serializers import serialize_transactions, summarize_groups, serialize_summary
+from transaction_query import TransactionQuery
+
+def default_date_range(today):
+    """
+    Default page date range: the previous calendar month.
+
+    Args:
+        today (datetime.date): Current date
+
+    Returns:
+        tuple: (start_date, end_date) as YYYY-MM-DD strings
+    """
+    first_day_prev_month = (today.replace(day=1) - relativedelta(months=1))
+    last_day_prev_month = today.replace(day=1) - datetime.timedelta(days=1)
+    return first_day_prev_month.strftime('%Y-%m-%d'), last_day_prev_month.strftime('%Y-%m-%d')
+
+def date_filter_context(start_date, end_date):
+    """Date range information for templates."""
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'date_range': f"{start_date} to {end_date}"
+    }
+
+def rolling_spending(snapshot, dimension, values=None):
+    """
+    Rolling and month-to-date spending of a dimension, see RollingMetrics.summary().
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        dimension (str): 'category', 'merchant' or 'account'
+        values (list): Values to report; by default every value with charges
+            in the longest window, largest spending first
+
+    Returns:
+        list: One record per value
+    """
+    records = snapshot.rolling_metrics().summary(dimension, values=values)
+    if values is None:
+        records = [record for record in records if record['windows'][-1]['count']]
+        records.sort(key=lambda record: record['windows'][-1]['total'], reverse=True)
+    return records
+
+def build_index_model(snapshot, start_date, end_date):
+    """
+    Build the dashboard model.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        start_date (str): Start of the date range
+        end_date (str): End of the date range
+
+    Returns:
+        tuple: (template name, context)
+    """
+    charges = TransactionQuery(start_date, end_date, transaction_type='charge').apply(snapshot)
+    refunds = TransactionQuery(start_date, end_date, transaction_type='refund').apply(snapshot)
+    payments = TransactionQuery(start_date, end_date, transaction_type='payment').apply(snapshot)
+
+    # Get counts by transaction type
+    txn_counts = {
+        'charges': charges.shape[0],
+        'payments': payments.shape[0],
+        'refunds': refunds.shape[0]
+    }
+
+    # Get financial summary
+    total_spent = charges['amount'].sum()
+    total_refunded = refunds['amount'].abs().sum()
+    total_paid = payments['amount'].abs().sum()
+
+    # Get top 5 categories
+    top_categories = charges.groupby('category', observed=True)['amount'].sum().sort_values(ascending=False).head(5).to_dict()
+
+    as_of = snapshot.rolling_metrics().as_of_date()
+
+    date_filter = date_filter_context(start_date, end_date)
+    return 'index.html', {
+        'txn_counts': txn_counts,
+        'total_spent': total_spent,
+        'total_refunded': total_refunded,
+        'total_paid': total_paid,
+        'net_spending': total_spent - total_refunded,
+        'top_categories': top_categories,
+        'rolling_as_of': as_of.strftime('%Y-%m-%d') if as_of else None,
+        'rolling_categories': rolling_spending(snapshot, 'category'),
+        'rolling_accounts': rolling_spending(snapshot, 'account'),
+        'date_range': date_filter['date_range'],
+        'date_filter': date_filter
+    }
+
+def build_analysis_model(snapshot):
+    """
+    Build the detailed spending analysis model over all transactions.
+
+    The summary figures and the category, merchant, daily and weekday charts
+    are fetched by the page from the chart data endpoints, see chart_data.py.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+
+    Returns:
+        tuple: (template name, context)
+    """
+    # Filter to only include charges for spending analysis
+    charges = TransactionQuery(transaction_type='charge').apply(snapshot)
+
+    results = {}
+
+    # 1. Top 10 Transactions by Amount
+    top_transactions = charges.sort_values('amount', ascending=False).head(10).copy()
+    top_transactions['transaction_date'] = top_transactions['transaction_date'].dt.strftime('%Y-%m-%d')
+    results['top_transactions'] = top_transactions[['transaction_date', 'description', 'amount', 'category', 'source']].to_dict('records')
+
+    # 2. Spending by account source
+    source_spending = charges.groupby('source', observed=True)['amount'].agg(['sum', 'count', 'mean']).reset_index()
+    source_spending = source_spending.sort_values('sum', ascending=False)
+    results['spending_by_source'] = source_spending.to_dict('records')
+
+    # 3. Transaction size distribution
+    bin_edges = np.histogram_bin_edges(charges['amount'], bins=20)
+    hist, _ = np.histogram(charges['amount'], bins=bin_edges)
+    results['transaction_distribution'] = {
+        'counts': hist.tolist(),
+        'bin_labels': [f"${edge:.0f}" for edge in bin_edges[:-1]]
+    }
+
+    return 'analysis.html', {'analysis': results}
+
+def build_categories_model(snapshot, start_date, end_date):
+    """
+    Build the spending by category model.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        start_date (str): Start of the date range
+        end_date (str): End of the date range
+
+    Returns:
+        tuple: (template name, context)
+    """
+    # Only include charges, and account for refunds
+    charges = TransactionQuery(start_date, end_date, transaction_type='charge').apply(snapshot).copy()
+
+    # Get spending by category (accounting for refunds), sorted by adjusted total
+    charges['net_amount'] = charges['amount'] - charges['refunded_amount']
+    category_data = summarize_groups(charges, 'category', value_column='net_amount', refunded_count=True)
+
+    return 'categories.html', {
+        'categories': serialize_summary(category_data),
+        'date_filter': date_filter_context(start_date, end_date)
+    }
+
+def build_merchants_model(snapshot, start_date, end_date):
+    """
+    Build the spending by merchant model.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        start_date (str): Start of the date range
+        end_date (str): End of the date range
+
+    Returns:
+        tuple: (template name, context)
+    """
+    charges = TransactionQuery(start_date, end_date, transaction_type='charge').apply(snapshot)
+
+    # Get spending by merchant
+    merchant_data = summarize_groups(charges, 'merchant')
+
+    return 'merchants.html', {
+        'merchants': serialize_summary(merchant_data),
+        'date_filter': date_filter_context(start_date, end_date)
+    }
+
+def build_category_deep_dive_model(snapshot, category, start_date, end_date):
+    """
+    Build the deep-dive model for one category.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        category (str): Category to analyze
+        start_date (str): Start of the date range
+        end_date (str): End of the date range
+
+    Returns:
+        tuple: (template name, context); the error page when the category has no charges
+    """
+    # Only include charges in the requested category
+    query = TransactionQuery(start_date, end_date, transaction_type='charge', category=category)
+    category_txns = query.apply(snapshot).copy()
+
+    if category_txns.empty:
+        return 'error.html', {'message': f"No transactions found for category: {category}"}
+
+    # Calculate net amounts (amount - refunded_amount)
+    category_txns['net_amount'] = category_txns['amount'] - category_txns['refunded_amount']
+
+    # Summary statistics (using net amounts)
+    summary = {
+        'total_spent': category_txns['net_amount'].sum(),
+        'transaction_count': len(category_txns),
+        'refunded_count': (category_txns['refund_status'] == 'refunded').sum(),
+        'average_amount': category_txns['net_amount'].mean(),
+        'largest_transaction': category_txns['net_amount'].max(),
+        'first_transaction': category_txns['transaction_date'].min().strftime('%Y-%m-%d'),
+        'last_transaction': category_txns['transaction_date'].max().strftime('%Y-%m-%d')
+    }
+
+    # Get transactions sorted by amount descending
+    txns = serialize_transactions(
+        category_txns.sort_values('amount', ascending=False),
+        ['date', 'description', 'amount', 'net_amount', 'source', 'refund_status']
+    )
+
+    # Get spending by source for this category (accounting for refunds)
+    by_source = category_txns.groupby('source', observed=True)['net_amount'].sum().sort_values(ascending=False).to_dict()
+
+    # Get spending by merchant for this category (accounting for refunds)
+    merchant_data = summarize_groups(category_txns, 'merchant', value_column='net_amount')
+
+    # Filter out merchants with zero net amount (fully refunded)
+    merchant_data = merchant_data[merchant_data['total'] > 0]
+
+    return 'deep_dive_category.html', {
+        'category': category,
+        'summary': summary,
+        'transactions': txns,
+        'by_source': by_source,
+        'merchants': serialize_summary(merchant_data),
+        'rolling': rolling_spending(snapshot, 'category', [category])[0],
+        'rolling_as_of': snapshot.rolling_metrics().as_of_date().strftime('%Y-%m-%d'),
+        'date_filter': date_filter_context(start_date, end_date)
+    }
+
+def build_merchant_deep_dive_model(snapshot, merchant, start_date, end_date):
+    """
+    Build the deep-dive model for one merchant.
+
+    Args:
+        snapshot (TransactionSnapshot): Loaded transactions
+        merchant (str): Merchant display name to analyze
+        start_date (str): Start of the date range
+        end_date (str): End of the date range
+
+    Returns:
+        tuple: (template name, context); the error page when the merchant has no charges
+    """
+    # Only read the requested merchant's charges
+    merchant_index = snapshot.merchant_index()
+    rows = merchant_index.rows(merchant, start_date, end_date)
+    merchant_txns = snapshot.df.iloc[rows]
+
+    if merchant_txns.empty:
+        return 'error.html', {'message': f"No transactions found for merchant: {merchant}"}
+
+    all_time = merchant_index.stats(merchant)
+    if len(rows) == all_time['transaction_count']:
+        # The range covers every charge, so the precomputed statistics apply
+        summary = {key: value for key, value in all_time.items() if key != 'monthly'}
+    else:
+        summary = {
+            'total_spent': merchant_txns['amount'].sum(),
+            'transaction_count': len(merchant_txns),
+            'refunded_count': (merchant_txns['refund_status'] == 'refunded').sum() if 'refund_status' in merchant_txns.columns else 0,
+            'average_amount': merchant_txns['amount'].mean(),
+            'largest_transaction': merchant_txns['amount'].max(),
+            'smallest_transaction': merchant_txns['amount'].min(),
+            'first_transaction': merchant_txns['transaction_date'].min().strftime('%Y-%m-%d'),
+            'last_transaction': merchant_txns['transaction_date'].max().strftime('%Y-%m-%d')
+        }
+
+    # Get transactions sorted by amount descending
+    txns = serialize_transactions(
+        merchant_txns.sort_values('amount', ascending=False),
+        ['date', 'description', 'amount', 'category', 'source']
+    )
+
+    return 'deep_dive_merchant.html', {
+        'merchant': merchant,
+        'summary': summary,
+        'transactions': txns,
+        'all_time': all_time,
+        'rolling': rolling_spending(snapshot, 'merchant', [merchant])[0],
+        'rolling_as_of': snapshot.rolling_metrics().as_of_date().strftime('%Y-%m-%d'),
+        'date_filter': date_filter_context(start_date, end_date)
+    }
+
+def build_enriched_insights_model(summary):
+    """
+    Build the enriched insights model.
+
+    Args:
+        summary (dict): Insights summary materialized when enrichment ran, see insights_summary.py
+
+    Returns:
+        tuple: (template name, context)
+    """
+    return 'enriched_insights.html', dict(summary, page_title="Enriched Insights")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Pipeline Instrumentation
+
+This module records per-stage timing, row throughput and peak memory for the
+consolidation and enrichment pipelines, and writes one machine-readable JSON
+report per run so regressions show up when rules or data volume change.
+"""
+
+import os
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+
+DEFAULT_REPORT_FOLDER = 'data/pipeline_reports'
+
+def default_report_folder():
+    """Report folder from PIPELINE_REPORT_FOLDER, read on use so entry points can load .env first."""
+    return os.getenv('PIPELINE_REPORT_FOLDER', DEFAULT_REPORT_FOLDER)
+
+def trace_memory_enabled():
+    """Whether PIPELINE_TRACE_MEMORY turns memory tracing on, which it does by default."""
+    return os.getenv('PIPELINE_TRACE_MEMORY', 'true').lower() in ('1', 'true', 'yes')
+
+class StageRecord:
+    """
+    Measurements for one pipeline stage. Set rows_out inside the stage when the
+    stage changes the number of rows; it defaults to rows_in.
+    """
+
+    def __init__(self, name, depth, rows_in):
+        self.name = name
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_memory_bytes = None
+        self._child_peak = 0
+
+    def as_dict(self):
+        """Return the record as a JSON-serializable dictionary."""
+        rows_out = self.rows_in if self.rows_out is None else self.rows_out
+        rows = self.rows_in if self.rows_in is not None else rows_out
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': rows_out,
+            'rows_per_second': round(rows / self.wall_seconds, 1) if rows and self.wall_seconds > 0 else None,
+            'peak_memory_bytes': self.peak_memory_bytes,
+        }
+
+class PipelineProfiler:
+    """
+    Collects stage measurements for one pipeline run.
+
+    Stages may be nested; each stage's peak memory is the highest traced
+    allocation above what was allocated when the stage started, including its
+    nested stages. A disabled profiler keeps the same interface and records
+    nothing, so pipeline functions can always call stage().
+
+    Use the profiler as a context manager around the whole run, so memory
+    tracing is stopped even if a stage raises.
+    """
+
+    def __init__(self, pipeline, enabled=True, trace_memory=None):
+        """
+        Args:
+            pipeline (str): Pipeline name, used in the report file name
+            enabled (bool): Whether to record anything
+            trace_memory (bool): Whether to trace peak memory with tracemalloc; None reads PIPELINE_TRACE_MEMORY
+        """
+        self.pipeline = pipeline
+        self.enabled = enabled
+        self.trace_memory = enabled and (trace_memory_enabled() if trace_memory is None else trace_memory)
+        self.metadata = {}
+        self.stages = []
+        self._stack = []
+        self._started_at = datetime.now()
+        self._started_tracing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+        return False
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measure a block of pipeline work.
+
+        Args:
+            name (str): Stage name
+            rows_in (int): Rows entering the stage
+
+        Yields:
+            StageRecord: Record for the stage, on which rows_out can be set
+        """
+        record = StageRecord(name, len(self._stack), rows_in)
+        if not self.enabled:
+            yield record
+            return
+
+        self.stages.append(record)
+        start_allocated = self._enter_memory_scope()
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_start
+            record.cpu_seconds = time.process_time() - cpu_start
+            self._stack.pop()
+            self._exit_memory_scope(record, start_allocated)
+
+    def _enter_memory_scope(self):
+        """Start a fresh peak measurement, handing the current peak to the enclosing stage."""
+        if not self.trace_memory:
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            parent = self._stack[-1]
+            parent._child_peak = max(parent._child_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _exit_memory_scope(self, record, start_allocated):
+        """Record the stage's peak memory above its starting allocation."""
+        if start_allocated is None:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, record._child_peak)
+        record.peak_memory_bytes = max(0, peak - start_allocated)
+        if self._stack:
+            parent = self._stack[-1]
+            parent._child_peak = max(parent._child_peak, peak)
+
+    def report(self):
+        """
+        Build the run report.
+
+        Returns:
+            dict: Pipeline name, run metadata, totals and per-stage measurements
+        """
+        top_level = [stage for stage in self.stages if stage.depth == 0]
+        return {
+            'pipeline': self.pipeline,
+            'started_at': self._started_at.isoformat(timespec='seconds'),
+            'metadata': self.metadata,
+            'total_wall_seconds': round(sum(stage.wall_seconds for stage in top_level), 6),
+            'total_cpu_seconds': round(sum(stage.cpu_seconds for stage in top_level), 6),
+            'memory_traced': self.trace_memory,
+            'stages': [stage.as_dict() for stage in self.stages],
+        }
+
+    def finish(self):
+        """Stop memory tracing if this profiler started it."""
+        if self._started_tracing and not self._stack:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def save_report(self, report_folder=None):
+        """
+        Write the run report as JSON.
+
+        Args:
+            report_folder (str): Folder for the reports; defaults to default_report_folder()
+
+        Returns:
+            str: Path of the written report, or None if the profiler is disabled
+        """
+        self.finish()
+        if not self.enabled:
+            return None
+        report_folder = report_folder or default_report_folder()
+        os.makedirs(report_folder, exist_ok=True)
+        file_name = f"{self.pipeline}_{self._started_at.strftime('%Y%m%d_%H%M%S_%f')}.json"
+        report_path = os.path.join(report_folder, file_name)
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return report_path
+
+    def print_summary(self):
+        """Print a per-stage table of the run."""
+        if not self.enabled:
+            return
+        print(f"\n--- {self.pipeline} stages ---")
+        print(f"{'stage':<40}{'wall s':>10}{'cpu s':>10}{'rows in':>10}{'rows out':>10}{'rows/s':>12}{'peak MB':>10}")
+        for stage in self.stages:
+            entry = stage.as_dict()
+            name = '  ' * stage.depth + stage.name
+            rows_in = '' if entry['rows_in'] is None else entry['rows_in']
+            rows_out = '' if entry['rows_out'] is None else entry['rows_out']
+            rate = '' if entry['rows_per_second'] is None else f"{entry['rows_per_second']:,.0f}"
+            peak = '' if entry['peak_memory_bytes'] is None else f"{entry['peak_memory_bytes'] / 1e6:.1f}"
+            print(f"{name:<40}{entry['wall_seconds']:>10.3f}{entry['cpu_seconds']:>10.3f}{rows_in:>10}{rows_out:>10}{rate:>12}{peak:>10}")
+
+def disabled_profiler():
+    """Return a profiler that records nothing, used when callers do not pass one."""
+    return PipelineProfiler('disabled', enabled=False)
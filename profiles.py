@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Profiles
+
+This module lets one app process serve several profiles, such as household
+members or entities, each with its own bank exports. A profile is a data
+folder with its own transaction store and page model cache, so nothing
+computed for one profile is served for another. The profiles folder is
+scanned at startup and then periodically, outside requests: each new
+subfolder holding bank exports has its data files prepared then, and is
+only offered once that succeeded. A failed preparation is recorded and
+retried when the folder's contents change. Snapshots are loaded on demand.
+
+The loaded snapshots, the indexes derived from them and the cached page
+models of all profiles share one memory budget. When loading a snapshot takes the total over the budget, the least
+recently used other profiles are evicted: their snapshot and page models are
+dropped, to be reloaded from their files the next time they are used.
+Requests still holding an evicted snapshot keep it until they finish.
+"""
+
+import os
+import re
+import time
+import threading
+import traceback
+
+DEFAULT_PROFILE = 'default'
+
+# Profile names double as folder names, cookie values and metric labels
+PROFILE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+class Profile:
+    """
+    Data folder, transaction store and page model cache of one profile.
+    """
+
+    def __init__(self, name, data_folder, store, page_cache):
+        self.name = name
+        self.data_folder = data_folder
+        self.store = store
+        self.page_cache = page_cache
+        self.prepared = False
+        self.error = None
+        self.failed_contents = None
+        self.last_used = 0.0
+        self.snapshot_version = None
+        self.snapshot_bytes = 0
+
+    def is_loaded(self):
+        """Whether the profile holds a snapshot in memory."""
+        return self.store.current() is not None
+
+    def memory_bytes(self):
+        """Estimated memory of the loaded snapshot and cached page models."""
+        return (self.snapshot_bytes if self.is_loaded() else 0) + self.page_cache.stats()['bytes']
+
+    def evict(self):
+        """Drop the snapshot and page models; the next use reloads them."""
+        self.store.release()
+        self.page_cache.clear()
+        self.snapshot_version = None
+        self.snapshot_bytes = 0
+
+class ProfileRegistry:
+    """
+    Profiles served by the app, with on-demand loading and LRU eviction under a memory budget.
+
+    The default profile uses the default data folder. Every subfolder of the
+    profiles folder whose name matches PROFILE_NAME_PATTERN and that holds CSV
+    files is another profile, available once refresh() has prepared it.
+    """
+
+    def __init__(self, default_folder, profiles_folder, create_profile, prepare=None, memory_budget=None):
+        """
+        Args:
+            default_folder (str): Data folder of the default profile
+            profiles_folder (str): Folder of the other profiles' data folders; empty for none
+            create_profile (callable): Builds a Profile from a name and data folder
+            prepare (callable): Creates a profile's data files if needed, called by refresh before it is offered
+            memory_budget (int): Bytes the loaded profiles may hold together; None for no limit
+        """
+        self.default_folder = default_folder
+        self.profiles_folder = profiles_folder
+        self.create_profile = create_profile
+        self.prepare_profile = prepare
+        self.memory_budget = memory_budget
+        self.profiles = {}
+        self.evictions = 0
+        self._names = [DEFAULT_PROFILE]
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def names(self):
+        """
+        List the available profiles, as found by the last refresh.
+
+        Returns:
+            list: The default profile, then the other prepared profiles by name
+        """
+        return self._names
+
+    def refresh(self):
+        """
+        Scan the profiles folder and prepare the profiles not prepared yet.
+
+        Runs at startup and periodically, never during a request. Folders
+        without CSV files are skipped. A profile whose preparation fails is
+        left out, with its error recorded, until the folder's contents change.
+
+        Returns:
+            list: The available profiles
+        """
+        with self._refresh_lock:
+            for name, folder in self._scan():
+                profile = self._profile(name, folder)
+                if profile.prepared:
+                    continue
+                contents = self._contents(folder)
+                if profile.error is not None and contents == profile.failed_contents:
+                    continue
+                try:
+                    if self.prepare_profile is not None:
+                        self.prepare_profile(profile)
+                except Exception as e:
+                    profile.error = str(e)
+                    profile.failed_contents = contents
+                    print(f"Could not prepare profile {name}: {e}")
+                    traceback.print_exc()
+                    continue
+                profile.prepared = True
+                profile.error = None
+                profile.failed_contents = None
+            self._names = [DEFAULT_PROFILE] + sorted(
+                name for name, profile in self.profiles.items() if name != DEFAULT_PROFILE and profile.prepared
+            )
+        return self._names
+
+    def _scan(self):
+        """(name, folder) of the profile folders holding CSV files."""
+        if not self.profiles_folder or not os.path.isdir(self.profiles_folder):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.profiles_folder)):
+            folder = os.path.join(self.profiles_folder, name)
+            if name != DEFAULT_PROFILE and PROFILE_NAME_PATTERN.match(name) and os.path.isdir(folder):
+                if any(file_name.lower().endswith('.csv') for file_name in os.listdir(folder)):
+                    found.append((name, folder))
+        return found
+
+    def _contents(self, folder):
+        """Names, sizes and modification times of a folder's files, to notice when they change."""
+        with os.scandir(folder) as entries:
+            return sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime) for entry in entries if entry.is_file())
+
+    def _profile(self, name, data_folder):
+        """Return a profile, creating it without preparing or loading it."""
+        with self._lock:
+            if name not in self.profiles:
+                self.profiles[name] = self.create_profile(name, data_folder)
+            return self.profiles[name]
+
+    def data_folder(self, name):
+        """
+        Data folder of an available profile.
+
+        Raises:
+            KeyError: If the profile does not exist or is not prepared
+        """
+        if name == DEFAULT_PROFILE:
+            return self.default_folder
+        if name not in self._names:
+            raise KeyError(name)
+        return self.profiles[name].data_folder
+
+    def get(self, name=DEFAULT_PROFILE):
+        """
+        Return an available profile, creating it on first use without loading its data.
+
+        Args:
+            name (str): Profile name
+
+        Returns:
+            Profile: The profile
+
+        Raises:
+            KeyError: If the profile does not exist or is not prepared
+        """
+        return self._profile(name, self.data_folder(name))
+
+    def snapshot(self, profile):
+        """
+        Return a profile's snapshot, loading it if needed and evicting other profiles over the budget.
+
+        Args:
+            profile (Profile): Profile to load
+
+        Returns:
+            TransactionSnapshot: Current snapshot of the profile
+        """
+        snapshot = profile.store.get()
+        # Measured outside the lock, once per loaded version; measure() catches up with indexes built later
+        size = snapshot.memory_bytes() if profile.snapshot_version != snapshot.version else None
+        with self._lock:
+            profile.last_used = time.monotonic()
+            if size is not None:
+                profile.snapshot_version = snapshot.version
+                profile.snapshot_bytes = size
+                self._enforce_budget(keep=profile)
+        return snapshot
+
+    def measure(self):
+        """
+        Re-estimate the loaded snapshots, whose indexes grow as they are used, and enforce the budget.
+
+        Runs periodically outside requests, since measuring walks every index.
+        """
+        for profile in list(self.profiles.values()):
+            snapshot = profile.store.current()
+            if snapshot is None:
+                continue
+            size = snapshot.memory_bytes()
+            with self._lock:
+                # Skipped if the profile was evicted or reloaded meanwhile
+                if profile.store.current() is snapshot:
+                    profile.snapshot_version = snapshot.version
+                    profile.snapshot_bytes = size
+        with self._lock:
+            if self.profiles:
+                most_recent = max(self.profiles.values(), key=lambda profile: profile.last_used)
+                self._enforce_budget(keep=most_recent)
+
+    def touch(self, profile):
+        """Mark a profile as used, e.g. when a request is answered from its page model cache."""
+        profile.last_used = time.monotonic()
+
+    def _enforce_budget(self, keep):
+        """Evict the least recently used profiles other than keep until the loaded ones fit the budget."""
+        if self.memory_budget is None:
+            return
+        total = sum(profile.memory_bytes() for profile in self.profiles.values())
+        candidates = sorted(
+            (profile for profile in self.profiles.values() if profile is not keep and profile.memory_bytes()),
+            key=lambda profile: profile.last_used
+        )
+        for profile in candidates:
+            if total <= self.memory_budget:
+                break
+            total -= profile.memory_bytes()
+            profile.evict()
+            self.evictions += 1
+            print(f"Evicted profile {profile.name} to stay within the {self.memory_budget / 2 ** 20:.0f}MB memory budget")
+
+    def stats(self):
+        """
+        Describe the profiles in memory.
+
+        Returns:
+            dict: memory_budget, memory_bytes, evictions and per-profile loaded
+                state, snapshot version, memory bytes, seconds since last use
+                and preparation error
+        """
+        now = time.monotonic()
+        profiles = {
+            name: {
+                'loaded': profile.is_loaded(),
+                'version': profile.snapshot_version,
+                'memory_bytes': profile.memory_bytes(),
+                'idle_seconds': round(now - profile.last_used, 3) if profile.last_used else None,
+                'error': profile.error,
+            }
+            for name, profile in sorted(self.profiles.items())
+        }
+        return {
+            'memory_budget': self.memory_budget,
+            'memory_bytes': sum(profile['memory_bytes'] for profile in profiles.values()),
+            'evictions': self.evictions,
+            'profiles': profiles,
+        }
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Rolling Metrics
+
+This module keeps running totals of spending per category, merchant and
+account, so rolling windows (the last 7, 30 or 90 days) and month-to-date
+comparisons are answered without scanning transactions.
+
+For each dimension, charges are ordered by (value, day) and the cumulative
+sum of their amounts is stored alongside. Spending of any value over any day
+range is then the difference between two entries of the cumulative sum,
+located with two binary searches, and the transaction count is the distance
+between them. All values of a dimension are looked up at once.
+
+New transactions are merged into the sorted arrays with one vectorized
+insert, see extended(), instead of rebuilding the totals from the full frame.
+"""
+
+import datetime
+import numpy as np
+import pandas as pd
+
+# Rolling windows in days, ending on the as-of date
+WINDOWS = (7, 30, 90)
+
+# Dimension name -> transaction column
+DIMENSIONS = {
+    'category': 'category',
+    'merchant': 'merchant',
+    'account': 'account_id',
+}
+
+# Columns the totals are computed from
+SOURCE_COLUMNS = ['transaction_date', 'amount', 'transaction_type'] + list(DIMENSIONS.values())
+
+# Days per value in the combined (value, day) sort key; far more than any history
+DAY_STRIDE = 1 << 22
+
+def _day_numbers(dates):
+    """Days since 1970-01-01 of a datetime column."""
+    return pd.to_datetime(dates).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+def _day_number(date):
+    """Days since 1970-01-01 of one date."""
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+def _comparable(column):
+    """A column with categoricals turned back into their values, so frames compare by value whatever their categories."""
+    return column.astype(object) if isinstance(column.dtype, pd.CategoricalDtype) else column
+
+class CumulativeTotals:
+    """
+    Cumulative spending of one dimension over charges ordered by (value, day).
+    """
+
+    def __init__(self, values, keys, amounts):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+        self.keys = keys
+        self.amounts = amounts
+        self.cumulative = np.concatenate(([0.0], np.cumsum(amounts)))
+
+    @classmethod
+    def build(cls, labels, days, amounts):
+        """
+        Build the totals of a dimension.
+
+        Args:
+            labels (pd.Series): Dimension value of each charge; missing values are skipped
+            days (np.ndarray): Day number of each charge
+            amounts (np.ndarray): Amount of each charge
+
+        Returns:
+            CumulativeTotals: Totals over the charges
+        """
+        codes, values = pd.factorize(labels, use_na_sentinel=True)
+        known = codes >= 0
+        keys = codes[known].astype(np.int64) * DAY_STRIDE + days[known]
+        order = np.argsort(keys, kind='stable')
+        return cls(values.tolist(), keys[order], amounts[known][order])
+
+    def extended(self, labels, days, amounts):
+        """
+        Return new totals with more charges merged in; these totals are left unchanged.
+
+        Args:
+            labels (pd.Series): Dimension value of each new charge
+            days (np.ndarray): Day number of each new charge
+            amounts (np.ndarray): Amount of each new charge
+
+        Returns:
+            CumulativeTotals: Totals over the existing and the new charges
+        """
+        values = list(self.values)
+        codes = dict(self.codes)
+        new_codes = np.empty(len(labels), dtype=np.int64)
+        for position, label in enumerate(labels.tolist()):
+            if label is None or label != label:
+                new_codes[position] = -1
+                continue
+            if label not in codes:
+                codes[label] = len(values)
+                values.append(label)
+            new_codes[position] = codes[label]
+
+        known = new_codes >= 0
+        new_keys = new_codes[known] * DAY_STRIDE + days[known]
+        order = np.argsort(new_keys, kind='stable')
+        new_keys, new_amounts = new_keys[order], amounts[known][order]
+        # New charges go after existing charges of the same value and day
+        positions = np.searchsorted(self.keys, new_keys, side='right')
+        return CumulativeTotals(
+            values,
+            np.insert(self.keys, positions, new_keys),
+            np.insert(self.amounts, positions, new_amounts),
+        )
+
+    def range_totals(self, first_day, last_day, values=None):
+        """
+        Spending and count per value over a day range.
+
+        Args:
+            first_day (int): First day number, inclusive
+            last_day (int): Last day number, inclusive
+            values (list): Values to look up, all by default; unknown values total zero
+
+        Returns:
+            tuple: (values, totals array, counts array)
+        """
+        values = self.values if values is None else list(values)
+        codes = np.array([self.codes.get(value, -1) for value in values], dtype=np.int64)
+        start = np.searchsorted(self.keys, codes * DAY_STRIDE + first_day, side='left')
+        end = np.searchsorted(self.keys, codes * DAY_STRIDE + last_day, side='right')
+        unknown = codes < 0
+        start[unknown] = end[unknown] = 0
+        return values, self.cumulative[end] - self.cumulative[start], end - start
+
+class RollingMetrics:
+    """
+    Cumulative spending totals per dimension over a snapshot's charges.
+    """
+
+    def __init__(self, totals, row_count, last_day):
+        self.totals = totals
+        self.row_count = row_count
+        self.last_day = last_day
+
+    @staticmethod
+    def _charges(df):
+        """Charges of a frame as (rows, day numbers, amounts)."""
+        charges = df[df['transaction_type'].str.lower() == 'charge']
+        days = _day_numbers(charges['transaction_date'])
+        return charges, days, charges['amount'].to_numpy(dtype=float)
+
+    @classmethod
+    def build(cls, df):
+        """
+        Build the totals over a frame's charges.
+
+        Args:
+            df (pd.DataFrame): Transactions
+
+        Returns:
+            RollingMetrics: Totals per dimension
+        """
+        charges, days, amounts = cls._charges(df)
+        totals = {
+            name: CumulativeTotals.build(charges[column], days, amounts)
+            for name, column in DIMENSIONS.items() if column in df.columns
+        }
+        return cls(totals, len(df), int(days.max()) if len(days) else None)
+
+    def extended(self, new_rows):
+        """
+        Return metrics with appended transactions merged in; these metrics are left unchanged.
+
+        Args:
+            new_rows (pd.DataFrame): Transactions appended after the ones these metrics cover
+
+        Returns:
+            RollingMetrics: Metrics over all transactions
+        """
+        charges, days, amounts = self._charges(new_rows)
+        totals = {
+            name: totals.extended(charges[DIMENSIONS[name]], days, amounts)
+            for name, totals in self.totals.items()
+        }
+        last_days = [day for day in (self.last_day, int(days.max()) if len(days) else None) if day is not None]
+        return RollingMetrics(totals, self.row_count + len(new_rows), max(last_days) if last_days else None)
+
+    def can_extend_to(self, df, previous_df):
+        """
+        Whether a frame only appends rows to the frame these metrics were built from.
+
+        Args:
+            df (pd.DataFrame): New transactions
+            previous_df (pd.DataFrame): Transactions these metrics cover
+
+        Returns:
+            bool: True when the new frame starts with the previous one
+        """
+        if len(previous_df) != self.row_count or len(df) < self.row_count:
+            return False
+        columns = [column for column in SOURCE_COLUMNS if column in previous_df.columns]
+        if any(column not in df.columns for column in columns):
+            return False
+        head = df[columns].iloc[:self.row_count].reset_index(drop=True)
+        previous = previous_df[columns].reset_index(drop=True)
+        # Shared snapshots attach text columns as categoricals, whose categories grow as values are appended
+        return all(_comparable(head[column]).equals(_comparable(previous[column])) for column in columns)
+
+    def as_of_date(self):
+        """Date of the latest charge, which windows end on by default; None without charges."""
+        if self.last_day is None:
+            return None
+        return (np.datetime64(0, 'D') + np.timedelta64(self.last_day, 'D')).astype(datetime.date)
+
+    def summary(self, dimension, as_of=None, values=None, windows=WINDOWS):
+        """
+        Rolling and month-to-date spending per value of a dimension.
+
+        The month-to-date period runs from the first of the as-of month to
+        the as-of date, and is compared with the same days of the prior month.
+
+        Args:
+            dimension (str): Name from DIMENSIONS
+            as_of (datetime.date): Last day of every window; the latest charge by default
+            values (list): Values to report, all by default
+            windows (tuple): Rolling window lengths in days
+
+        Returns:
+            list: One record per value with name, windows (days, total, count
+                and average per window), month_to_date, prior_month_to_date
+                and change (relative change of month-to-date spending, None
+                without prior spending)
+        """
+        totals = self.totals[dimension]
+        as_of = as_of or self.as_of_date()
+        if as_of is None:
+            return []
+        last_day = _day_number(as_of)
+
+        columns = {}
+        for window in windows:
+            names, spent, counts = totals.range_totals(last_day - window + 1, last_day, values)
+            columns[window] = (spent, counts)
+
+        month_start = as_of.replace(day=1)
+        prior_month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+        prior_month_end = month_start - datetime.timedelta(days=1)
+        prior_as_of = prior_month_start.replace(day=min(as_of.day, prior_month_end.day))
+        names, mtd_spent, mtd_counts = totals.range_totals(_day_number(month_start), last_day, values)
+        _, prior_spent, prior_counts = totals.range_totals(_day_number(prior_month_start), _day_number(prior_as_of), values)
+
+        records = []
+        for position, name in enumerate(names):
+            window_records = []
+            for window in windows:
+                spent, counts = columns[window]
+                count = int(counts[position])
+                window_records.append({
+                    'days': window,
+                    'total': float(spent[position]),
+                    'count': count,
+                    'average': float(spent[position]) / count if count else 0.0,
+                })
+            prior = float(prior_spent[position])
+            records.append({
+                'name': name,
+                'windows': window_records,
+                'month_to_date': {'total': float(mtd_spent[position]), 'count': int(mtd_counts[position])},
+                'prior_month_to_date': {'total': prior, 'count': int(prior_counts[position])},
+                'change': (float(mtd_spent[position]) - prior) / abs(prior) if prior else None,
+            })
+        return records
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Search Index
+
+This module provides case-insensitive substring search over transaction text
+fields such as descriptions. Each distinct value is lower-cased and indexed
+once in two inverted indexes: whole word tokens and character trigrams. A
+query is answered by intersecting the posting lists its words and trigrams
+imply, verifying only the surviving candidates with a substring check and
+mapping the matching values back to rows.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+# Tokens are runs of ASCII letters, digits and underscores in lower-cased text
+TOKEN_PATTERN = re.compile(r'[0-9a-z_]+')
+TRIGRAM_SIZE = 3
+
+# Code points are below 2**21, so a trigram packs into one int64
+_CODEPOINT_BITS = 21
+_TOKEN_CHARACTERS = np.zeros(128, dtype=bool)
+_TOKEN_CHARACTERS[[ord(c) for c in '0123456789abcdefghijklmnopqrstuvwxyz_']] = True
+
+# Candidate sets this small are verified directly instead of intersecting further
+VERIFY_THRESHOLD = 64
+
+def trigrams(text):
+    """Distinct character trigrams of a string."""
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+def inner_tokens(query):
+    """
+    Words of a query that any matching text must contain as whole tokens.
+
+    A word bounded by non-word characters on both sides inside the query is
+    bounded the same way in any text containing the query. Words touching the
+    start or end of the query may be parts of longer words.
+
+    Args:
+        query (str): Lower-cased query
+
+    Returns:
+        set: Whole tokens
+    """
+    return {
+        match.group() for match in TOKEN_PATTERN.finditer(query)
+        if match.start() > 0 and match.end() < len(query)
+    }
+
+def _group_postings(keys, text_ids):
+    """
+    Group text IDs by key into sorted, duplicate-free posting lists.
+
+    Args:
+        keys (np.ndarray): Key of each occurrence
+        text_ids (np.ndarray): Text ID of each occurrence, in ascending order
+
+    Returns:
+        tuple: (distinct keys, list of posting arrays)
+    """
+    if len(keys) == 0:
+        return keys, []
+    # A stable sort keeps text IDs ascending within each key, so duplicates are adjacent
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    text_ids = text_ids[order]
+    distinct = np.ones(len(keys), dtype=bool)
+    distinct[1:] = (keys[1:] != keys[:-1]) | (text_ids[1:] != text_ids[:-1])
+    keys = keys[distinct]
+    text_ids = text_ids[distinct]
+
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    ends = np.append(starts[1:], len(keys))
+    return keys[starts], [text_ids[start:end] for start, end in zip(starts, ends)]
+
+class TextIndex:
+    """
+    Token and trigram index over one text column.
+    """
+
+    def __init__(self, values):
+        # Distinct values are indexed once; differently cased duplicates just share postings
+        codes, uniques = pd.factorize(values)
+        self.codes = codes
+        self.texts = [str(value).lower() for value in uniques.tolist()]
+
+        # All texts as one code point array, separated by NUL, with the text ID of every position
+        joined = '\x00'.join(self.texts) + '\x00'
+        points = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter((len(text) + 1 for text in self.texts), dtype=np.int64, count=len(self.texts))
+        position_texts = np.repeat(np.arange(len(self.texts), dtype=np.int32), lengths)
+
+        self.tokens = self._token_postings(joined, points, position_texts)
+        self.trigrams = self._trigram_postings(points, position_texts)
+
+    @staticmethod
+    def _token_postings(joined, points, position_texts):
+        """Posting lists of every token, matching TOKEN_PATTERN."""
+        is_token = _TOKEN_CHARACTERS[np.minimum(points, 127)] & (points < 128)
+        previous = np.concatenate([[False], is_token[:-1]])
+        following = np.append(is_token[1:], False)
+        starts = np.flatnonzero(is_token & ~previous)
+        ends = np.flatnonzero(is_token & ~following) + 1
+        tokens = np.array([joined[start:end] for start, end in zip(starts.tolist(), ends.tolist())], dtype=object)
+        token_codes, token_values = pd.factorize(tokens)
+        keys, postings = _group_postings(token_codes, position_texts[starts])
+        return dict(zip(token_values[keys].tolist(), postings))
+
+    @staticmethod
+    def _trigram_postings(points, position_texts):
+        """Posting lists of every trigram that lies within one text."""
+        first, second, third = points[:-2], points[1:-1], points[2:]
+        valid = (first != 0) & (second != 0) & (third != 0)
+        codes = (first << 2 * _CODEPOINT_BITS) | (second << _CODEPOINT_BITS) | third
+        keys, postings = _group_postings(codes[valid], position_texts[:-2][valid])
+        mask = (1 << _CODEPOINT_BITS) - 1
+        grams = [chr(code >> 2 * _CODEPOINT_BITS) + chr((code >> _CODEPOINT_BITS) & mask) + chr(code & mask) for code in keys.tolist()]
+        return dict(zip(grams, postings))
+
+    def candidates(self, query):
+        """
+        Text IDs that may contain the query, or None when the index cannot narrow them down.
+
+        Args:
+            query (str): Lower-cased query
+
+        Returns:
+            np.ndarray: Sorted candidate text IDs, or None
+        """
+        postings = []
+        for token in inner_tokens(query):
+            postings.append(self.tokens.get(token))
+        for gram in trigrams(query):
+            postings.append(self.trigrams.get(gram))
+        if not postings:
+            return None
+        if any(posting is None for posting in postings):
+            return np.empty(0, dtype=np.int32)
+
+        # Intersect from the rarest posting list and stop once few candidates remain
+        postings.sort(key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) <= VERIFY_THRESHOLD:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def matching_texts(self, query):
+        """
+        IDs of distinct texts containing the query.
+
+        Args:
+            query (str): Lower-cased query
+
+        Returns:
+            np.ndarray: Matching text IDs
+        """
+        candidates = self.candidates(query)
+        if candidates is None:
+            candidates = range(len(self.texts))
+        return np.array([text_id for text_id in candidates if query in self.texts[text_id]], dtype=np.int64)
+
+    def mask(self, query):
+        """
+        Boolean row mask of rows whose value contains the query, ignoring case.
+
+        Args:
+            query (str): Search text
+
+        Returns:
+            np.ndarray: Boolean mask aligned with the indexed rows
+        """
+        # The extra trailing slot stays False and absorbs missing values (code -1)
+        hits = np.zeros(len(self.texts) + 1, dtype=bool)
+        hits[self.matching_texts(query.lower())] = True
+        return hits[self.codes]
+
+class SearchIndex:
+    """
+    Substring search across several text columns of a DataFrame, each indexed on first use.
+    """
+
+    def __init__(self, df, columns):
+        self.df = df
+        self.columns = [column for column in columns if column in df.columns]
+        self._indexes = {}
+
+    def column(self, name):
+        """Return the text index for a column, building it on first use."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = TextIndex(self.df[name])
+            self._indexes[name] = index
+        return index
+
+    def mask(self, query):
+        """
+        Boolean row mask of rows where any indexed column contains the query, ignoring case.
+
+        Args:
+            query (str): Search text
+
+        Returns:
+            np.ndarray: Boolean mask aligned with df rows
+        """
+        mask = np.zeros(len(self.df), dtype=bool)
+        for name in self.columns:
+            mask |= self.column(name).mask(query)
+        return mask
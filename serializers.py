@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Serializers
+
+This module builds the template and API payloads for the web app. Derived
+fields such as formatted dates and net amounts are computed column-wise,
+summaries use named aggregations, and frames are converted to lists of records
+in one bulk pass instead of row by row. Large exports are streamed as
+newline-delimited JSON or CSV in row batches, or as typed columnar Arrow IPC
+and Parquet payloads when pyarrow is installed.
+"""
+
+import io
+import json
+import zlib
+import pandas as pd
+
+DATE_FORMAT = '%Y-%m-%d'
+
+def format_dates(dates):
+    """
+    Format a datetime column as YYYY-MM-DD strings.
+
+    Args:
+        dates (pd.Series): Datetime values
+
+    Returns:
+        pd.Series: Formatted dates
+    """
+    return dates.dt.strftime(DATE_FORMAT)
+
+def net_amounts(df):
+    """
+    Compute net amounts, subtracting refunds from refunded charges.
+
+    Args:
+        df (pd.DataFrame): Transactions with amount, refunded_amount, transaction_type and refund_status
+
+    Returns:
+        pd.Series: Net amount for each transaction
+    """
+    refunded_charge = (df['transaction_type'].str.lower() == 'charge') & (df['refund_status'] == 'refunded')
+    return df['amount'].where(~refunded_charge, df['amount'] - df['refunded_amount'])
+
+def to_records(fields):
+    """
+    Convert aligned columns to a list of dictionaries in one pass.
+
+    Args:
+        fields (dict): Output key -> pd.Series, np.ndarray or list, all of the same length
+
+    Returns:
+        list: One dictionary per row with native Python values
+    """
+    keys = list(fields)
+    columns = [values.tolist() if hasattr(values, 'tolist') else list(values) for values in fields.values()]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+def serialize_transactions(df, fields):
+    """
+    Serialize transactions for a template.
+
+    Args:
+        df (pd.DataFrame): Transactions to serialize, already sorted
+        fields (list): Output fields to include. Supported fields are date,
+            description, merchant, amount, net_amount, category, source, type
+            and refund_status.
+
+    Returns:
+        list: Transaction records
+    """
+    builders = {
+        'date': lambda: format_dates(df['transaction_date']),
+        'description': lambda: df['description'],
+        'merchant': lambda: df['merchant'],
+        'amount': lambda: df['amount'],
+        'net_amount': lambda: df['net_amount'] if 'net_amount' in df.columns else net_amounts(df),
+        'category': lambda: df['category'].astype(object).fillna(''),
+        'source': lambda: df['source'],
+        'type': lambda: df['transaction_type'],
+        'refund_status': lambda: df['refund_status'],
+    }
+    return to_records({field: builders[field]() for field in fields})
+
+def summarize_groups(df, key, value_column='amount', refunded_count=False):
+    """
+    Summarize transactions per group with named aggregations.
+
+    Args:
+        df (pd.DataFrame): Transactions to summarize
+        key (str): Column to group by
+        value_column (str): Column whose sum is the group total
+        refunded_count (bool): Whether to count refunded transactions per group
+
+    Returns:
+        pd.DataFrame: name, total, count, average, first_date and last_date
+            (plus refunded_count) per group, sorted by total descending
+    """
+    aggregations = {
+        'total': (value_column, 'sum'),
+        'count': (value_column, 'size'),
+        'first_date': ('transaction_date', 'min'),
+        'last_date': ('transaction_date', 'max'),
+    }
+    if refunded_count:
+        df = df.assign(_refunded=(df['refund_status'] == 'refunded'))
+        aggregations['refunded_count'] = ('_refunded', 'sum')
+
+    summary = df.groupby(key, observed=True).agg(**aggregations)
+    summary['average'] = summary['total'] / summary['count']
+    summary = summary.sort_values('total', ascending=False).reset_index()
+    return summary.rename(columns={key: 'name'})
+
+def serialize_summary(summary):
+    """
+    Serialize a summarize_groups result for a template.
+
+    Args:
+        summary (pd.DataFrame): Output of summarize_groups
+
+    Returns:
+        list: Group records with formatted dates
+    """
+    fields = {
+        'name': summary['name'],
+        'total': summary['total'],
+        'count': summary['count'],
+    }
+    if 'refunded_count' in summary.columns:
+        fields['refunded_count'] = summary['refunded_count']
+    fields['average'] = summary['average']
+    fields['first_date'] = format_dates(summary['first_date'])
+    fields['last_date'] = format_dates(summary['last_date'])
+    return to_records(fields)
+
+def _format_batch_dates(batch):
+    """Return a copy of a batch with datetime columns formatted as YYYY-MM-DD strings."""
+    batch = batch.copy()
+    for column in batch.columns:
+        if pd.api.types.is_datetime64_any_dtype(batch[column]):
+            batch[column] = format_dates(batch[column])
+    return batch
+
+def iter_ndjson(df, rows, batch_size=5000):
+    """
+    Stream transactions as newline-delimited JSON.
+
+    Args:
+        df (pd.DataFrame): Transactions
+        rows (np.ndarray): Row positions to export, in output order
+        batch_size (int): Rows converted per batch
+
+    Yields:
+        str: One chunk of JSON lines per batch
+    """
+    for start in range(0, len(rows), batch_size):
+        batch = _format_batch_dates(df.iloc[rows[start:start + batch_size]])
+        # Missing values become null; json.dumps keeps full float precision, unlike DataFrame.to_json
+        batch = batch.astype(object).where(batch.notna(), None)
+        yield ''.join(json.dumps(record) + '\n' for record in batch.to_dict(orient='records'))
+
+def iter_csv(df, rows, batch_size=5000):
+    """
+    Stream transactions as CSV with a single header row.
+
+    Args:
+        df (pd.DataFrame): Transactions
+        rows (np.ndarray): Row positions to export, in output order
+        batch_size (int): Rows converted per batch
+
+    Yields:
+        str: One chunk of CSV lines per batch
+    """
+    if len(rows) == 0:
+        yield df.iloc[:0].to_csv(index=False)
+        return
+    for start in range(0, len(rows), batch_size):
+        batch = _format_batch_dates(df.iloc[rows[start:start + batch_size]])
+        yield batch.to_csv(index=False, header=(start == 0))
+
+def gzip_stream(chunks, level=6):
+    """
+    Gzip-compress a stream of text chunks incrementally.
+
+    Args:
+        chunks (iterable): Text chunks
+        level (int): zlib compression level
+
+    Yields:
+        bytes: Compressed chunks forming one gzip member
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _require_pyarrow():
+    """Import pyarrow on first use so the app runs without it unless binary exports are requested."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Arrow and Parquet exports require pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def arrow_table(df, rows, columns=None):
+    """
+    Build a typed Arrow table from selected rows and columns.
+
+    Datetime columns become timestamps and categorical columns become
+    dictionary-encoded arrays, so both survive the round trip to pandas.
+
+    Args:
+        df (pd.DataFrame): Transactions
+        rows (np.ndarray): Row positions to export, in output order
+        columns (list): Columns to include, or None for all
+
+    Returns:
+        pyarrow.Table: Columnar table
+    """
+    pyarrow = _require_pyarrow()
+    selected = df.iloc[rows] if columns is None else df.iloc[rows][columns]
+    return pyarrow.Table.from_pandas(selected, preserve_index=False)
+
+def iter_arrow_stream(table, batch_size=5000):
+    """
+    Stream an Arrow table in the Arrow IPC streaming format.
+
+    Args:
+        table (pyarrow.Table): Table to send
+        batch_size (int): Maximum rows per record batch
+
+    Yields:
+        bytes: Schema message, then one chunk per record batch, then the end-of-stream marker
+    """
+    pyarrow = _require_pyarrow()
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_size):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+def _drain(sink):
+    """Return and clear the bytes written to an in-memory sink so far."""
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+def parquet_bytes(table, compression='zstd'):
+    """
+    Serialize an Arrow table as a Parquet file.
+
+    Args:
+        table (pyarrow.Table): Table to serialize
+        compression (str): Parquet compression codec
+
+    Returns:
+        bytes: Parquet file contents
+    """
+    pyarrow = _require_pyarrow()
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink, compression=compression)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared Snapshot
+
+This module publishes the loaded transactions once as memory-mapped NumPy
+column files, so several worker processes share one copy instead of each
+parsing the CSV into its own DataFrame.
+
+Each published snapshot is a directory named after its data version:
+- Numeric, boolean and datetime columns are stored as raw .npy arrays. Every
+  worker maps them read-only, and the DataFrame wraps the mapped pages
+  without copying them.
+- Text columns are stored dictionary-encoded, as a code array plus the
+  distinct values in a JSON file. A worker wraps them as pandas Categoricals
+  whose codes are the mapped array, so only the distinct values are private
+  to each worker and per-worker memory no longer grows with the number of
+  rows.
+Nothing is pickled, so a process that can write the folder cannot make the
+workers run code.
+
+A CURRENT file names the live snapshot. A new snapshot is written to a temporary
+directory and renamed into place, then CURRENT is replaced atomically, so
+workers always attach to a complete snapshot. A file lock makes sure only one
+worker builds and publishes each version. A replaced version is kept for a
+grace period, so a worker that read CURRENT just before the swap can still
+attach to it.
+
+Point the folder at a tmpfs such as /dev/shm to keep snapshots in shared
+memory rather than on disk.
+"""
+
+import os
+import json
+import time
+import shutil
+import fcntl
+import numpy as np
+import pandas as pd
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'publish.lock'
+MANIFEST_FILE = 'manifest.json'
+# Snapshot layout version; snapshots in another layout are republished
+SNAPSHOT_FORMAT = 2
+# Seconds a replaced snapshot is kept for workers about to attach to it
+RETIRED_GRACE_SECONDS = 300
+
+# Dtype kinds stored as raw arrays: bool, signed and unsigned integers, floats, complex, timedelta and datetime
+ARRAY_KINDS = 'biufcmM'
+
+def _is_array_column(series):
+    """Whether a column is stored as a raw array rather than dictionary-encoded."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in ARRAY_KINDS
+
+def _code_dtype(value_count):
+    """Smallest code dtype pandas uses for a Categorical with this many values, so the mapped codes are not copied."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if value_count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def write_snapshot(df, directory):
+    """
+    Write a DataFrame as one file per column plus a manifest.
+
+    Args:
+        df (pd.DataFrame): Transactions with a default RangeIndex
+        directory (str): Empty directory to write into
+
+    Raises:
+        ValueError: If a text column holds values JSON cannot represent
+    """
+    columns = []
+    for position, name in enumerate(df.columns):
+        series = df[name]
+        if _is_array_column(series):
+            file_name = f'c{position}.npy'
+            np.save(os.path.join(directory, file_name), series.to_numpy(), allow_pickle=False)
+            columns.append({'name': name, 'encoding': 'array', 'file': file_name})
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            codes_file, values_file = f'c{position}.codes.npy', f'c{position}.values.json'
+            np.save(os.path.join(directory, codes_file), codes.astype(_code_dtype(len(uniques))), allow_pickle=False)
+            try:
+                with open(os.path.join(directory, values_file), 'w') as f:
+                    json.dump(uniques.tolist(), f)
+            except TypeError as e:
+                raise ValueError(f"Column {name} holds values that cannot be shared without pickling: {e}") from None
+            columns.append({'name': name, 'encoding': 'dictionary', 'codes': codes_file, 'values': values_file})
+
+    manifest = {'format': SNAPSHOT_FORMAT, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f)
+
+def read_snapshot(directory):
+    """
+    Attach to a snapshot written by write_snapshot.
+
+    Args:
+        directory (str): Snapshot directory
+
+    Returns:
+        pd.DataFrame: Transactions backed by read-only memory maps, with text
+            columns as Categoricals
+    """
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    data = {}
+    for column in manifest['columns']:
+        if column['encoding'] == 'array':
+            # A plain ndarray view of the map, so pandas treats it like any other array
+            data[column['name']] = np.load(os.path.join(directory, column['file']), mmap_mode='r', allow_pickle=False).view(np.ndarray)
+        else:
+            codes = np.load(os.path.join(directory, column['codes']), mmap_mode='r', allow_pickle=False).view(np.ndarray)
+            with open(os.path.join(directory, column['values'])) as f:
+                values = json.load(f)
+            # Missing values keep code -1, which Categoricals read as NaN
+            data[column['name']] = pd.Categorical.from_codes(codes, categories=pd.Index(values, dtype=object))
+    # copy=False keeps each mapped array as its own block instead of consolidating into copies
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest['rows']), copy=False)
+
+class SharedSnapshots:
+    """
+    Folder of published snapshots shared by the workers on one machine.
+    """
+
+    def __init__(self, folder, grace_seconds=RETIRED_GRACE_SECONDS):
+        """
+        Args:
+            folder (str): Folder of the published snapshots
+            grace_seconds (float): How long a replaced snapshot is kept before it is pruned
+        """
+        self.folder = folder
+        self.grace_seconds = grace_seconds
+        os.makedirs(folder, exist_ok=True)
+
+    def current_version(self):
+        """Version named by the CURRENT file, or None if nothing is published yet."""
+        try:
+            with open(os.path.join(self.folder, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, df, version):
+        """
+        Write a snapshot and make it current.
+
+        Args:
+            df (pd.DataFrame): Loaded transactions
+            version (str): Data version, used as the directory name
+        """
+        directory = os.path.join(self.folder, version)
+        if not self._is_published(version):
+            temp_directory = f"{directory}.{os.getpid()}.tmp"
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            os.makedirs(temp_directory)
+            write_snapshot(df, temp_directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.rename(temp_directory, directory)
+
+        previous = self.current_version()
+        temp_current = os.path.join(self.folder, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(temp_current, 'w') as f:
+            f.write(version)
+        os.replace(temp_current, os.path.join(self.folder, CURRENT_FILE))
+        if previous is not None and previous != version:
+            # The modification time of a replaced snapshot records when it was retired
+            try:
+                os.utime(os.path.join(self.folder, previous))
+            except FileNotFoundError:
+                pass
+        self._prune(keep={version, previous})
+        print(f"Published shared snapshot {version} ({len(df)} transactions)")
+
+    def _is_published(self, version):
+        """Whether a complete snapshot of the version exists in the current layout."""
+        try:
+            with open(os.path.join(self.folder, version, MANIFEST_FILE)) as f:
+                return json.load(f).get('format') == SNAPSHOT_FORMAT
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def _prune(self, keep):
+        """Remove snapshots retired longer than the grace period, other than the kept versions; workers still mapping them keep their pages."""
+        retired_before = time.time() - self.grace_seconds
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name not in keep and os.path.isdir(path) and not name.endswith('.tmp'):
+                try:
+                    if os.path.getmtime(path) >= retired_before:
+                        continue
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+
+    def attach(self, version):
+        """
+        Attach to a published snapshot.
+
+        Args:
+            version (str): Data version
+
+        Returns:
+            pd.DataFrame: Read-only transactions
+        """
+        return read_snapshot(os.path.join(self.folder, version))
+
+    def load(self, version, loader):
+        """
+        Attach to a version, publishing it first if no worker has yet.
+
+        Args:
+            version (str): Data version expected by the caller
+            loader (callable): Loads the transactions when this worker has to publish them
+
+        Returns:
+            pd.DataFrame: Read-only transactions
+        """
+        if self.current_version() != version or not self._is_published(version):
+            with open(os.path.join(self.folder, LOCK_FILE), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    # Another worker may have published while this one waited for the lock
+                    if self.current_version() != version or not self._is_published(version):
+                        self.publish(loader(), version)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        return self.attach(version)
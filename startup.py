@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Startup
+
+This module runs the web app's warm-up phase and tracks its progress for the
+health and readiness probes. The warm-up is a list of named steps, such as
+building the enriched data, loading the snapshot and pre-computing the
+default pages. The steps run once, in order, optionally on a background
+thread so the server can answer probes while warming up. The app is ready
+only when every step has succeeded. On the background thread a failed step
+is retried after a delay that doubles up to a limit, so the app recovers
+once the cause is fixed, e.g. a missing data file is added, without a
+restart.
+
+It also provides PeriodicTask, which runs background maintenance such as
+picking up changed data files outside the request path, and BackgroundJob,
+which runs work requested by a handler, such as re-enriching transactions,
+without blocking the request.
+"""
+
+import time
+import threading
+import traceback
+
+class StartupState:
+    """
+    Progress of the warm-up phase.
+    """
+
+    def __init__(self, steps, retry_delay=5, max_retry_delay=300):
+        """
+        Args:
+            steps (list): (name, callable) pairs run in order
+            retry_delay (float): Seconds before the first retry of a failed step
+            max_retry_delay (float): Longest delay between retries
+        """
+        self.steps = list(steps)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.started_at = None
+        self.ready_at = None
+        self.error = None
+        self.failures = 0
+        self.retry_at = None
+        self.step_seconds = {}
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._runner = None
+        self._finished = threading.Event()
+
+    def is_ready(self):
+        """Whether every warm-up step has completed."""
+        return self._ready.is_set()
+
+    def run(self, retry=False):
+        """
+        Run the warm-up steps in order.
+
+        Args:
+            retry (bool): Retry a failed step with backoff until it succeeds,
+                rather than stopping at the first failure. Calling run again
+                after a failure resumes from the failed step.
+
+        Returns:
+            bool: Whether the app is ready
+        """
+        with self._lock:
+            if self.is_ready():
+                return True
+            runner = self._runner
+            if runner is None:
+                self._runner = threading.current_thread()
+                self._finished.clear()
+                if self.started_at is None:
+                    self.started_at = time.time()
+
+        if runner is not None:
+            # Another caller is running the warm-up; wait for it without holding the lock
+            if runner is not threading.current_thread():
+                self._finished.wait()
+            return self.is_ready()
+
+        try:
+            return self._run_steps(retry)
+        finally:
+            with self._lock:
+                self._runner = None
+                self._finished.set()
+
+    def _run_steps(self, retry):
+        """Run the steps that have not completed yet, from the one that failed last."""
+        position = len(self.step_seconds)
+        while position < len(self.steps):
+            name, step = self.steps[position]
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.error = f"{name}: {e}"
+                self.failures += 1
+                print(f"Warm-up failed in {name}: {e}")
+                traceback.print_exc()
+                if not retry:
+                    return False
+                # Steps that succeeded are not run again
+                delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+                self.retry_at = time.time() + delay
+                print(f"Retrying warm-up step {name} in {delay:.0f}s")
+                time.sleep(delay)
+                self.retry_at = None
+                continue
+            self.step_seconds[name] = round(time.perf_counter() - start, 3)
+            print(f"Warm-up step {name} took {self.step_seconds[name]:.2f}s")
+            position += 1
+
+        self.error = None
+        self.ready_at = time.time()
+        self._ready.set()
+        print(f"Warm-up finished in {self.ready_at - self.started_at:.2f}s")
+        return True
+
+    def start(self):
+        """Run the warm-up on a background thread, retrying failed steps, unless it has already been started."""
+        with self._lock:
+            if self._thread is not None or self._runner is not None or self.is_ready():
+                return
+            self._thread = threading.Thread(target=self.run, kwargs={'retry': True}, name='warm-up', daemon=True)
+        self._thread.start()
+
+    def status(self):
+        """
+        Describe the warm-up for the readiness probe.
+
+        Returns:
+            dict: status (pending, warming, ready or failed), error, failures so
+                far, seconds until the next retry and per-step seconds
+        """
+        if self.is_ready():
+            status = 'ready'
+        elif self.error is not None:
+            status = 'failed'
+        elif self.started_at is not None:
+            status = 'warming'
+        else:
+            status = 'pending'
+        retry_at = self.retry_at
+        return {
+            'status': status,
+            'error': self.error,
+            'failures': self.failures,
+            'retry_in_seconds': round(max(retry_at - time.time(), 0), 1) if retry_at else None,
+            'steps': dict(self.step_seconds),
+            'warm_up_seconds': round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+        }
+
+class PeriodicTask:
+    """
+    Runs a function every interval seconds on a background thread.
+
+    A failing run is logged and the task carries on at the next interval.
+    """
+
+    def __init__(self, name, interval, function):
+        """
+        Args:
+            name (str): Thread name, used in log messages
+            interval (float): Seconds between runs; 0 or less disables the task
+            function (callable): Called with no arguments
+        """
+        self.name = name
+        self.interval = interval
+        self.function = function
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the task unless it is disabled or already running."""
+        with self._lock:
+            if self.interval <= 0 or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the task after its current run."""
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.function()
+            except Exception as e:
+                print(f"{self.name} failed: {e}")
+                traceback.print_exc()
+
+class BackgroundJob:
+    """
+    Runs a function on a background thread when requested, one run at a time.
+
+    Requests made while a run is in progress are coalesced into one more run
+    after it, so the last request is always followed by a complete run. A
+    failing run is logged.
+    """
+
+    def __init__(self, name, function):
+        """
+        Args:
+            name (str): Thread name, used in log messages
+            function (callable): Called with no arguments
+        """
+        self.name = name
+        self.function = function
+        self.runs = 0
+        self.error = None
+        self._pending = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def request(self):
+        """Schedule a run, starting the thread unless one is already running."""
+        with self._lock:
+            self._pending = True
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def is_running(self):
+        """Whether a run is in progress or scheduled."""
+        with self._lock:
+            return self._thread is not None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                self._pending = False
+            try:
+                self.function()
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                print(f"{self.name} failed: {e}")
+                traceback.print_exc()
+            self.runs += 1
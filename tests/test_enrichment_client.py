@@ -0,0 +1,88 @@
+"""
+Tests for the online enrichment client against the local stand-in service:
+repeated descriptions are classified once, requests carry at most batch_size
+descriptions, and a second run is answered from the SQLite cache without any
+HTTP request, as the run metrics report.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment_client import EnrichmentCache, EnrichmentClient, start_stub_server
+
+# Merchants whose descriptions normalize to distinct strings
+MERCHANTS = [f'MERCHANT{letter} STORE' for letter in 'ABCDEFGHIJKL']
+
+@pytest.fixture
+def stub_server():
+    server, base_url = start_stub_server()
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+def offline_enriched(descriptions):
+    """Transactions shaped like offline_transaction_enrichment output."""
+    return pd.DataFrame({
+        'description': descriptions,
+        'category_enriched': 'Shopping',
+        'subcategory_enriched': None,
+        'merchant': None,
+    })
+
+def make_client(base_url, cache_file, batch_size=5):
+    """Client on a cache file with no effective rate limit."""
+    return EnrichmentClient(
+        base_url, cache=EnrichmentCache(cache_file), batch_size=batch_size,
+        max_concurrency=2, requests_per_second=1000
+    )
+
+def test_repeated_descriptions_are_classified_once_in_batches(stub_server, tmp_path):
+    server, base_url = stub_server
+    # Each merchant appears with two store numbers and in two cases, which normalize alike
+    descriptions = [f'{name} #{number}' for name in MERCHANTS for number in (1, 2)]
+    descriptions += [description.lower() for description in descriptions]
+    client = make_client(base_url, str(tmp_path / 'cache.sqlite'))
+
+    enriched = client.enrich(offline_enriched(descriptions))
+
+    assert sorted(server.batch_sizes) == [2, 5, 5]
+    assert server.request_count == 3
+    metrics = client.metrics.as_dict()
+    assert metrics['rows'] == len(descriptions)
+    assert metrics['unique_descriptions'] == len(MERCHANTS)
+    assert metrics['classified'] == len(MERCHANTS)
+    assert metrics['requests'] == 3
+    assert metrics['cache_hits'] == 0
+    assert metrics['cache_hit_ratio'] == 0.0
+    assert enriched['merchant'].iloc[0] == 'Merchanta Store'
+    # Rows the service did not categorize keep their offline category
+    assert (enriched['category_enriched'] == 'Shopping').all()
+
+def test_second_run_is_answered_from_the_cache(stub_server, tmp_path):
+    server, base_url = stub_server
+    cache_file = str(tmp_path / 'cache.sqlite')
+    descriptions = [f'{name} #1' for name in MERCHANTS]
+    first = make_client(base_url, cache_file)
+    expected = first.enrich(offline_enriched(descriptions))
+    first.cache.close()
+    requests_after_first_run = server.request_count
+
+    # A new client on the same cache file, as in a later run
+    second = make_client(base_url, cache_file)
+    enriched = second.enrich(offline_enriched(descriptions))
+
+    assert server.request_count == requests_after_first_run
+    metrics = second.metrics.as_dict()
+    assert metrics['requests'] == 0
+    assert metrics['cache_hits'] == len(MERCHANTS)
+    assert metrics['cache_misses'] == 0
+    assert metrics['cache_hit_ratio'] == 1.0
+    pd.testing.assert_frame_equal(enriched, expected)
+    second.cache.close()
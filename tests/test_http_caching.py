@@ -0,0 +1,45 @@
+"""
+Tests for conditional GET support: successful responses carry validators and
+revalidate to 304, while error responses carry none.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import datetime
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_caching import ConditionalGetCache
+
+LAST_MODIFIED = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+def make_app():
+    """App with one working page and one failing page, both at data version v1."""
+    app = Flask(__name__)
+    ConditionalGetCache(app, version_source=lambda: ('v1', LAST_MODIFIED))
+
+    @app.route('/page')
+    def page():
+        return 'transactions'
+
+    @app.route('/broken')
+    def broken():
+        return 'Error loading page', 500
+
+    return app
+
+def test_successful_response_revalidates_to_not_modified():
+    client = make_app().test_client()
+    response = client.get('/page')
+    assert response.headers.get('ETag')
+    assert client.get('/page', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+def test_error_response_carries_no_validators():
+    response = make_app().test_client().get('/broken')
+    assert response.status_code == 500
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
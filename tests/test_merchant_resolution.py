@@ -0,0 +1,66 @@
+"""
+Tests for merchant resolution: descriptions of one merchant printed with store
+numbers, locations, processor prefixes and network abbreviations must resolve
+to one merchant, and different merchants must stay apart.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from merchant_resolution import MerchantIndex, merchant_key
+from offline_transaction_enrichment import normalize_description
+
+def resolve(descriptions, new_descriptions=()):
+    """Build an index over descriptions and resolve them and the new ones to merchant names."""
+    everything = list(descriptions) + list(new_descriptions)
+    resolved = MerchantIndex.build(descriptions).resolve(pd.Series(everything))
+    return dict(zip(everything, resolved['merchant']))
+
+def test_merchant_key_drops_store_numbers_and_locations():
+    assert merchant_key(normalize_description('SAFEWAY #1234 SAN FRANCISCO CA')) == 'safeway san francisco'
+    assert merchant_key(normalize_description('SAFEWAY STORE 99')) == 'safeway'
+    assert merchant_key(normalize_description('AMZN MKTP US*AB12CD34')) == 'amazon'
+    assert merchant_key(normalize_description('AMAZON.COM*XY1Z2')) == 'amazon'
+    # Two tokens are a merchant name, not a merchant and a state
+    assert merchant_key(normalize_description('PAY ME')) == 'pay me'
+
+def test_store_and_location_variants_resolve_to_one_merchant():
+    merchants = resolve([
+        'SAFEWAY #1234 SAN FRANCISCO CA', 'SAFEWAY #5678 OAKLAND CA', 'SAFEWAY STORE 99',
+        'AMZN MKTP US*AB12CD34', 'AMAZON.COM*XY1Z2', 'AMAZON MKTPL*ZZ98YY',
+        'SQ *BLUE BOTTLE COFFEE', 'BLUE BOTTLE COFFEE #12',
+    ])
+    assert {merchants['SAFEWAY #1234 SAN FRANCISCO CA'], merchants['SAFEWAY #5678 OAKLAND CA'], merchants['SAFEWAY STORE 99']} == {'Safeway'}
+    assert {merchants['AMZN MKTP US*AB12CD34'], merchants['AMAZON.COM*XY1Z2'], merchants['AMAZON MKTPL*ZZ98YY']} == {'Amazon'}
+    assert merchants['SQ *BLUE BOTTLE COFFEE'] == merchants['BLUE BOTTLE COFFEE #12'] == 'Blue Bottle Coffee'
+
+def test_locations_resolve_without_a_plain_description():
+    merchants = resolve(['TRADER JOES #123 OAKLAND CA', 'TRADER JOES #456 SAN JOSE CA'])
+    assert set(merchants.values()) == {'Trader Joes'}
+
+def test_different_merchants_stay_apart():
+    merchants = resolve([
+        'UBER EATS 8005928996', 'UBER *TRIP', 'TARGET 000123', 'COSTCO WHSE 0456',
+        'BILL PAYMENT PG&E', 'BILL PAYMENT COMCAST', 'SAFEWAY #1 OAKLAND CA', 'WALGREENS #2 OAKLAND CA',
+    ])
+    assert len(set(merchants.values())) == len(merchants)
+
+def test_new_descriptions_join_known_merchants():
+    merchants = resolve(
+        ['SAFEWAY #1234 SAN FRANCISCO CA', 'SAFEWAY STORE 99', 'AMAZON.COM*XY1Z2'],
+        ['SAFEWAY #42 BERKELEY CA', 'AMZN Mktp US*QQ11', 'NEW CAFE #3'],
+    )
+    assert merchants['SAFEWAY #42 BERKELEY CA'] == 'Safeway'
+    assert merchants['AMZN Mktp US*QQ11'] == 'Amazon'
+    assert merchants['NEW CAFE #3'] == 'New Cafe'
+
+def test_missing_and_blank_descriptions_are_unknown():
+    index = MerchantIndex.build(['TARGET 000123'])
+    resolved = index.resolve(pd.Series([None, '', 'TARGET 000999']))
+    assert resolved['merchant'].tolist() == ['Unknown', 'Unknown', 'Target']
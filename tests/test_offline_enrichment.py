@@ -0,0 +1,43 @@
+"""
+Parity tests for the column-wise offline enrichment.
+
+The row-wise enrich_transactions_rowwise is the reference implementation;
+enrich_transactions must produce the same enriched columns for every branch
+of the amount, transaction type and category rules.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+from offline_transaction_enrichment import enrich_transactions, enrich_transactions_rowwise
+from offline_enrichment_benchmark import generate_transactions, check_parity
+
+@pytest.mark.parametrize('seed', [0, 1, 42])
+def test_columnwise_matches_rowwise(seed):
+    transactions = generate_transactions(5_000, seed=seed)
+    assert check_parity(enrich_transactions_rowwise(transactions), enrich_transactions(transactions)) == []
+
+def test_columnwise_matches_rowwise_on_edge_values():
+    transactions = generate_transactions(50, seed=7)
+    # Zero amounts, blank text and source casing exercise the fallbacks of each rule
+    transactions.loc[0:4, 'amount'] = 0.0
+    transactions.loc[5:9, 'description'] = ''
+    transactions.loc[10:14, 'category'] = ''
+    transactions.loc[15:19, 'additional_details'] = 'ACH TRANSFER'
+    transactions.loc[20:24, 'source'] = transactions.loc[20:24, 'source'].str.upper()
+    assert check_parity(enrich_transactions_rowwise(transactions), enrich_transactions(transactions)) == []
+
+def test_empty_frame_keeps_schema():
+    transactions = generate_transactions(0)
+    enriched = enrich_transactions(transactions)
+    assert enriched.empty
+    assert list(enriched.columns) == list(enrich_transactions_rowwise(generate_transactions(1)).columns)
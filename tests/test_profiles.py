@@ -0,0 +1,201 @@
+"""
+Tests for the profile registry: only profile folders holding CSV files are
+offered, once prepared, and a failed preparation is recorded and retried only
+after the folder's contents change. Over the memory budget the least recently
+used profile is evicted, and the dashboard never serves one profile's cached
+page models or validators for another.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+from profiles import Profile, ProfileRegistry, DEFAULT_PROFILE
+from page_cache import PageModelCache
+from transaction_store import TransactionStore
+
+class FakeStore:
+    """Store that never loads anything."""
+
+    def current(self):
+        return None
+
+class FakePageCache:
+    """Page model cache holding nothing."""
+
+    def stats(self):
+        return {'bytes': 0}
+
+def write(path, text):
+    """Write a file, creating its folder."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+def make_registry(tmp_path, prepared):
+    """Registry over tmp_path/profiles whose preparation fails for folders holding bad.csv."""
+    def prepare(profile):
+        prepared.append(profile.name)
+        if os.path.exists(os.path.join(profile.data_folder, 'bad.csv')):
+            raise ValueError('No objects to concatenate')
+
+    return ProfileRegistry(
+        str(tmp_path / 'data'),
+        str(tmp_path / 'profiles'),
+        lambda name, folder: Profile(name, folder, FakeStore(), FakePageCache()),
+        prepare=prepare
+    )
+
+def test_only_prepared_folders_with_csv_files_are_offered(tmp_path):
+    write(str(tmp_path / 'profiles' / 'alice' / 'export.csv'), 'a,b\n')
+    write(str(tmp_path / 'profiles' / 'empty' / 'notes.txt'), 'no exports yet\n')
+    write(str(tmp_path / 'profiles' / 'broken' / 'bad.csv'), 'a,b\n')
+    prepared = []
+    registry = make_registry(tmp_path, prepared)
+
+    # Nothing is listed or prepared before the first refresh
+    assert registry.names() == [DEFAULT_PROFILE]
+    assert registry.refresh() == [DEFAULT_PROFILE, 'alice']
+    assert sorted(prepared) == ['alice', 'broken']
+    assert registry.stats()['profiles']['broken']['error'] == 'No objects to concatenate'
+    assert 'empty' not in registry.profiles
+
+def test_failed_profile_is_retried_only_after_its_files_change(tmp_path):
+    write(str(tmp_path / 'profiles' / 'broken' / 'bad.csv'), 'a,b\n')
+    prepared = []
+    registry = make_registry(tmp_path, prepared)
+    registry.refresh()
+    registry.refresh()
+    assert prepared == ['broken']
+
+    os.remove(str(tmp_path / 'profiles' / 'broken' / 'bad.csv'))
+    write(str(tmp_path / 'profiles' / 'broken' / 'export.csv'), 'a,b\n')
+    assert registry.refresh() == [DEFAULT_PROFILE, 'broken']
+    assert prepared == ['broken', 'broken']
+    assert registry.get('broken').error is None
+
+class FakeSnapshot:
+    """Loaded snapshot of a given estimated size."""
+
+    def __init__(self, version, size):
+        self.version = version
+        self.size = size
+
+    def memory_bytes(self):
+        return self.size
+
+class SizedStore:
+    """Store loading a FakeSnapshot of a fixed size on get()."""
+
+    def __init__(self, size):
+        self.size = size
+        self.snapshot = None
+
+    def get(self):
+        if self.snapshot is None:
+            self.snapshot = FakeSnapshot('v1', self.size)
+        return self.snapshot
+
+    def current(self):
+        return self.snapshot
+
+    def release(self):
+        self.snapshot = None
+
+def test_least_recently_used_profile_is_evicted_over_the_budget(tmp_path):
+    for name in ('alice', 'bob', 'carol'):
+        write(str(tmp_path / 'profiles' / name / 'export.csv'), 'a,b\n')
+    registry = ProfileRegistry(
+        str(tmp_path / 'data'),
+        str(tmp_path / 'profiles'),
+        lambda name, folder: Profile(name, folder, SizedStore(100), PageModelCache()),
+        memory_budget=250
+    )
+    registry.refresh()
+    alice, bob, carol = (registry.get(name) for name in ('alice', 'bob', 'carol'))
+    registry.snapshot(alice)
+    registry.snapshot(bob)
+    registry.touch(alice)
+
+    # Loading carol takes the total to 300 bytes; bob was used least recently
+    registry.snapshot(carol)
+    assert [profile.is_loaded() for profile in (alice, bob, carol)] == [True, False, True]
+    assert registry.evictions == 1
+    assert registry.stats()['memory_bytes'] == 200
+
+def test_release_frees_the_snapshot_and_the_next_get_reloads(tmp_path):
+    path = tmp_path / 'transactions.csv'
+    write(str(path), 'transaction_date,amount,category,source\n2024-01-01,-5.0,Groceries,Chase\n')
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return pd.read_csv(str(path), parse_dates=['transaction_date'])
+
+    store = TransactionStore(loader, str(path))
+    snapshot = store.get()
+    store.release()
+    assert store.current() is None
+    # The loaded version is kept for HTTP validators while the snapshot is released
+    assert store.version == snapshot.version
+    assert store.get() is not snapshot
+    assert len(loads) == 2
+
+@pytest.fixture(scope='module')
+def profile_app(tmp_path_factory):
+    """The dashboard serving the default profile and alice, each with its own generated transactions."""
+    from asgi_latency_benchmark import generate_enriched_transactions
+
+    work_dir = tmp_path_factory.mktemp('profile_app')
+    totals = {}
+    for name, folder, row_count in (('default', work_dir / 'data', 2000), ('alice', work_dir / 'profiles' / 'alice', 1500)):
+        os.makedirs(folder)
+        df = generate_enriched_transactions(row_count, seed=row_count)
+        df.to_csv(folder / 'consolidated_transactions_enriched.csv', index=False)
+        open(folder / 'consolidated_transactions.csv', 'w').close()
+        totals[name] = int((df['transaction_type'].str.lower() == 'charge').sum())
+
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    os.environ.update({'PROFILES_FOLDER': 'profiles', 'SNAPSHOT_WATCH_SECONDS': '0', 'SHARED_SNAPSHOT_FOLDER': ''})
+    import app
+    app.startup.run()
+    yield app, totals
+    os.chdir(previous_dir)
+
+def test_cached_pages_and_etags_are_not_shared_between_profiles(profile_app):
+    app, totals = profile_app
+    client = app.app.test_client()
+    url = '/api/summary?start_date=2000-01-01&end_date=2030-01-01'
+    # A profile's first request loads its snapshot and is answered without validators
+    client.get(f'{url}&profile=alice')
+
+    default = client.get(url)
+    alice = client.get(f'{url}&profile=alice')
+    assert default.get_json()['total_charges'] == totals['default']
+    assert alice.get_json()['total_charges'] == totals['alice']
+    assert default.headers['ETag'] != alice.headers['ETag']
+
+    # Each profile answers from its own page model cache, even once both are cached
+    assert client.get(url).get_json()['total_charges'] == totals['default']
+    assert client.get(f'{url}&profile=alice').get_json()['total_charges'] == totals['alice']
+    assert app.profiles.get('alice').page_cache.stats()['hits'] >= 1
+
+    # The default profile's validator does not revalidate alice's data, by parameter or by cookie
+    revalidated = client.get(f'{url}&profile=alice', headers={'If-None-Match': default.headers['ETag']})
+    assert revalidated.status_code == 200
+    assert revalidated.get_json()['total_charges'] == totals['alice']
+    client.set_cookie(app.PROFILE_COOKIE, 'alice')
+    by_cookie = client.get(url)
+    assert by_cookie.get_json()['total_charges'] == totals['alice']
+    assert by_cookie.headers['ETag'] != default.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': default.headers['ETag']}).status_code == 200
+    assert client.get(url, headers={'If-None-Match': by_cookie.headers['ETag']}).status_code == 304
@@ -0,0 +1,52 @@
+"""
+Tests for shared snapshots: an attached snapshot holds the published values
+without anything being pickled, and a replaced version is only pruned once
+it has been retired for the grace period.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_snapshot import SharedSnapshots
+
+def transactions(row_count=6):
+    """Transactions with numeric, boolean, datetime, text and missing values."""
+    return pd.DataFrame({
+        'transaction_date': pd.date_range('2024-01-01', periods=row_count),
+        'amount': np.linspace(-50, 50, row_count),
+        'is_recurring': [True, False] * (row_count // 2),
+        'merchant': ['Safeway', 'Amazon', np.nan] * (row_count // 3),
+        'account_id': [1234, 'SOFI-9999'] * (row_count // 2),
+    })
+
+def test_attached_snapshot_matches_without_pickling(tmp_path):
+    df = transactions()
+    shared = SharedSnapshots(str(tmp_path))
+    shared.publish(df, 'v1')
+
+    files = os.listdir(tmp_path / 'v1')
+    assert not any(name.endswith('.values.npy') for name in files)
+    attached = shared.attach('v1')
+    as_values = attached.astype({name: object for name in ('merchant', 'account_id')})
+    pd.testing.assert_frame_equal(as_values, df)
+
+def test_replaced_versions_are_kept_for_the_grace_period(tmp_path):
+    df = transactions()
+    shared = SharedSnapshots(str(tmp_path), grace_seconds=60)
+    for version in ('v1', 'v2', 'v3'):
+        shared.publish(df, version)
+    # v1 was retired moments ago, so a worker that read CURRENT before the swap can still attach
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith('v')) == ['v1', 'v2', 'v3']
+
+    retired_long_ago = time.time() - 120
+    os.utime(tmp_path / 'v1', (retired_long_ago, retired_long_ago))
+    shared.publish(df, 'v4')
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith('v')) == ['v2', 'v3', 'v4']
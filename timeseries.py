@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Time Series
+
+This module serves spending over time at a bounded number of points. Each
+snapshot gets a TimeSeriesIndex that maps every transaction to its day on a
+dense calendar, and every calendar day to its week, month and quarter. A
+series is then one weighted bincount of the matching rows per day, rolled up
+to coarser buckets along those precomputed boundaries, so it costs one pass
+over the matching rows plus one over the calendar, whatever the resolution.
+
+The resolution is picked from the span of the series and a target number of
+points: the finest resolution that fits. A series still longer than the
+target, such as days requested explicitly over several years, is downsampled
+with Largest-Triangle-Three-Buckets (LTTB), which keeps the peaks and troughs
+that give the line its shape.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Finest first
+RESOLUTIONS = ['day', 'week', 'month', 'quarter']
+
+def lttb(x, y, threshold):
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. The points in between are split into
+    threshold - 2 buckets, and each bucket keeps the point forming the largest
+    triangle with the point kept before it and the average of the next bucket.
+
+    Args:
+        x (np.ndarray): Increasing x values
+        y (np.ndarray): Values aligned with x
+        threshold (int): Number of points to keep, at least 3
+
+    Returns:
+        np.ndarray: Positions of the kept points, in increasing order
+    """
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket i covers positions [edges[i], edges[i + 1]); the last point is a bucket of its own
+    edges = np.floor(np.arange(threshold - 1) * (count - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges = np.append(edges, count)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        # Twice the triangle areas; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+class TimeSeriesIndex:
+    """
+    Day positions of a snapshot's transactions and the calendar buckets of each day.
+    """
+
+    def __init__(self, dates):
+        days = pd.to_datetime(dates).dt.normalize()
+        if days.notna().any():
+            self.first_day = days.min()
+            self.day_codes = (days - self.first_day).dt.days.fillna(-1).to_numpy(dtype=np.int64)
+            calendar = pd.date_range(self.first_day, days.max(), freq='D')
+        else:
+            self.first_day = None
+            self.day_codes = np.full(len(days), -1, dtype=np.int64)
+            calendar = pd.DatetimeIndex([])
+
+        # Bucket ordinal and label of every calendar day per resolution
+        week_starts = calendar - pd.to_timedelta(calendar.dayofweek, unit='D')
+        quarters = calendar.year * 4 + calendar.quarter - 1
+        self.bucket_ids = {
+            'day': np.arange(len(calendar)),
+            'week': week_starts.asi8,
+            'month': np.asarray(calendar.year * 12 + calendar.month - 1),
+            'quarter': np.asarray(quarters),
+        }
+        self.labels = {
+            'day': np.asarray(calendar.strftime('%Y-%m-%d'), dtype=object),
+            'week': np.asarray(week_starts.strftime('%Y-%m-%d'), dtype=object),
+            'month': np.asarray(calendar.strftime('%Y-%m'), dtype=object),
+            'quarter': np.asarray([f"{quarter // 4}-Q{quarter % 4 + 1}" for quarter in quarters], dtype=object),
+        }
+        self.day_count = len(calendar)
+
+    def daily_totals(self, rows, values):
+        """
+        Sum values per calendar day over the matching rows.
+
+        Args:
+            rows (np.ndarray): Positions of the matching rows in the snapshot
+            values (np.ndarray): Values of the matching rows, aligned with rows
+
+        Returns:
+            tuple: (daily totals over the whole calendar, first and last day
+                position with a matching row), the span being None without matches
+        """
+        codes = self.day_codes[rows]
+        weights = np.asarray(values, dtype=float)
+        dated = codes >= 0
+        codes, weights = codes[dated], weights[dated]
+        if not len(codes):
+            return np.zeros(self.day_count), None
+        totals = np.bincount(codes, weights=np.nan_to_num(weights), minlength=self.day_count)
+        return totals, (int(codes.min()), int(codes.max()))
+
+    def bucket_starts(self, resolution, first, last):
+        """Positions, relative to first, of the days starting a new bucket between two calendar days."""
+        ids = self.bucket_ids[resolution][first:last + 1]
+        return np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+
+    def choose_resolution(self, first, last, points):
+        """
+        Pick the finest resolution with at most the given number of buckets.
+
+        Args:
+            first (int): First calendar day position
+            last (int): Last calendar day position
+            points (int): Target number of points
+
+        Returns:
+            str: Resolution from RESOLUTIONS; the coarsest when none fits
+        """
+        for resolution in RESOLUTIONS:
+            if len(self.bucket_starts(resolution, first, last)) <= points:
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def series(self, rows, values, resolution='auto', points=180):
+        """
+        Sum values per bucket over the span of the matching rows.
+
+        Args:
+            rows (np.ndarray): Positions of the matching rows in the snapshot
+            values (np.ndarray): Values of the matching rows, aligned with rows
+            resolution (str): One of RESOLUTIONS, or 'auto' to pick one from the span
+            points (int): Maximum number of points; longer series are downsampled with LTTB
+
+        Returns:
+            dict: labels and values arrays, the resolution used and whether
+                the series was downsampled
+        """
+        totals, span = self.daily_totals(rows, values)
+        if span is None:
+            return {'labels': [], 'values': [], 'resolution': 'day' if resolution == 'auto' else resolution, 'downsampled': False}
+
+        first, last = span
+        if resolution == 'auto':
+            resolution = self.choose_resolution(first, last, points)
+        starts = self.bucket_starts(resolution, first, last)
+        bucket_totals = np.add.reduceat(totals[first:last + 1], starts)
+        labels = self.labels[resolution][first + starts]
+
+        downsampled = False
+        if len(starts) > points:
+            kept = lttb(starts, bucket_totals, points)
+            downsampled = len(kept) < len(starts)
+            bucket_totals, labels = bucket_totals[kept], labels[kept]
+        return {
+            'labels': labels.tolist(),
+            'values': bucket_totals.tolist(),
+            'resolution': resolution,
+            'downsampled': downsampled,
+        }
@@ -8,8 +8,13 @@ and additional analysis fields to provide more detailed financial insights.
 
 import os
 import pandas as pd
+import numpy as np
 import re
 from datetime import datetime
+from categorization_rules import get_rules
+from merchant_resolution import MerchantIndex, build_merchant_index
+from insights_summary import materialize_insights_summary
+from pipeline_instrumentation import PipelineProfiler, disabled_profiler
 
 def load_transactions(file_path='data/consolidated_transactions.csv'):
     """
@@ -40,203 +45,33 @@ def determine_subcategory(row):
     category = str(row['category']).lower()
     transaction_type = str(row['transaction_type'])
     
-    # Sub-categories for Groceries
-    if category == 'groceries':
-        if any(store in description for store in ['safeway', 'andronicos']):
-            return 'Supermarket'
-        elif 'costco' in description:
-            return 'Wholesale Club'
-        elif any(store in description for store in ['gus', 'community market', 'lucas market', 'h mart']):
-            return 'Specialty Grocery'
-        elif 'walmart' in description:
-            return 'Grocery Store'
-        else:
-            return 'General Grocery'
-    
-    # Sub-categories for Shopping
-    elif category == 'shopping':
-        if any(keyword in description for keyword in ['amazon', 'mktpl']):
-            return 'Online Marketplace'
-        elif any(keyword in description for keyword in ['nord', 'sephora']):
-            return 'Department Store'
-        elif 'apple' in description:
-            return 'Electronics'
-        elif any(keyword in description for keyword in ['vpn', 'chatgpt', 'openai', 'cursor']):
-            return 'Software Subscription'
-        elif 'nintendo' in description:
-            return 'Gaming'
-        elif 'tips' in description:
-            return 'Service Tips'
-        else:
-            return 'General Shopping'
-    
-    # Sub-categories for Food & Drink
-    elif category == 'food & drink':
-        if any(keyword in description for keyword in ['doordash', 'uber eats', 'rappi']):
-            return 'Food Delivery'
-        elif any(keyword in description for keyword in ['pizza', 'taco']):
-            return 'Fast Food'
-        elif any(keyword in description for keyword in ['restaurant', 'grill', 'café', 'cafe', 'breakfast']):
-            return 'Restaurant'
-        elif any(keyword in description for keyword in ['el torito', 'the grill', 'rosamunde', 'angies']):
-            return 'Sit-down Restaurant'
-        else:
-            return 'Dining'
-    
-    # Sub-categories for Bills & Utilities
-    elif category == 'bills & utilities':
-        if 'pg&e' in description:
-            return 'Electricity/Gas'
-        elif any(keyword in description for keyword in ['spotify', 'hulu', 'prime', 'video']):
-            return 'Streaming Services'
-        elif any(keyword in description for keyword in ['internet', 'cable']):
-            return 'Internet/Cable'
-        else:
-            return 'General Utilities'
-    
-    # Sub-categories for Entertainment
-    elif category == 'entertainment':
-        if any(keyword in description for keyword in ['steam', 'game', 'nintendo']):
-            return 'Video Games'
-        elif any(keyword in description for keyword in ['youtube', 'spotify']):
-            return 'Streaming'
-        elif 'ticketmaster' in description:
-            return 'Events/Concerts'
-        else:
-            return 'General Entertainment'
-    
-    # Sub-categories for Direct Payment
-    elif category == 'direct payment':
-        if 'robinhood' in description:
-            return 'Investment Platform'
-        elif 'education' in description:
-            return 'Education Payment'
-        elif 'venmo' in description:
-            return 'P2P Payment'
-        elif 'dept education' in description:
-            return 'Student Loan'
-        else:
-            return 'Other Payment'
-    
-    # Sub-categories for Health & Wellness
-    elif category == 'health & wellness':
-        if 'classpass' in description:
-            return 'Fitness Membership'
-        else:
-            return 'General Health'
-    
-    # Sub-categories for Travel
-    elif category == 'travel':
-        if 'lyft' in description:
-            return 'Rideshare'
-        elif 'uber' in description and 'eats' not in description:
-            return 'Rideshare'
-        else:
-            return 'General Travel'
-    
-    # Sub-categories for Education
-    elif category == 'education':
-        if 'coursera' in description:
-            return 'Online Course'
-        else:
-            return 'General Education'
-            
-    # Sub-categories for Transaction Types
-    if transaction_type == 'Credit Payment Sent':
-        if 'chase' in description:
-            return 'Chase Credit Card Payment'
-        elif 'amex' in description:
-            return 'Amex Credit Card Payment'
-        else:
-            return 'Other Credit Card Payment'
-            
-    elif transaction_type == 'Credit Payment Received':
-        if 'mobile' in description:
-            return 'Mobile Payment Received'
-        else:
-            return 'Credit Card Payment Received'
-            
-    elif transaction_type == 'Income':
-        if 'xpo cnw' in description:
-            return 'Salary/Wages'
-        elif 'interest' in description:
-            return 'Interest Income'
-        elif any(keyword in description for keyword in ['refund', 'tourist']):
-            return 'Refund Income'
-        elif any(keyword in description for keyword in ['transfer', 'to']):
-            return 'Internal Transfer'
-        else:
-            return 'Other Income'
-            
-    elif transaction_type == 'Refund':
-        if 'payment' in description:
-            return 'Payment Refund'
-        elif any(keyword in description for keyword in ['uber', 'paypal']):
-            return 'Service Refund'
-        else:
-            return 'Purchase Refund'
-            
-    elif transaction_type in ['Transfer', 'Incoming Transfer', 'Outgoing Transfer']:
-        # Common subcategories for all transfer types
-        if 'vault' in description or 'to house' in description:
-            return 'Savings Transfer'
-        elif any(bank in description.lower() for bank in ['wells fargo', 'chase', 'bank of america', 'sofi bank']):
-            return 'Bank Transfer'
-        
-        # Directional subcategories
-        if transaction_type == 'Incoming Transfer':
-            return 'Incoming Bank Transfer'
-        elif transaction_type == 'Outgoing Transfer':
-            return 'Outgoing Bank Transfer'
-        else:
-            return 'Account Transfer'
-            
-    elif transaction_type == 'Charge':
-        if 'wells fargo' in description:
-            return 'Bank Withdrawal'
-        
-    # Default sub-category
-    return 'General'
+    return get_rules().subcategory(description, category, transaction_type)
 
-def add_merchant_name(description):
+def determine_subcategories(df):
     """
-    Extract a simplified merchant name from the description.
+    Determine subcategories for all transactions, evaluating the rules once per
+    unique (description, category, transaction type) combination.
     
     Args:
-        description: Transaction description string
+        df (pd.DataFrame): Transaction DataFrame
         
     Returns:
-        str: Extracted merchant name
+        pd.Series: Sub-category for each transaction
     """
-    description = str(description)
-    
-    # Common patterns to clean up
-    patterns = [
-        # Remove common prefixes
-        (r'^(SQ|TST|DD|PP|PAYPAL|MOBILE|AMEX)\s*\*\s*', ''),
-        # Remove transaction identifiers
-        (r'\b[A-Z0-9]{6,}\b', ''),
-        # Remove dates and numbers at the end
-        (r'\s+\d{1,2}[-/]\d{1,2}(\s|$)', ' '),
-        # Remove common suffixes
-        (r'\s+(help.uber.com|8005928996|com|inc).*$', ''),
-        # Remove special characters
-        (r'[*]', '')
-    ]
-    
-    # Apply all cleanup patterns
-    clean_name = description
-    for pattern, replacement in patterns:
-        clean_name = re.sub(pattern, replacement, clean_name, flags=re.IGNORECASE)
-    
-    # Additional cleanup
-    clean_name = clean_name.strip()
-    
-    # If empty after cleaning, use the original description
-    if not clean_name:
-        return description
-    
-    return clean_name
+    rules = get_rules()
+    keys = pd.MultiIndex.from_arrays([
+        df['description'].astype(str),
+        df['category'].astype(str),
+        df['transaction_type'].astype(str)
+    ])
+    codes, uniques = pd.factorize(keys)
+    
+    subcategories = np.array(
+        [rules.subcategory(description.lower(), category.lower(), transaction_type)
+         for description, category, transaction_type in uniques],
+        dtype=object
+    )
+    return pd.Series(subcategories[codes], index=df.index)
 
 def add_transaction_month(date):
     """
@@ -299,15 +134,11 @@ def identify_recurring_transactions(df):
     df_recurring['recurring_frequency'] = None
     
     # Look for common subscription services in descriptions
-    subscription_keywords = [
-        'netflix', 'spotify', 'hulu', 'prime', 'youtube', 'disney+', 'chatgpt', 
-        'subscription', 'monthly', 'classpass', 'internet', 'bill', 'utilities',
-        'insurance', 'membership', 'mobile', 'wireless', 'openai', 'robinhood'
-    ]
+    subscription_pattern = get_rules().patterns['subscription_keywords']
     
     # Mark transactions with subscription keywords as recurring
     subscription_mask = df_recurring['description'].str.lower().str.contains(
-        '|'.join(subscription_keywords), na=False
+        subscription_pattern, na=False
     )
     df_recurring.loc[subscription_mask, 'is_recurring'] = True
     df_recurring.loc[subscription_mask, 'recurring_frequency'] = 'Monthly (Probable)'
@@ -362,46 +193,66 @@ def categorize_spending_type(row):
     Returns:
         str: Spending type (Discretionary, Non-discretionary, Income, Transfer)
     """
-    # Skip non-spending transactions
-    if row['transaction_type'] in ['Income', 'Credit Payment Received', 'Refund']:
-        return 'Income/Refund'
-    
-    if row['transaction_type'] in ['Credit Payment Sent']:
-        return 'Credit Payment'
-    
-    # Handle transfers directly from transaction type
-    if row['transaction_type'] in ['Transfer', 'Incoming Transfer', 'Outgoing Transfer']:
-        return 'Transfer'
-    
-    # Check sub-category first
-    sub_category = str(row['subcategory']).lower()
-    
-    # These are transfers, not spending
-    if any(keyword in sub_category for keyword in ['transfer', 'withdrawal', 'bank', 'savings transfer']):
-        return 'Transfer'
-    
-    # Essential/Non-discretionary categories
-    non_discretionary_subcats = [
-        'electricity', 'gas', 'internet', 'cable', 'utilities', 
-        'supermarket', 'grocery', 'student loan', 'health', 'insurance'
-    ]
-    
-    if any(keyword in sub_category for keyword in non_discretionary_subcats):
-        return 'Non-discretionary'
-    
-    # Now check main category
-    category = str(row['category']).lower()
-    
-    non_discretionary_cats = [
-        'bills & utilities', 'groceries', 'health & wellness', 
-        'education', 'essential services'
-    ]
+    return get_rules().spending_type(
+        str(row['transaction_type']),
+        str(row['subcategory']).lower(),
+        str(row['category']).lower()
+    )
+
+def categorize_spending_types(df):
+    """
+    Categorize spending for all transactions, evaluating the rules once per
+    unique (transaction type, subcategory, category) combination.
     
-    if any(keyword in category for keyword in non_discretionary_cats):
-        return 'Non-discretionary'
+    Args:
+        df (pd.DataFrame): Transaction DataFrame with a subcategory column
+        
+    Returns:
+        pd.Series: Spending type for each transaction
+    """
+    rules = get_rules()
+    keys = pd.MultiIndex.from_arrays([
+        df['transaction_type'].astype(str),
+        df['subcategory'].astype(str),
+        df['category'].astype(str)
+    ])
+    codes, uniques = pd.factorize(keys)
+    
+    spending_types = np.array(
+        [rules.spending_type(transaction_type, subcategory.lower(), category.lower())
+         for transaction_type, subcategory, category in uniques],
+        dtype=object
+    )
+    return pd.Series(spending_types[codes], index=df.index)
+
+def description_matcher(descriptions):
+    """
+    Build a case-insensitive regex matcher that evaluates each pattern once per
+    unique description and broadcasts the result back to every row.
     
-    # Default is discretionary
-    return 'Discretionary'
+    Args:
+        descriptions (pd.Series): Transaction descriptions
+        
+    Returns:
+        callable: Function mapping a regex pattern to a boolean mask
+    """
+    codes, uniques = pd.factorize(descriptions)
+    uniques = [value if isinstance(value, str) else None for value in uniques]
+    cache = {}
+    
+    def contains(pattern):
+        if pattern not in cache:
+            regex = re.compile(pattern, flags=re.IGNORECASE)
+            hits = np.fromiter(
+                (value is not None and regex.search(value) is not None for value in uniques),
+                dtype=bool, count=len(uniques)
+            )
+            # Missing descriptions are factorized to -1, which maps to the trailing False
+            hits = np.append(hits, False)
+            cache[pattern] = pd.Series(hits[codes], index=descriptions.index)
+        return cache[pattern]
+    
+    return contains
 
 def determine_transaction_type(df):
     """
@@ -415,6 +266,9 @@ def determine_transaction_type(df):
     - Income: Money received as income, salary, direct deposits
     - Refund: Refunded money from previous purchases
     """
+    rules = get_rules()
+    description_contains = description_matcher(df['description'])
+    
     # Initialize with default value
     df['transaction_type'] = 'Charge'
     
@@ -427,86 +281,76 @@ def determine_transaction_type(df):
     # unless they're transfers from other accounts
     general_deposit_mask = (df['account_type'] == 'Checkings') & \
                           (df['category'] == 'Deposit') & \
-                          ~df['description'].str.contains('transfer|xfer|zelle|venmo', case=False, na=False)
+                          ~description_contains(rules.patterns['deposit_transfer_keywords'])
     df.loc[general_deposit_mask, 'transaction_type'] = 'Income'
     
     # Income-like descriptions (e.g., payroll, salary, interest)
-    income_keywords = ['inc', 'salary', 'payroll', 'direct dep', 'dd ', 'interest earned', 
-                       'cashback', 'dividend', 'tax refund', 'commission']
-    income_pattern = '|'.join(income_keywords)
+    income_pattern = rules.patterns['income_keywords']
     
-    income_desc_mask = df['description'].str.contains(income_pattern, case=False, na=False)
+    income_desc_mask = description_contains(income_pattern)
     df.loc[income_desc_mask, 'transaction_type'] = 'Income'
     
     # Identify transfers to/from savings vaults or between accounts
-    transfer_keywords = ['vault', 'to house', 'savings', 'transfer to', 'move to', 'moved to', 
-                       'transfer', 'xfer', 'zelle', 'venmo', 'bank2bank', 'from bank']
-    transfer_pattern = '|'.join(transfer_keywords)
+    transfer_pattern = rules.patterns['transfer_keywords']
     
     # NEW: Identify refund transactions
-    refund_keywords = ['refund', 'reembolso', 'credit adj', 'credit adjustment', 'returned purchase', 
-                      'returned item', 'return of purchase', 'chargeback']
-    refund_pattern = '|'.join(refund_keywords)
+    refund_pattern = rules.patterns['refund_keywords']
     
     # Refund mask - applies to both credit cards and checking accounts
-    refund_mask = df['description'].str.contains(refund_pattern, case=False, na=False)
+    refund_mask = description_contains(refund_pattern)
     df.loc[refund_mask, 'transaction_type'] = 'Refund'
     
     # Identify transfers from checking accounts - negative amount means money leaving (outgoing)
     outgoing_transfer_mask = (df['account_type'] == 'Checkings') & \
                            (df['amount'] < 0) & \
-                           (df['description'].str.contains(transfer_pattern, case=False))
+                           (description_contains(transfer_pattern))
     
     df.loc[outgoing_transfer_mask, 'transaction_type'] = 'Outgoing Transfer'
     
     # Identify transfers to checking accounts - positive amount means money coming in (incoming)
     incoming_transfer_mask = (df['account_type'] == 'Checkings') & \
                            (df['amount'] > 0) & \
-                           (df['description'].str.contains(transfer_pattern, case=False))
+                           (description_contains(transfer_pattern))
     
     df.loc[incoming_transfer_mask, 'transaction_type'] = 'Incoming Transfer'
     
     # Identify credit card payments from checking accounts
     # These are typically outgoing payments (positive amounts) from checking accounts to credit cards
-    credit_card_keywords = ['chase', 'amex', 'american express', 'citi', 'discover', 'capital one', 
-                          'mastercard', 'visa', 'credit card', 'credit payment', 'card payment', 'epay']
-    credit_payment_pattern = '|'.join(credit_card_keywords)
+    credit_payment_pattern = rules.patterns['credit_card_keywords']
     
     # Special case for Wells Fargo "ONLINE TRANSFER TO" that reference credit cards
     # These should be identified as credit payments, not transfers
     wells_fargo_online_credit_payment_mask = (df['source'].str.contains('WellsFargo', case=False)) & \
                                      (df['amount'] < 0) & \
-                                     ((df['description'].str.contains('ONLINE TRANSFER TO', case=False)) |
-                                      (df['description'].str.contains('ONLINE TRANSFER.*TO', case=False, regex=True))) & \
-                                     (df['description'].str.contains(credit_payment_pattern, case=False))
+                                     ((description_contains('ONLINE TRANSFER TO')) |
+                                      (description_contains('ONLINE TRANSFER.*TO'))) & \
+                                     (description_contains(credit_payment_pattern))
     
     # Special case for Wells Fargo "ONLINE TRANSFER TO" - these are outgoing transfers with negative amounts
     # BUT exclude credit card payments we've identified above
     wells_fargo_online_transfer_out_mask = (df['source'].str.contains('WellsFargo', case=False)) & \
                                      (df['amount'] < 0) & \
-                                     ((df['description'].str.contains('ONLINE TRANSFER TO', case=False)) |
-                                      (df['description'].str.contains('ONLINE TRANSFER.*TO', case=False, regex=True))) & \
-                                     ~(df['description'].str.contains(credit_payment_pattern, case=False))
+                                     ((description_contains('ONLINE TRANSFER TO')) |
+                                      (description_contains('ONLINE TRANSFER.*TO'))) & \
+                                     ~(description_contains(credit_payment_pattern))
     
     df.loc[wells_fargo_online_transfer_out_mask, 'transaction_type'] = 'Outgoing Transfer'
     
     # PayPal charges for Wells Fargo (negative amounts that are not transfers but payments for services)
     wells_fargo_paypal_charge_mask = (df['source'].str.contains('WellsFargo', case=False)) & \
                                      (df['amount'] < 0) & \
-                                     (df['description'].str.contains('PAYPAL', case=False)) & \
-                                     ~(df['description'].str.contains('transfer from|payment from', case=False))
+                                     (description_contains('PAYPAL')) & \
+                                     ~(description_contains('transfer from|payment from'))
                                      
     df.loc[wells_fargo_paypal_charge_mask, 'transaction_type'] = 'Charge'
     
     # For transactions between different banks that are identified by bank name:
-    bank_keywords = ['sofi bank', 'wells fargo', 'chase bank', 'bank of america', 'citi bank', 
-                    'wells fargo bank', 'bank na', 'jpmorgan chase', 'citibank', 'us bank']
-    bank_transfer_pattern = '|'.join(bank_keywords)
+    bank_transfer_pattern = rules.patterns['bank_keywords']
     
     # Identify bank-to-bank transfers
     bank_transfer_mask = (df['account_type'] == 'Checkings') & \
-                        (df['description'].str.contains(bank_transfer_pattern, case=False)) & \
-                        (df['description'].str.contains('transfer', case=False))
+                        (description_contains(bank_transfer_pattern)) & \
+                        (description_contains('transfer'))
     
     # For bank transfers, determine direction based on amount sign
     outgoing_bank_transfer_mask = bank_transfer_mask & (df['amount'] < 0)
@@ -516,11 +360,11 @@ def determine_transaction_type(df):
                         
     # Identify bank withdrawals and deposits (without explicit transfer keyword)
     bank_withdrawal_mask = (df['account_type'] == 'Checkings') & \
-                          (df['description'].str.contains(bank_transfer_pattern, case=False)) & \
+                          (description_contains(bank_transfer_pattern)) & \
                           (df['category'] == 'Withdrawal')
     
     bank_deposit_mask = (df['account_type'] == 'Checkings') & \
-                       (df['description'].str.contains(bank_transfer_pattern, case=False)) & \
+                       (description_contains(bank_transfer_pattern)) & \
                        (df['category'] == 'Deposit')
     
     # For SoFi, bank withdrawals (money leaving) are positive and deposits (money coming in) are negative
@@ -536,7 +380,7 @@ def determine_transaction_type(df):
                         (df['account_type'] == 'Checkings') & \
                         ~all_outgoing_transfer_mask & \
                         ~all_incoming_transfer_mask & \
-                        (df['description'].str.contains(credit_payment_pattern, case=False))
+                        (description_contains(credit_payment_pattern))
     
     # Special case for Wells Fargo - their outgoing credit card payments have negative amounts
     wells_fargo_credit_payment_mask = (df['amount'] < 0) & \
@@ -545,20 +389,20 @@ def determine_transaction_type(df):
                                    ~incoming_transfer_mask & \
                                    ~all_outgoing_transfer_mask & \
                                    ~all_incoming_transfer_mask & \
-                                   (df['description'].str.contains(credit_payment_pattern, case=False) | 
-                                   df['description'].str.contains('credit crd epay', case=False))
+                                   (description_contains(credit_payment_pattern) | 
+                                   description_contains('credit crd epay'))
     
     # Special case for Wells Fargo ONLINE TRANSFER to credit cards - these should also be credit payments
     wells_fargo_online_credit_payment_mask = (df['source'].str.contains('WellsFargo', case=False)) & \
                                          (df['amount'] < 0) & \
-                                         (df['description'].str.contains('ONLINE TRANSFER', case=False)) & \
-                                         (df['description'].str.contains(credit_payment_pattern, case=False))
+                                         (description_contains('ONLINE TRANSFER')) & \
+                                         (description_contains(credit_payment_pattern))
     
     # Special case for Wells Fargo bill payments - they also have negative amounts but should be charges
     wells_fargo_bill_payment_mask = (df['amount'] < 0) & \
                                   (df['account_type'] == 'Checkings') & \
                                   (df['source'].str.contains('WellsFargo', case=False)) & \
-                                  (df['description'].str.contains('bill pay', case=False))
+                                  (description_contains('bill pay'))
     
     df.loc[credit_payment_mask, 'transaction_type'] = 'Credit Payment Sent'
     df.loc[wells_fargo_credit_payment_mask, 'transaction_type'] = 'Credit Payment Sent'
@@ -569,13 +413,12 @@ def determine_transaction_type(df):
     
     # NEW: Identify payments received on credit cards
     # These typically have negative amounts and descriptions containing payment-related terms
-    payment_keywords = ['payment', 'thank you', 'pymt', 'autopay', 'automatic payment', 'web payment']
-    payment_pattern = '|'.join(payment_keywords)
+    payment_pattern = rules.patterns['payment_keywords']
     
     # Credit card payment received mask (for credit card accounts)
     credit_payment_received_mask = (df['account_type'] == 'Credit Card') & \
                                  (df['amount'] < 0) & \
-                                 (df['description'].str.contains(payment_pattern, case=False))
+                                 (description_contains(payment_pattern))
     
     df.loc[credit_payment_received_mask, 'transaction_type'] = 'Credit Payment Received'
     
@@ -636,42 +479,69 @@ def normalize_transaction_signs(df):
     
     return df
 
-def enrich_transactions(df):
+def enrich_transactions(df, merchant_index=None, profiler=None):
     """
     Enrich the transaction data by adding sub-categories, merchant name, etc.
-    """
-    # First determine the transaction type
-    df = determine_transaction_type(df)
-    
-    df['subcategory'] = df.apply(lambda row: determine_subcategory(row), axis=1)
-    
-    # Extract merchant name from description
-    df['merchant'] = df['description'].apply(add_merchant_name)
-    
-    # Identify recurring transactions
-    df = identify_recurring_transactions(df)
     
-    # Determine if transaction is discretionary or not
-    df['spending_type'] = df.apply(lambda row: categorize_spending_type(row), axis=1)
-    
-    # Normalize transaction signs to be more intuitive
-    df = normalize_transaction_signs(df)
-    
-    # Add absolute amount for easier analysis
-    df['absolute_amount'] = df['amount'].abs()
+    Args:
+        df (pd.DataFrame): Consolidated transactions
+        merchant_index (MerchantIndex): Merchant resolution index. When omitted, one is
+            built from the descriptions in df.
+        profiler (PipelineProfiler): Optional profiler recording each enrichment stage
     
-    # Add amount category based on transaction size
-    df['amount_category'] = pd.cut(
-        df['absolute_amount'],
-        bins=[0, 10, 50, 100, 250, 500, 1000, float('inf')],
-        labels=['Under $10', '$10-$50', '$50-$100', '$100-$250', '$250-$500', '$500-$1000', 'Over $1000'],
-        right=False
-    )
+    Returns:
+        pd.DataFrame: Enriched transactions
+    """
+    if profiler is None:
+        profiler = disabled_profiler()
     
-    # Add time-based features
-    df['transaction_month'] = df['transaction_date'].apply(lambda x: x.strftime('%Y-%m'))
-    df['day_of_week'] = df['transaction_date'].apply(add_transaction_day_of_week)
-    df['is_weekend'] = df['transaction_date'].apply(add_is_weekend)
+    with profiler.stage('enrich_transactions', rows_in=len(df)) as pipeline_stage:
+        # First determine the transaction type
+        with profiler.stage('determine_transaction_type', rows_in=len(df)):
+            df = determine_transaction_type(df)
+        
+        with profiler.stage('determine_subcategories', rows_in=len(df)):
+            df['subcategory'] = determine_subcategories(df)
+        
+        # Resolve descriptions to canonical merchants
+        with profiler.stage('resolve_merchants', rows_in=len(df)):
+            if merchant_index is None:
+                merchant_index = MerchantIndex.build(df['description'])
+            resolved = merchant_index.resolve(df['description'])
+            df['merchant_id'] = resolved['merchant_id']
+            df['merchant'] = resolved['merchant']
+        
+        # Identify recurring transactions
+        with profiler.stage('identify_recurring_transactions', rows_in=len(df)):
+            df = identify_recurring_transactions(df)
+        
+        # Determine if transaction is discretionary or not
+        with profiler.stage('categorize_spending_types', rows_in=len(df)):
+            df['spending_type'] = categorize_spending_types(df)
+        
+        # Normalize transaction signs to be more intuitive
+        with profiler.stage('normalize_transaction_signs', rows_in=len(df)):
+            df = normalize_transaction_signs(df)
+        
+        with profiler.stage('amount_categories', rows_in=len(df)):
+            # Add absolute amount for easier analysis
+            df['absolute_amount'] = df['amount'].abs()
+            
+            # Add amount category based on transaction size
+            df['amount_category'] = pd.cut(
+                df['absolute_amount'],
+                bins=[0, 10, 50, 100, 250, 500, 1000, float('inf')],
+                labels=['Under $10', '$10-$50', '$50-$100', '$100-$250', '$250-$500', '$500-$1000', 'Over $1000'],
+                right=False
+            )
+        
+        # Add time-based features
+        with profiler.stage('time_features', rows_in=len(df)):
+            df['transaction_month'] = df['transaction_date'].apply(lambda x: x.strftime('%Y-%m'))
+            df['day_of_week'] = df['transaction_date'].apply(add_transaction_day_of_week)
+            df['is_weekend'] = df['transaction_date'].apply(add_is_weekend)
+        
+        pipeline_stage.rows_out = len(df)
     
     return df
 
@@ -679,15 +549,34 @@ def main():
     """
     Main function to run the transaction enrichment process.
     """
-    print("Loading transactions...")
-    transactions_df = load_transactions()
-    
-    print(f"Enriching {len(transactions_df)} transactions...")
-    enriched_df = enrich_transactions(transactions_df)
-    
-    # Save enriched transactions to a new file
-    enriched_df.to_csv('data/consolidated_transactions_enriched.csv', index=False)
-    print(f"Saved enriched transactions to data/consolidated_transactions_enriched.csv")
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    with PipelineProfiler('transaction_enrichment') as profiler:
+        profiler.metadata['rules_version'] = get_rules().version
+    
+        print("Loading transactions...")
+        with profiler.stage('load_transactions') as stage:
+            transactions_df = load_transactions()
+            stage.rows_out = len(transactions_df)
+    
+        print("Resolving merchants...")
+        with profiler.stage('build_merchant_index', rows_in=len(transactions_df)) as stage:
+            merchant_index = build_merchant_index(transactions_df['description'])
+            stage.rows_out = len(merchant_index)
+    
+        print(f"Enriching {len(transactions_df)} transactions...")
+        enriched_df = enrich_transactions(transactions_df, merchant_index=merchant_index, profiler=profiler)
+    
+        # Materialize the insights page summary, then save enriched transactions to a new file
+        with profiler.stage('materialize_insights_summary', rows_in=len(enriched_df)):
+            materialize_insights_summary(enriched_df)
+        with profiler.stage('save_enriched_transactions', rows_in=len(enriched_df)):
+            enriched_df.to_csv('data/consolidated_transactions_enriched.csv', index=False)
+        print(f"Saved enriched transactions to data/consolidated_transactions_enriched.csv")
+    
+        profiler.print_summary()
+        print(f"Saved pipeline report to {profiler.save_report()}")
     
     # Generate some statistics about the enriched data
     print("\n--- Enrichment Results ---")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Transaction Query
+
+This module provides the filter engine shared by the web app's routes. A query
+is built once from the request parameters. Filters on categorical columns
+resolve through the snapshot's bitmap indexes and may list several values,
+which match as OR. Other filters are evaluated as boolean masks, reused from the
+snapshot's mask cache when the same predicate was evaluated before. The masks
+are combined in one pass and the matching rows are selected once.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Request parameter -> query attribute
+QUERY_PARAMETERS = {
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'type': 'transaction_type',
+    'category': 'category',
+    'source': 'source',
+    'account_id': 'account_id',
+    'min_amount': 'min_amount',
+    'max_amount': 'max_amount',
+    'refund_status': 'refund_status',
+    'description': 'description',
+    'merchant': 'merchant',
+}
+
+# Query attributes matched by value through bitmap indexes, all named after their column
+CATEGORICAL_FILTERS = ['transaction_type', 'category', 'source', 'account_id', 'refund_status', 'merchant']
+
+def _filter_values(value, normalize=None):
+    """Normalize a categorical filter to a tuple of values, or None when unset."""
+    values = [value] if isinstance(value, str) else list(value or [])
+    values = tuple(normalize(v) if normalize else v for v in values if v)
+    return values or None
+
+def query_arguments(args, **defaults):
+    """
+    Read the query attributes from request parameters.
+
+    Repeated categorical parameters become tuples, so the result can be used
+    as a cache key as well as to build a TransactionQuery.
+
+    Args:
+        args (dict): Request arguments, e.g. request.args; repeated
+            categorical parameters match any of their values
+        **defaults: Query attributes used when the parameter is absent
+
+    Returns:
+        dict: Query attribute -> raw value
+    """
+    values = dict(defaults)
+    for parameter, attribute in QUERY_PARAMETERS.items():
+        if parameter in args:
+            if attribute in CATEGORICAL_FILTERS and hasattr(args, 'getlist'):
+                values[attribute] = tuple(args.getlist(parameter))
+            else:
+                values[attribute] = args.get(parameter)
+    return values
+
+def _parse_amount(value):
+    """Parse an amount bound, treating empty or malformed values as unset."""
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+class TransactionQuery:
+    """
+    Filters over a transaction snapshot, combined with AND.
+
+    Empty values leave a filter unset. Categorical filters take a value or a
+    list of values, any of which may match. Transaction types match
+    case-insensitively, the description filter matches case-insensitive
+    substrings of the description or additional details, and a refund status of
+    'all' matches everything.
+    """
+
+    def __init__(self, start_date=None, end_date=None, transaction_type=None, category=None, source=None,
+                 min_amount=None, max_amount=None, refund_status=None, description=None, merchant=None,
+                 account_id=None):
+        self.start_date = start_date or None
+        self.end_date = end_date or None
+        self.transaction_type = _filter_values(transaction_type, str.lower)
+        self.category = _filter_values(category)
+        self.source = _filter_values(source)
+        self.account_id = _filter_values(account_id)
+        self.min_amount = _parse_amount(min_amount)
+        self.max_amount = _parse_amount(max_amount)
+        refund_status = _filter_values(refund_status)
+        self.refund_status = refund_status if refund_status and 'all' not in refund_status else None
+        self.description = description.lower() if description else None
+        self.merchant = _filter_values(merchant)
+
+    @classmethod
+    def from_args(cls, args, **defaults):
+        """
+        Build a query from request parameters.
+
+        Args:
+            args (dict): Request arguments, e.g. request.args; repeated
+                categorical parameters match any of their values
+            **defaults: Query attributes used when the parameter is absent
+
+        Returns:
+            TransactionQuery: Query over the given filters
+        """
+        return cls(**query_arguments(args, **defaults))
+
+    def categorical_filters(self):
+        """
+        List the set categorical filters.
+
+        Returns:
+            dict: Column -> tuple of accepted values
+        """
+        return {column: getattr(self, column) for column in CATEGORICAL_FILTERS if getattr(self, column)}
+
+    def predicates(self):
+        """
+        List the set non-categorical filters as cacheable predicates.
+
+        Returns:
+            list: (cache key, function computing the mask from a snapshot) pairs
+        """
+        predicates = []
+        if self.start_date:
+            start = pd.to_datetime(self.start_date)
+            predicates.append((('date>=', start), lambda snapshot: snapshot.df['transaction_date'] >= start))
+        if self.end_date:
+            end = pd.to_datetime(self.end_date)
+            predicates.append((('date<=', end), lambda snapshot: snapshot.df['transaction_date'] <= end))
+        if self.min_amount is not None:
+            predicates.append((('amount>=', self.min_amount), lambda snapshot: snapshot.df['amount'] >= self.min_amount))
+        if self.max_amount is not None:
+            predicates.append((('amount<=', self.max_amount), lambda snapshot: snapshot.df['amount'] <= self.max_amount))
+        if self.description:
+            predicates.append((('description', self.description), lambda snapshot: snapshot.search_index.mask(self.description)))
+        return predicates
+
+    def mask(self, snapshot):
+        """
+        Evaluate the query as one boolean mask.
+
+        Args:
+            snapshot (TransactionSnapshot): Snapshot to filter
+
+        Returns:
+            np.ndarray: Boolean mask aligned with snapshot rows
+        """
+        filters = self.categorical_filters()
+        mask = snapshot.bitmap_index.mask(filters) if filters else np.ones(len(snapshot.df), dtype=bool)
+        for key, compute in self.predicates():
+            mask &= snapshot.predicate_mask(key, compute)
+        return mask
+
+    def rows(self, snapshot):
+        """Row positions of matching transactions in snapshot order."""
+        return np.flatnonzero(self.mask(snapshot))
+
+    def apply(self, snapshot):
+        """
+        Select the matching transactions.
+
+        Args:
+            snapshot (TransactionSnapshot): Snapshot to filter
+
+        Returns:
+            pd.DataFrame: Matching rows of the shared snapshot; copy before modifying
+        """
+        return snapshot.df.iloc[self.rows(snapshot)]
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Transaction Store
+
+This module keeps the enriched transactions loaded in memory as an immutable
+snapshot shared by the web app's requests, together with structures derived
+from it once per snapshot: distinct filter values, bitmap and text search
+indexes and cached masks for filters, sort indexes used for keyset
+pagination, the calendar index behind time series, the rolling spending
+totals and the per-merchant row index. Once loaded, the snapshot is served
+without touching the enriched file; TransactionStore.refresh() swaps in a
+new snapshot when the file has changed, optionally through a shared
+snapshot published once for all worker processes (see shared_snapshot.py).
+When the new file only appends transactions, the rolling totals are
+extended rather than rebuilt.
+"""
+
+import os
+import json
+import time
+import base64
+import binascii
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from bitmap_index import BitmapIndex
+from search_index import SearchIndex
+from timeseries import TimeSeriesIndex
+from rolling_metrics import RollingMetrics
+from merchant_index import MerchantIndex
+from page_cache import estimate_size
+
+# Sortable columns for paginated views: request name -> transaction column
+SORT_COLUMNS = {
+    'date': 'transaction_date',
+    'amount': 'amount',
+    'description': 'description',
+    'merchant': 'merchant',
+    'category': 'category',
+    'source': 'source',
+}
+
+# Categorical filter dimensions resolved through bitmap indexes
+BITMAP_COLUMNS = ['category', 'source', 'account_id', 'transaction_type', 'refund_status', 'merchant']
+
+# Text columns searched by the description filter
+SEARCH_COLUMNS = ['description', 'additional_details']
+
+# Filter masks kept per snapshot, least recently used evicted first
+MASK_CACHE_SIZE = 64
+
+# Low-cardinality text columns exported as categoricals (dictionary-encoded in Arrow)
+CATEGORICAL_COLUMNS = [
+    'category', 'source', 'account_id', 'account_type', 'transaction_type', 'subcategory',
+    'merchant', 'merchant_id', 'spending_type', 'amount_category', 'recurring_frequency',
+    'transaction_month', 'day_of_week', 'refund_status',
+]
+
+class SortIndex:
+    """
+    Ascending order of the snapshot by (sort key, transaction ID).
+
+    Descending order is the exact reverse, so one index serves both directions
+    and a cursor (sort key, transaction ID) can be located with binary search.
+    """
+
+    def __init__(self, keys):
+        # Transaction IDs are row positions, so a stable sort breaks ties by ID
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+        self.count = len(keys)
+
+    def _rank(self, key, transaction_id, side):
+        """Number of rows ordered before the cursor ('left') or up to and including it ('right')."""
+        low = np.searchsorted(self.sorted_keys, key, side='left')
+        high = np.searchsorted(self.sorted_keys, key, side='right')
+        return int(low + np.searchsorted(self.order[low:high], transaction_id, side=side))
+
+    def start_after(self, key, transaction_id, descending):
+        """Position in the requested direction of the first row after the cursor."""
+        if descending:
+            return self.count - self._rank(key, transaction_id, 'left')
+        return self._rank(key, transaction_id, 'right')
+
+    def end_before(self, key, transaction_id, descending):
+        """Position in the requested direction of the cursor row, i.e. the end of the rows before it."""
+        if descending:
+            return self.count - self._rank(key, transaction_id, 'right')
+        return self._rank(key, transaction_id, 'left')
+
+    def validate_cursor(self, cursor):
+        """
+        Check that a decoded cursor's key is comparable with this index.
+
+        Args:
+            cursor (tuple): (key, transaction_id) from decode_cursor, or None
+
+        Returns:
+            tuple: The cursor with its key converted to the index dtype, or None if it does not fit
+        """
+        if cursor is None:
+            return None
+        try:
+            key = np.asarray(cursor[0], dtype=self.sorted_keys.dtype if self.sorted_keys.dtype.kind != 'U' else str)
+        except (ValueError, TypeError, OverflowError):
+            return None
+        return key, cursor[1]
+
+    def ordered(self, descending):
+        """Row positions in the requested direction."""
+        return self.order[::-1] if descending else self.order
+
+def encode_cursor(key, transaction_id):
+    """
+    Encode a keyset cursor as a URL-safe token.
+
+    Args:
+        key: Sort key of the boundary row (str, float or int)
+        transaction_id (int): Transaction ID of the boundary row
+
+    Returns:
+        str: Cursor token
+    """
+    payload = json.dumps([key, int(transaction_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor token created by encode_cursor.
+
+    Args:
+        token (str): Cursor token
+
+    Returns:
+        tuple: (key, transaction_id), or None if the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return key, int(transaction_id)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+class TransactionSnapshot:
+    """
+    Immutable view of the loaded transactions and structures derived from them.
+
+    Request handlers must treat df as read-only and copy before adding or
+    modifying columns.
+    """
+
+    def __init__(self, df, version, previous=None):
+        self.df = df
+        self.version = version
+        self.loaded_at = time.time()
+        self.filter_options = {
+            'categories': sorted(df['category'].dropna().unique().tolist()),
+            'sources': sorted(df['source'].dropna().unique().tolist()),
+            'merchants': sorted(df['merchant'].dropna().unique().tolist()) if 'merchant' in df.columns else [],
+        }
+        self._sort_indexes = {}
+        self._timeseries_index = None
+        self._rolling_metrics = None
+        self._merchant_index = None
+        # Transactions appended to the previous snapshot are merged into its rolling totals
+        if previous is not None and previous._rolling_metrics is not None:
+            if previous._rolling_metrics.can_extend_to(df, previous.df):
+                self._rolling_metrics = previous._rolling_metrics.extended(df.iloc[len(previous.df):])
+        self._masks = OrderedDict()
+        self._columnar_df = None
+        self._lock = threading.Lock()
+        # Transaction types are matched case-insensitively
+        self.bitmap_index = BitmapIndex(df, BITMAP_COLUMNS, normalizers={'transaction_type': lambda values: values.str.lower()})
+        self.search_index = SearchIndex(df, SEARCH_COLUMNS)
+
+    def build_indexes(self):
+        """Build every index and the rolling totals now rather than on first use."""
+        for name in self.bitmap_index.indexed_columns:
+            self.bitmap_index.column(name)
+        for name in self.search_index.columns:
+            self.search_index.column(name)
+        for sort in SORT_COLUMNS:
+            if SORT_COLUMNS[sort] in self.df.columns:
+                self.sort_index(sort)
+        self.timeseries_index()
+        self.rolling_metrics()
+        if 'merchant' in self.df.columns:
+            self.merchant_index()
+
+    def memory_bytes(self):
+        """
+        Estimate the memory held by the transactions and the structures derived from them.
+
+        Indexes, rolling totals, cached masks and the columnar copy are built
+        on first use, so the estimate grows as the snapshot is used.
+
+        Returns:
+            int: Approximate size in bytes, strings included
+        """
+        seen = set()
+        size = estimate_size(self.df, seen)
+        with self._lock:
+            masks = list(self._masks.values())
+        derived = (
+            self.filter_options, self.bitmap_index, self.search_index, self._sort_indexes,
+            self._timeseries_index, self._rolling_metrics, self._merchant_index, masks, self._columnar_df,
+        )
+        return size + sum(estimate_size(item, seen) for item in derived)
+
+    def predicate_mask(self, key, compute):
+        """
+        Return the boolean mask of a filter predicate, computing it on first use.
+
+        Args:
+            key (tuple): Hashable predicate description, e.g. ('category', 'Groceries')
+            compute (callable): Computes the mask from this snapshot
+
+        Returns:
+            np.ndarray: Read-only boolean mask aligned with df rows
+        """
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = np.asarray(compute(self), dtype=bool)
+        mask.flags.writeable = False
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+    def columnar_df(self):
+        """
+        Return a typed copy of df for columnar exports, built on first use.
+
+        Low-cardinality text columns are converted to categoricals so binary
+        exports carry them dictionary-encoded.
+
+        Returns:
+            pd.DataFrame: Typed transactions aligned with df rows
+        """
+        if self._columnar_df is None:
+            with self._lock:
+                if self._columnar_df is None:
+                    columnar = self.df.copy()
+                    # Shared snapshots attach every text column as a categorical in first-seen order
+                    for column in columnar.columns:
+                        if isinstance(columnar[column].dtype, pd.CategoricalDtype):
+                            columnar[column] = columnar[column].astype(object)
+                    for column in CATEGORICAL_COLUMNS:
+                        if column in columnar.columns:
+                            columnar[column] = columnar[column].astype('category')
+                    self._columnar_df = columnar
+        return self._columnar_df
+
+    def sort_keys(self, sort):
+        """
+        Return the comparable key array for a sort column.
+
+        Args:
+            sort (str): Name from SORT_COLUMNS
+
+        Returns:
+            np.ndarray: Keys aligned with df rows
+        """
+        column = self.df[SORT_COLUMNS[sort]]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return column.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        if pd.api.types.is_numeric_dtype(column):
+            return column.fillna(-np.inf).to_numpy(dtype=float)
+        return column.astype(object).fillna('').astype(str).to_numpy(dtype=str)
+
+    def sort_index(self, sort):
+        """Return the sort index for a column, building it on first use."""
+        index = self._sort_indexes.get(sort)
+        if index is None:
+            with self._lock:
+                index = self._sort_indexes.get(sort)
+                if index is None:
+                    index = SortIndex(self.sort_keys(sort))
+                    self._sort_indexes[sort] = index
+        return index
+
+    def timeseries_index(self):
+        """Return the calendar index of transaction dates, building it on first use."""
+        if self._timeseries_index is None:
+            with self._lock:
+                if self._timeseries_index is None:
+                    self._timeseries_index = TimeSeriesIndex(self.df['transaction_date'])
+        return self._timeseries_index
+
+    def rolling_metrics(self):
+        """Return the rolling spending totals, building them on first use."""
+        if self._rolling_metrics is None:
+            with self._lock:
+                if self._rolling_metrics is None:
+                    self._rolling_metrics = RollingMetrics.build(self.df)
+        return self._rolling_metrics
+
+    def merchant_index(self):
+        """Return the per-merchant row positions and statistics, building them on first use."""
+        if self._merchant_index is None:
+            with self._lock:
+                if self._merchant_index is None:
+                    self._merchant_index = MerchantIndex(self.df)
+        return self._merchant_index
+
+    def page(self, mask, sort, descending, page_size, after=None, before=None):
+        """
+        Select one page of matching rows using a keyset cursor.
+
+        Args:
+            mask (np.ndarray): Boolean filter aligned with df rows
+            sort (str): Name from SORT_COLUMNS
+            descending (bool): Sort direction
+            page_size (int): Rows per page
+            after (str): Cursor of the last row of the previous page
+            before (str): Cursor of the first row of the next page
+
+        Returns:
+            dict: rows (DataFrame in page order), next_cursor and prev_cursor
+                (None at either end)
+        """
+        index = self.sort_index(sort)
+        ordered_rows = index.ordered(descending)
+        ordered_mask = mask[ordered_rows]
+
+        after_cursor = index.validate_cursor(decode_cursor(after)) if after else None
+        before_cursor = index.validate_cursor(decode_cursor(before)) if before else None
+
+        if before_cursor is not None:
+            end = index.end_before(before_cursor[0], before_cursor[1], descending)
+            positions = np.flatnonzero(ordered_mask[:end])[-page_size:]
+            has_previous = len(positions) > 0 and ordered_mask[:positions[0]].any()
+            has_next = True
+        else:
+            start = index.start_after(after_cursor[0], after_cursor[1], descending) if after_cursor is not None else 0
+            positions = np.flatnonzero(ordered_mask[start:])[:page_size + 1] + start
+            has_next = len(positions) > page_size
+            positions = positions[:page_size]
+            has_previous = after_cursor is not None and ordered_mask[:start].any()
+
+        rows = ordered_rows[positions]
+        keys = index.sorted_keys[::-1] if descending else index.sorted_keys
+        next_cursor = prev_cursor = None
+        if len(rows) and has_next:
+            next_cursor = encode_cursor(keys[positions[-1]].item(), rows[-1])
+        if len(rows) and has_previous:
+            prev_cursor = encode_cursor(keys[positions[0]].item(), rows[0])
+
+        return {
+            'rows': self.df.iloc[rows],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+        }
+
+class TransactionStore:
+    """
+    Holds the current transaction snapshot.
+
+    The snapshot is loaded on first use and then served without checking the
+    source file. refresh() reloads it when the file has changed; the app
+    calls it from a background watcher and after rebuilding the file, never
+    while answering a request.
+
+    With shared snapshots, the first worker to see a new version loads and
+    publishes it, and every worker attaches to the published copy.
+    """
+
+    def __init__(self, loader, file_path, shared=None):
+        self.loader = loader
+        self.file_path = file_path
+        self.shared = shared
+        # Version and modification time of the last loaded file, kept when the snapshot is released
+        self.version = None
+        self.modified = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def file_state(self):
+        """
+        Version string of the source file from its modification time and size.
+
+        Returns:
+            tuple: (version, modification time in seconds since the epoch)
+        """
+        stat = os.stat(self.file_path)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}", stat.st_mtime
+
+    def _load(self, version, modified):
+        """Load a file version, passing the replaced snapshot on so appended rows extend its rolling totals."""
+        df = self.shared.load(version, self.loader) if self.shared is not None else self.loader()
+        self._snapshot = TransactionSnapshot(df, version, previous=self._snapshot)
+        self.version = version
+        self.modified = modified
+
+    def get(self):
+        """
+        Return the current snapshot, loading it on first use.
+
+        Returns:
+            TransactionSnapshot: Current snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._load(*self.file_state())
+            return self._snapshot
+
+    def refresh(self, force=False):
+        """
+        Reload the snapshot if the source file changed since it was loaded.
+
+        Args:
+            force (bool): Reload even if the file looks unchanged, e.g. right
+                after rewriting it within the file system's timestamp resolution
+
+        Returns:
+            bool: Whether a new snapshot was swapped in; False when none is loaded
+        """
+        if self._snapshot is None:
+            return False
+        version, modified = self.file_state()
+        if not force and version == self._snapshot.version:
+            return False
+        with self._lock:
+            if self._snapshot is None or (not force and version == self._snapshot.version):
+                return False
+            self._load(version, modified)
+            return True
+
+    def current(self):
+        """Return the loaded snapshot without loading it, or None."""
+        return self._snapshot
+
+    def release(self):
+        """Drop the current snapshot to free its memory; the next get() loads the file from scratch."""
+        with self._lock:
+            self._snapshot = None
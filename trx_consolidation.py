@@ -11,6 +11,7 @@ import pandas as pd
 import glob
 import re
 from datetime import datetime
+from pipeline_instrumentation import PipelineProfiler, disabled_profiler
 
 def process_amex_transactions(file_path):
     """
@@ -194,13 +195,14 @@ def get_date_range_from_filename(file_path):
             return None, None
     return None, None
 
-def consolidate_transactions(data_folder, output_file='consolidated_transactions.csv'):
+def consolidate_transactions(data_folder, output_file='consolidated_transactions.csv', profiler=None):
     """
     Consolidate transaction data from multiple sources into a single DataFrame.
     
     Args:
         data_folder (str): Path to folder containing transaction files
         output_file (str): Name of output CSV file
+        profiler (PipelineProfiler): Optional profiler recording each consolidation stage
         
     Returns:
         pd.DataFrame: Consolidated transactions DataFrame
@@ -214,11 +216,16 @@ def consolidate_transactions(data_folder, output_file='consolidated_transactions
     if not csv_files:
         raise ValueError(f"No transaction files found in {data_folder}")
     
+    if profiler is None:
+        profiler = disabled_profiler()
+    
     # Process each file
     filtered_transactions = []
     for filename in csv_files:
         filepath = os.path.join(data_folder, filename)
-        transactions = process_file(filepath)
+        with profiler.stage(f"process_file:{filename}") as stage:
+            transactions = process_file(filepath)
+            stage.rows_out = 0 if transactions is None else len(transactions)
         
         if transactions is not None and not transactions.empty:
             print(f"Processed {filepath}: {len(transactions)} transactions")
@@ -227,14 +234,18 @@ def consolidate_transactions(data_folder, output_file='consolidated_transactions
             print(f"Warning: No transactions processed from {filepath}")
     
     # Concat with clear dtypes to avoid warnings
-    consolidated_df = pd.concat(filtered_transactions, ignore_index=True, sort=False)
+    rows_in = sum(len(transactions) for transactions in filtered_transactions)
+    with profiler.stage('concat', rows_in=rows_in):
+        consolidated_df = pd.concat(filtered_transactions, ignore_index=True, sort=False)
     
     # Sort by transaction date
-    consolidated_df = consolidated_df.sort_values('transaction_date', ascending=False)
+    with profiler.stage('sort_by_date', rows_in=len(consolidated_df)):
+        consolidated_df = consolidated_df.sort_values('transaction_date', ascending=False)
     
     # Save to CSV
     output_path = os.path.join(data_folder, output_file)
-    consolidated_df.to_csv(output_path, index=False)
+    with profiler.stage('save_consolidated_transactions', rows_in=len(consolidated_df)):
+        consolidated_df.to_csv(output_path, index=False)
     
     print(f"Consolidated {len(consolidated_df)} transactions from {len(filtered_transactions)} files to {output_path}")
     return consolidated_df
@@ -285,11 +296,17 @@ def analyze_transactions(transactions_df):
 
 def main():
     """Main function to run the transaction consolidation process."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     # Set data folder path
     data_folder = 'data'
     
     # Consolidate transactions
-    transactions = consolidate_transactions(data_folder)
+    with PipelineProfiler('trx_consolidation') as profiler:
+        transactions = consolidate_transactions(data_folder, profiler=profiler)
+        profiler.print_summary()
+        print(f"Saved pipeline report to {profiler.save_report()}")
     
     # Perform analysis if transactions were found
     if transactions is not None: